@@ -0,0 +1,82 @@
+"""Backfills compliance analysis for a list of YouTube video URIs.
+
+Videos go through the same path as live webhooks (verdict cache, batcher,
+structure_slack_response, send_slack_notification).
+
+    python backfill.py uris.txt --channel-name "My Channel" --batch-size 8 --notify
+"""
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qs, urlparse
+
+import main
+from services.batcher import AnalysisBatcher, MultiVideoBatchBackend
+from services.slack import send_slack_notification
+
+
+def video_id_from_uri(uri):
+    parsed = urlparse(uri)
+    video_id = parse_qs(parsed.query).get("v", [None])[0]
+    return video_id or parsed.path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def backfill_one(uri, channel_name, notify):
+    response_text = main.analyze_video("YouTube", video_id_from_uri(uri), uri, main.PLATFORMS["YouTube"].prompt, "",
+                                       channel_name)
+    message = main.structure_slack_response(response_text, "YouTube", channel_name, uri, "N/A")
+    if notify:
+        send_slack_notification(message)
+    return response_text
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Backfill compliance analysis for YouTube videos.")
+    parser.add_argument("uri_file", help="File with one video URI per line ('-' for stdin).")
+    parser.add_argument("--channel-name", default="Backfill")
+    parser.add_argument("--concurrency", type=int, default=16, help="Videos analyzed at the same time.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Videos per Gemini request (1 disables batching).")
+    parser.add_argument("--batch-window-ms", type=int, default=500)
+    parser.add_argument("--notify", action="store_true", help="Send a Slack message per video.")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.uri_file == "-" else open(args.uri_file, encoding="utf-8")
+    with source:
+        uris = [line.strip() for line in source if line.strip()]
+
+    if args.batch_size > 1:
+        main.ANALYSIS_BATCHER = AnalysisBatcher(
+            MultiVideoBatchBackend(main.governed_generate_batch, main.governed_generate),
+            max_batch_size=args.batch_size,
+            max_wait_seconds=args.batch_window_ms / 1000,
+            concurrency=max(1, args.concurrency // args.batch_size),
+        )
+    else:
+        main.ANALYSIS_BATCHER = None
+
+    started = time.monotonic()
+    done = failed = included = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(backfill_one, uri, args.channel_name, args.notify): uri for uri in uris}
+        for future in as_completed(futures):
+            try:
+                included += future.result() == "True"
+                done += 1
+            except Exception as e:
+                failed += 1
+                logging.error("Backfill failed for %s: %s", futures[future], e)
+            if (done + failed) % 50 == 0:
+                elapsed = time.monotonic() - started
+                print(f"{done + failed}/{len(uris)} videos, {(done + failed) / elapsed:.2f} videos/s", file=sys.stderr)
+
+    elapsed = time.monotonic() - started
+    print(f"analyzed={done} failed={failed} included={included} "
+          f"elapsed={elapsed:.1f}s throughput={done / elapsed if elapsed else 0.0:.2f} videos/s")
+    if main.ANALYSIS_BATCHER is not None:
+        print(f"batches={main.ANALYSIS_BATCHER.stats()}")
+
+
+if __name__ == "__main__":
+    main_cli()
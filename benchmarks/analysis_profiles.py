@@ -0,0 +1,186 @@
+"""Analysis profiles: accuracy, tokens and latency on a labeled dataset against a fake model.
+
+Every video of the dataset is analyzed with gemini.generate() once per
+profile. The fake Vertex endpoint reads the sampled segments, fps, media
+resolution and thinking budget from each request and answers like a
+schema-constrained model that can only see the sampled frames: a
+disclosure is found when a frame falls inside its on-screen interval, and
+small on-screen text is missed at low resolution. Token counts follow the
+documented per-frame costs (258 tokens, 66 at low resolution, plus 32
+audio tokens per second); latency grows with input and thinking tokens.
+
+Dataset lines (JSONL):
+    {"id": "v1", "label": true, "disclosure": [0.0, 4.0], "small_text": false, "text": ""}
+
+    python -m benchmarks.analysis_profiles --videos 300 --profiles "legacy;standard;opening;sparse"
+    python -m benchmarks.analysis_profiles --dataset labeled.jsonl --profiles "standard;opening,fps=2"
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeVertexServer, fake_credentials
+from services import gemini
+from services.profiles import parse_profile
+
+TOKENS_PER_FRAME = {"MEDIA_RESOLUTION_LOW": 66}
+DEFAULT_TOKENS_PER_FRAME = 258
+AUDIO_TOKENS_PER_SECOND = 32
+PROMPT_TOKENS = 120
+# 동적 thinking(-1)일 때 fake 모델이 쓰는 thinking 토큰 수
+DYNAMIC_THINKING_TOKENS = 900
+
+
+def synthetic_dataset(count, seed):
+    """Half the videos carry a disclosure: mostly in the opening seconds, some later or in small text."""
+    rng = random.Random(seed)
+    videos = []
+    for i in range(count):
+        video = {"id": f"v{i:05d}", "label": rng.random() < 0.5, "disclosure": None, "small_text": False, "text": ""}
+        if video["label"]:
+            placement = rng.random()
+            start = rng.uniform(0, 3) if placement < 0.75 else rng.uniform(15, 55)
+            video["disclosure"] = [round(start, 2), round(start + rng.uniform(2, 6), 2)]
+            video["small_text"] = rng.random() < 0.15
+        videos.append(video)
+    return videos
+
+
+def read_dataset(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def parse_offset(value):
+    return float(value.rstrip("s"))
+
+
+class FakeVideoModel:
+    """respond() hook for FakeVertexServer that answers from the labeled dataset."""
+
+    def __init__(self, videos, input_us_per_token, output_us_per_token, base_ms):
+        self._videos = {video["id"]: video for video in videos}
+        self._input_us = input_us_per_token
+        self._output_us = output_us_per_token
+        self._base_ms = base_ms
+        self._lock = threading.Lock()
+        self.usage = []
+
+    def respond(self, request, model):
+        config = request.get("generationConfig", {})
+        per_frame = TOKENS_PER_FRAME.get(config.get("mediaResolution"), DEFAULT_TOKENS_PER_FRAME)
+        budget = config.get("thinkingConfig", {}).get("thinkingBudget", -1)
+        thoughts = DYNAMIC_THINKING_TOKENS if budget < 0 else min(budget, DYNAMIC_THINKING_TOKENS)
+
+        found = False
+        prompt_tokens = PROMPT_TOKENS
+        for content in request["contents"]:
+            for part in content["parts"]:
+                if "fileData" not in part:
+                    continue
+                video = self._videos[part["fileData"]["fileUri"].rsplit("/", 1)[-1].split(".", 1)[0]]
+                metadata = part.get("videoMetadata", {})
+                start = parse_offset(metadata.get("startOffset", "0s"))
+                end = parse_offset(metadata.get("endOffset", "60s"))
+                fps = metadata.get("fps", 1.0)
+                frames = [start + k / fps for k in range(math.ceil((end - start) * fps))]
+                prompt_tokens += len(frames) * per_frame + int((end - start) * AUDIO_TOKENS_PER_SECOND)
+                disclosure = video.get("disclosure")
+                readable = not (video.get("small_text") and per_frame < DEFAULT_TOKENS_PER_FRAME)
+                if disclosure and readable and any(disclosure[0] <= t <= disclosure[1] for t in frames):
+                    found = True
+
+        usage = {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 1, "thoughtsTokenCount": thoughts,
+                 "totalTokenCount": prompt_tokens + 1 + thoughts}
+        with self._lock:
+            self.usage.append(usage)
+        latency = (self._base_ms * 1000 + prompt_tokens * self._input_us + (thoughts + 1) * self._output_us) / 1e6
+        return ("true" if found else "false"), usage, latency
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run_profile(profile, videos, model, concurrency, fake):
+    fake.usage.clear()
+    latencies = []
+    verdicts = {}
+
+    def analyze(video):
+        started = time.perf_counter()
+        verdicts[video["id"]] = gemini.generate(
+            f"gs://dataset/{video['id']}.mp4", "prompt", video.get("text", ""), model=model, profile=profile)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(analyze, videos))
+    seconds = time.perf_counter() - started
+
+    positives = [video for video in videos if video["label"]]
+    correct = sum((verdicts[video["id"]] == "True") == bool(video["label"]) for video in videos)
+    recalled = sum(verdicts[video["id"]] == "True" for video in positives)
+    return {
+        "profile": profile.name,
+        "accuracy": correct / len(videos),
+        "recall": recalled / len(positives) if positives else 0.0,
+        "avg_prompt_tokens": sum(u["promptTokenCount"] for u in fake.usage) / len(fake.usage),
+        "avg_thought_tokens": sum(u["thoughtsTokenCount"] for u in fake.usage) / len(fake.usage),
+        "total_tokens": sum(u["totalTokenCount"] for u in fake.usage),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "videos_per_second": len(videos) / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", help="Labeled JSONL dataset (a synthetic one is generated otherwise).")
+    parser.add_argument("--videos", type=int, default=300, help="Size of the synthetic dataset.")
+    parser.add_argument("--save-dataset", help="Write the dataset used to this JSONL file.")
+    parser.add_argument("--profiles", default="legacy;standard;opening;sparse;thorough",
+                        help="';'-separated profile specs (see services/profiles.py).")
+    parser.add_argument("--model", choices=("pro", "flash"), default="pro")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--base-ms", type=float, default=20.0, help="Fake model latency per call.")
+    parser.add_argument("--input-us-per-token", type=float, default=20.0)
+    parser.add_argument("--output-us-per-token", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    videos = read_dataset(args.dataset) if args.dataset else synthetic_dataset(args.videos, args.seed)
+    if args.save_dataset:
+        with open(args.save_dataset, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(video) + "\n" for video in videos)
+    profiles = [parse_profile(spec) for spec in args.profiles.split(";") if spec.strip()]
+    model = gemini.MODEL if args.model == "pro" else gemini.FLASH_MODEL
+
+    fake = FakeVideoModel(videos, args.input_us_per_token, args.output_us_per_token, args.base_ms)
+    with FakeVertexServer(respond=fake.respond) as vertex:
+        gemini.set_client(gemini.create_client(
+            project="benchmark", credentials=fake_credentials(), base_url=vertex.url, pool_size=args.concurrency))
+        results = [run_profile(profile, videos, model, args.concurrency, fake) for profile in profiles]
+
+    if args.json:
+        print(json.dumps({"videos": len(videos), "model": model, "results": results}, indent=2))
+        return
+    print(f"{len(videos)} videos, {model}")
+    print(f"{'profile':>16} {'accuracy':>9} {'recall':>7} {'prompt tok':>11} {'thought tok':>12} "
+          f"{'total tok':>10} {'p50 ms':>8} {'p95 ms':>8} {'videos/s':>9}")
+    for r in results:
+        print(f"{r['profile']:>16} {r['accuracy']:>9.3f} {r['recall']:>7.3f} {r['avg_prompt_tokens']:>11.0f} "
+              f"{r['avg_thought_tokens']:>12.0f} {r['total_tokens']:>10} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['videos_per_second']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
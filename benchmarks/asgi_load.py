@@ -0,0 +1,202 @@
+"""Load test: functions_framework handler (main.py) vs the asyncio entry point (main_async.py).
+
+Each entry point runs in a subprocess on functions_framework's production
+server (gunicorn threads for main.py, a uvicorn worker for main_async.py)
+with Gemini and Slack pointed at local fakes. Signed TikTok webhooks are
+posted at a fixed concurrency; the report shows requests/sec, p50/p99 ack
+latency and the time until every analysis reached the fake Slack.
+
+    python -m benchmarks.asgi_load --requests 1000 --concurrency 100 --gemini-latency-ms 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.fakes import FakeSlackServer, FakeVertexServer, fake_credentials
+from benchmarks.payloads import tiktok_event
+
+ENTRY_POINTS = {
+    "sync": ("main.py", "youtube_webhook"),
+    "async": ("main_async.py", "youtube_webhook_async"),
+}
+SECRET = "bench-secret"
+
+
+def serve(mode, port):
+    """Runs one entry point the way `functions-framework [--asgi]` would, with a fake Gemini credential."""
+    from functions_framework import create_app
+    from functions_framework._http import create_server
+    from functions_framework.aio import create_asgi_app
+
+    from services import gemini
+
+    source, target = ENTRY_POINTS[mode]
+    app = (create_asgi_app if mode == "async" else create_app)(target=target, source=source)
+    gemini.set_client(gemini.create_client(project="benchmark", credentials=fake_credentials()))
+    create_server(app, debug=False).run("127.0.0.1", port)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def post_loop(port, requests, latencies, statuses):
+    """Posts requests one after another over a single keep-alive connection."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for headers, body in requests:
+            head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+            started = time.perf_counter()
+            writer.write(f"POST / HTTP/1.1\r\nHost: 127.0.0.1\r\n{head}Content-Length: {len(body)}\r\n\r\n".encode()
+                         + body)
+            status_line = await reader.readline()
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            status = int(status_line.split()[1]) if status_line else "error"
+            statuses[status] = statuses.get(status, 0) + 1
+    except (OSError, asyncio.IncompleteReadError):
+        statuses["error"] = statuses.get("error", 0) + 1
+    finally:
+        writer.close()
+
+
+async def fire(port, requests, concurrency):
+    """Posts every request with `concurrency` connections in flight; returns (ack latencies, statuses, seconds).
+
+    A bare asyncio HTTP/1.1 client keeps the load generator's own CPU cost
+    well below the servers' so it does not dominate the ack latency.
+    """
+    latencies = []
+    statuses = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        post_loop(port, requests[i::concurrency], latencies, statuses) for i in range(concurrency)
+    ))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def fire_cli(port, count, concurrency, offset):
+    requests = [tiktok_event(offset + i, SECRET) for i in range(count)]
+    latencies, statuses, seconds = asyncio.run(fire(port, requests, concurrency))
+    print(json.dumps({"latencies": latencies, "statuses": statuses, "seconds": seconds}))
+
+
+def wait_ready(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run(mode, args, vertex, slack):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/"
+    env = dict(
+        os.environ,
+        GEMINI_BASE_URL=vertex.url,
+        SLACK_WEBHOOK_URL=slack.url,
+        SLACK_RATE_PER_SECOND="100000",
+        SLACK_BURST="1000",
+        TIKTOK_CLIENT_SECRET=SECRET,
+        TIKTOK_CHANNEL_NAME="benchmark",
+        JOB_QUEUE_BACKEND=args.queue_backend,
+        JOB_QUEUE_PATH=f"/tmp/asgi_load_{port}.sqlite3",
+        JOB_QUEUE_MAX_DEPTH=str(args.requests * 2),
+        ASYNC_MAX_PENDING=str(args.requests * 2),
+        # 두 진입점 모두 같은 수의 Gemini 호출을 동시에 보냅니다 (스레드 vs 코루틴).
+        JOB_QUEUE_WORKERS=str(args.analysis_concurrency),
+        GEMINI_HTTP_POOL_SIZE=str(args.analysis_concurrency),
+        ASYNC_GEMINI_CONCURRENCY=str(args.analysis_concurrency),
+        LOG_LEVEL="WARNING",
+    )
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.asgi_load", "--serve", mode, "--port", str(port)], env=env, cwd=cwd)
+    try:
+        wait_ready(url, process)
+        slack.received.clear()
+        # 부하 생성기는 fake 서버와 GIL 을 나눠 쓰지 않도록 별도 프로세스에서 실행합니다.
+        # 진입점마다 다른 영상 ID 를 써서 중복 제거에 걸리지 않게 합니다.
+        offset = {"sync": 0, "async": 1}[mode] * args.requests
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.asgi_load", "--fire", str(port), "--requests", str(args.requests),
+             "--concurrency", str(args.concurrency), "--offset", str(offset)],
+            check=True, capture_output=True, text=True, cwd=cwd,
+        ).stdout
+        fired = json.loads(output)
+        latencies, statuses = fired["latencies"], fired["statuses"]
+        accepted = statuses.get("202", 0)
+        while len(slack.received) < accepted and time.perf_counter() - started < args.drain_timeout:
+            time.sleep(0.05)
+        drain_seconds = time.perf_counter() - started
+        return {
+            "rps": args.requests / fired["seconds"],
+            "p50": percentile(latencies, 0.50),
+            "p99": percentile(latencies, 0.99),
+            "statuses": statuses,
+            "notified": len(slack.received),
+            "drain": drain_seconds,
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="Webhook requests in flight.")
+    parser.add_argument("--gemini-latency-ms", type=float, default=1000.0)
+    parser.add_argument("--analysis-concurrency", type=int, default=64,
+                        help="JOB_QUEUE_WORKERS for main.py, ASYNC_GEMINI_CONCURRENCY for main_async.py.")
+    parser.add_argument("--queue-backend", default="memory", help="JOB_QUEUE_BACKEND for the sync handler.")
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--serve", choices=ENTRY_POINTS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--fire", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--offset", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.port)
+    if args.fire:
+        return fire_cli(args.fire, args.requests, args.concurrency, args.offset)
+
+    with FakeVertexServer("False", latency=args.gemini_latency_ms / 1000) as vertex, FakeSlackServer() as slack:
+        print(f"{'entry':>6} {'req/s':>8} {'p50 ack ms':>11} {'p99 ack ms':>11} "
+              f"{'notified':>9} {'all notified s':>15}  statuses")
+        for mode in args.modes.split(","):
+            result = run(mode, args, vertex, slack)
+            print(f"{mode:>6} {result['rps']:>8.0f} {result['p50'] * 1000:>11.1f} {result['p99'] * 1000:>11.1f} "
+                  f"{result['notified']:>9} {result['drain']:>15.1f}  {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
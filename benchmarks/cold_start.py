@@ -0,0 +1,142 @@
+"""Cold start: import time and first-request latency per request path.
+
+Every run is a fresh Python process that does what the Cloud Functions
+runtime does on a cold start: import functions_framework, load main.py
+with create_app() and serve one request through the Flask app, then a
+second request on the same path. The report shows, per path, the median
+framework import, main.py import, first and second request latency and
+which heavy modules (genai SDK, requests, httpx) had been imported by the
+time the first response was ready.
+
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --warmup off,background,eager
+    python -m benchmarks.cold_start --tree /path/to/other/checkout   # compare with another revision
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("google.genai", "requests", "httpx")
+VERIFY_TOKEN = "cold-start-token"
+ADMIN_TOKEN = "cold-start-admin"
+
+# (method, query string, body file key)
+PATHS = {
+    "youtube-challenge": ("GET", "hub.mode=subscribe&hub.challenge=abc123&hub.topic=t&hub.lease_seconds=432000", None),
+    "facebook-verify": ("GET", f"hub.mode=subscribe&hub.verify_token={VERIFY_TOKEN}&hub.challenge=abc123", None),
+    "stats": ("GET", "stats", None),
+    "metrics": ("GET", "metrics", None),
+    "youtube-post": ("POST", "", "youtube"),
+}
+
+
+def child(path, body_file):
+    """Runs inside the fresh process; prints one JSON line and exits without waiting for worker threads."""
+    started = time.perf_counter()
+    import functions_framework
+    framework_loaded = time.perf_counter()
+    sys.path.insert(0, os.getcwd())
+    app = functions_framework.create_app(target="youtube_webhook", source=os.path.join(os.getcwd(), "main.py"))
+    main_loaded = time.perf_counter()
+
+    method, query, _ = PATHS[path]
+    kwargs = {"method": method, "query_string": query, "headers": {"Authorization": f"Bearer {ADMIN_TOKEN}"}}
+    if body_file:
+        with open(body_file, "rb") as f:
+            kwargs.update(data=f.read(), headers={"Content-Type": "application/atom+xml"})
+    client = app.test_client()
+    response = client.open("/", **kwargs)
+    first_done = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    client.open("/", **kwargs)
+    second_done = time.perf_counter()
+
+    print(json.dumps({
+        "status": response.status_code,
+        "framework_ms": (framework_loaded - started) * 1000,
+        "import_ms": (main_loaded - framework_loaded) * 1000,
+        "first_request_ms": (first_done - main_loaded) * 1000,
+        "second_request_ms": (second_done - first_done) * 1000,
+        "heavy_modules": loaded,
+    }))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def run_once(tree, path, warmup, body_files, directory):
+    env = dict(
+        os.environ,
+        WARMUP=warmup,
+        FACEBOOK_VERIFY_TOKEN=VERIFY_TOKEN,
+        ADMIN_API_TOKEN=ADMIN_TOKEN,
+        GCP_PROJECT="cold-start",
+        # 실제 Vertex/Slack 으로 요청이 나가지 않도록 닫힌 포트를 가리킵니다.
+        GEMINI_BASE_URL="http://127.0.0.1:9",
+        SLACK_WEBHOOK_URL="",
+        JOB_QUEUE_PATH=os.path.join(directory, f"jobs_{time.monotonic_ns()}.sqlite3"),
+        RESULTS_DB_PATH=os.path.join(directory, f"results_{time.monotonic_ns()}.sqlite3"),
+        LOG_LEVEL="ERROR",
+        PYTHONDONTWRITEBYTECODE="1",
+    )
+    body_key = PATHS[path][2]
+    command = [sys.executable, os.path.abspath(__file__), "--child", path]
+    if body_key:
+        command += ["--body-file", body_files[body_key]]
+    output = subprocess.run(command, cwd=tree, env=env, capture_output=True, text=True, timeout=120)
+    lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"{path} run failed:\n{output.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per path and warm-up mode.")
+    parser.add_argument("--paths", default=",".join(PATHS))
+    parser.add_argument("--warmup", default="off", help="Comma-separated WARMUP modes to compare.")
+    parser.add_argument("--tree", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="Directory containing the main.py to measure.")
+    parser.add_argument("--json", action="store_true", help="Print every run as JSON.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--body-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.body_file)
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from benchmarks.payloads import youtube_feed
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        body_files = {"youtube": os.path.join(directory, "youtube.xml")}
+        with open(body_files["youtube"], "wb") as f:
+            f.write(youtube_feed(1))
+        for warmup in args.warmup.split(","):
+            for path in args.paths.split(","):
+                runs = [run_once(args.tree, path, warmup, body_files, directory) for _ in range(args.runs)]
+                results.append({"path": path, "warmup": warmup, "runs": runs})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.runs} cold starts per row (median), tree: {args.tree}")
+    print(f"{'path':>18} {'warmup':>10} {'status':>6} {'framework ms':>12} {'import ms':>9} {'1st req ms':>10} "
+          f"{'2nd req ms':>10} {'cold total ms':>13}  heavy modules after 1st response")
+    for result in results:
+        runs = result["runs"]
+        median = {key: statistics.median(run[key] for run in runs)
+                  for key in ("framework_ms", "import_ms", "first_request_ms", "second_request_ms")}
+        loaded = sorted({name for run in runs for name in run["heavy_modules"]})
+        print(f"{result['path']:>18} {result['warmup']:>10} {runs[0]['status']:>6} {median['framework_ms']:>12.1f} "
+              f"{median['import_ms']:>9.1f} {median['first_request_ms']:>10.1f} {median['second_request_ms']:>10.1f} "
+              f"{median['import_ms'] + median['first_request_ms']:>13.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
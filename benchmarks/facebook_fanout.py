@@ -0,0 +1,51 @@
+"""Throughput of batched Facebook feed webhooks with 1-500 changes.
+
+Parses each payload with the generator parser, then dispatches it through
+main.process_webhook with analyze/notify replaced by a fixed-latency
+stand-in, comparing sequential (FANOUT_CONCURRENCY=1) and concurrent fan-out.
+
+    python -m benchmarks.facebook_fanout --latency-ms 50
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from benchmarks.payloads import facebook_feed
+from services.dedup import MemoryIdempotencyStore
+from services.facebook_parser import parse_facebook_webhook
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,500")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stand-in analyze+notify latency.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    main.analyze_and_notify = lambda *event, **options: time.sleep(args.latency_ms / 1000)
+    headers = {"X-Hub-Signature-256": "sha256=0", "Content-Type": "application/json"}
+
+    print(f"{'changes':>8} {'parse us':>9} {'seq videos/s':>13} {'fan-out videos/s':>17}")
+    for size in map(int, args.sizes.split(",")):
+        body = facebook_feed(size, video_ratio=0.8)
+        payload = json.loads(body)
+        videos = sum(1 for _ in parse_facebook_webhook(payload))
+        started = time.perf_counter()
+        for _ in range(20):
+            sum(1 for _ in parse_facebook_webhook(payload))
+        parse_us = (time.perf_counter() - started) / 20 * 1e6
+
+        results = []
+        for workers in (1, args.concurrency):
+            main.FANOUT_EXECUTOR = ThreadPoolExecutor(max_workers=workers)
+            main.IDEMPOTENCY_STORE = MemoryIdempotencyStore()
+            started = time.perf_counter()
+            main.process_webhook("Facebook", headers, body)
+            results.append(videos / (time.perf_counter() - started))
+        print(f"{size:>8} {parse_us:>9.1f} {results[0]:>13.1f} {results[1]:>17.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,241 @@
+"""Local stand-ins for Vertex AI, Slack and the YouTube hub used by the benchmarks."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 부하 테스트에서 동시에 몰리는 연결을 받아낼 수 있도록 listen backlog 를 늘립니다.
+    request_queue_size = 1024
+
+
+# 응답 스키마(JSON boolean)를 따르는 모델이 돌려주는 답변
+VERDICT_JSON = {"True": "true", "False": "false"}
+
+
+def gemini_response_body(text="true", usage=None):
+    return json.dumps({
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": usage or {"promptTokenCount": 300, "candidatesTokenCount": 1, "totalTokenCount": 301},
+    }).encode("utf-8")
+
+
+ERROR_STATUSES = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+
+def gemini_error_body(code):
+    error = {"code": code, "message": "fake error", "status": ERROR_STATUSES.get(code, "UNKNOWN")}
+    return json.dumps({"error": error}).encode("utf-8")
+
+
+class _FakeVertexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        request_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.inflight += 1
+            status = server.statuses.pop(0) if server.statuses else server.fail_status or 200
+            if status == 200 and server.max_concurrent and server.inflight > server.max_concurrent:
+                status = 429
+        body = server.response_body if status == 200 else gemini_error_body(status)
+        try:
+            if status == 200:
+                # 경로의 모델 이름(.../models/gemini-2.5-pro:generateContent)으로 모델별 지연을 고릅니다.
+                model = self.path.rsplit("/", 1)[-1].split(":", 1)[0]
+                latency = server.model_latency.get(model, server.latency)
+                if server.respond is not None:
+                    text, usage, latency = server.respond(json.loads(request_body), model)
+                    body = gemini_response_body(text, usage)
+                if latency:
+                    time.sleep(latency)
+        finally:
+            with server.lock:
+                server.inflight -= 1
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 timeout 으로 먼저 연결을 끊은 경우입니다.
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeVertexServer:
+    """Answers every generateContent call with a fixed response on localhost after `latency` seconds.
+
+    `text` "True"/"False" is sent as the JSON boolean a schema-constrained
+    model returns; other strings are sent as is. respond(request_json, model)
+    -> (text, usageMetadata, latency) replaces the fixed answer per call.
+    model_latency overrides latency per model name. `statuses` are returned in
+    order first; while fail_status is set every call fails with it; calls
+    beyond max_concurrent in flight get 429 RESOURCE_EXHAUSTED like a quota.
+    """
+
+    def __init__(self, text="True", latency=0.0, model_latency=None, statuses=(), max_concurrent=0, respond=None):
+        self._server = _Server(("127.0.0.1", 0), _FakeVertexHandler)
+        self._server.response_body = gemini_response_body(VERDICT_JSON.get(text, text))
+        self._server.respond = respond
+        self._server.latency = latency
+        self._server.model_latency = dict(model_latency or {})
+        self._server.statuses = list(statuses)
+        self._server.fail_status = None
+        self._server.max_concurrent = max_concurrent
+        self._server.requests = 0
+        self._server.inflight = 0
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def fail_status(self):
+        return self._server.fail_status
+
+    @fail_status.setter
+    def fail_status(self, status):
+        self._server.fail_status = status
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def fake_credentials():
+    """Static OAuth credentials so the client never calls the metadata server."""
+    from google.oauth2.credentials import Credentials
+    return Credentials(token="fake-token")
+
+
+class _FakeSlackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            status = self.server.statuses.pop(0) if self.server.statuses else 200
+            if status == 200:
+                self.server.received.append(payload)
+        body = b"ok" if status == 200 else b"error"
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSlackServer:
+    """Slack incoming-webhook stand-in. `statuses` are returned in order before falling back to 200."""
+
+    def __init__(self, statuses=()):
+        self._server = _Server(("127.0.0.1", 0), _FakeSlackHandler)
+        self._server.statuses = list(statuses)
+        self._server.received = []
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/services/fake"
+
+    @property
+    def received(self):
+        return self._server.received
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _FakeHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        form = dict(parse_qsl(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")))
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            status = server.statuses.pop(0) if server.statuses else 202
+            server.received.append(form)
+        if status == 202 and server.verify is not None:
+            # 실제 허브처럼 응답 후에 콜백으로 확인 요청을 보냅니다.
+            lease = min(int(form.get("hub.lease_seconds") or server.lease_seconds), server.lease_seconds)
+            threading.Thread(target=server.verify, args=(form["hub.mode"], form["hub.topic"], str(lease)),
+                             daemon=True).start()
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeHubServer:
+    """PubSubHubbub hub stand-in for subscribe/unsubscribe requests.
+
+    Answers 202 after `latency` seconds (`statuses` are returned in order
+    first) and then calls verify(mode, topic, lease_seconds) from another
+    thread, the way the hub's verification GET reaches the callback. The
+    granted lease is capped at lease_seconds like the real hub does.
+    """
+
+    def __init__(self, latency=0.0, statuses=(), verify=None, lease_seconds=432000):
+        self._server = _Server(("127.0.0.1", 0), _FakeHubHandler)
+        self._server.latency = latency
+        self._server.statuses = list(statuses)
+        self._server.verify = verify
+        self._server.lease_seconds = lease_seconds
+        self._server.received = []
+        self._server.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/subscribe"
+
+    @property
+    def received(self):
+        return self._server.received
+
+    def set_verify(self, verify):
+        self._server.verify = verify
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
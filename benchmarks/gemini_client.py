@@ -0,0 +1,73 @@
+"""Per-call overhead of services.gemini.generate against a local fake Vertex endpoint.
+
+Compares the previous behaviour (new genai.Client and GenerateContentConfig
+on every call) with the shared client and precomputed config.
+
+    python -m benchmarks.gemini_client --calls 200
+"""
+import argparse
+import statistics
+import time
+
+from google import genai
+from google.genai import types
+
+from benchmarks.fakes import FakeVertexServer, fake_credentials
+from services import gemini
+
+
+def legacy_generate(base_url, file_uri, prompt, text):
+    """The pre-refactor generate(): client and config are rebuilt per call."""
+    client = genai.Client(
+        vertexai=True, project="bench", location="global", credentials=fake_credentials(),
+        http_options=types.HttpOptions(base_url=base_url),
+    )
+    contents = types.Content(role="user", parts=[
+        types.Part(
+            file_data=types.FileData(file_uri=file_uri, mime_type="video/*"),
+            video_metadata=types.VideoMetadata(start_offset="0.0s", end_offset="10.0s", fps=1.0),
+        ),
+        types.Part(text=text),
+        types.Part(text=prompt),
+    ])
+    config = types.GenerateContentConfig(
+        temperature=1, top_p=0.95, seed=0, max_output_tokens=65535,
+        safety_settings=[types.SafetySetting(category=category, threshold="OFF") for category in (
+            "HARM_CATEGORY_HATE_SPEECH", "HARM_CATEGORY_DANGEROUS_CONTENT",
+            "HARM_CATEGORY_SEXUALLY_EXPLICIT", "HARM_CATEGORY_HARASSMENT")],
+        thinking_config=types.ThinkingConfig(thinking_budget=-1),
+    )
+    return client.models.generate_content(model=gemini.MODEL, contents=contents, config=config).text
+
+
+def measure(fn, calls):
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        fn(f"https://www.youtube.com/watch?v=bench{i}")
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p99_ms": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    prompt = "확률형 아이템 포함 여부를 'True' 또는 'False' 로만 답변해주세요."
+
+    with FakeVertexServer() as server:
+        gemini.set_client(gemini.create_client(project="bench", credentials=fake_credentials(), base_url=server.url))
+        before = measure(lambda uri: legacy_generate(server.url, uri, prompt, ""), args.calls)
+        after = measure(lambda uri: gemini.generate(uri, prompt, ""), args.calls)
+
+    for name, result in (("per-call client", before), ("shared client", after)):
+        print(f"{name:16s} mean={result['mean_ms']:.2f}ms p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
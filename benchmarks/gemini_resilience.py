@@ -0,0 +1,127 @@
+"""Gemini call governance under quota pressure, an outage and a slow Pro model.
+
+Runs the same calls against a fake Vertex endpoint with and without a
+CallGovernor:
+
+  quota   the fake answers 429 RESOURCE_EXHAUSTED beyond --quota calls in flight
+  outage  every call fails with 503 UNAVAILABLE
+  slow    Pro answers after --pro-latency-ms; the governed run falls back to
+          Flash once --budget-ms is spent
+
+and reports successes, failures, requests that reached Vertex, wall time
+and p50/p99 latency per call.
+
+    python -m benchmarks.gemini_resilience --calls 400 --threads 64 --quota 8
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeVertexServer, fake_credentials
+from services import gemini
+from services.resilience import AdaptiveLimiter, CallGovernor, CircuitBreaker, is_transient
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run_calls(call, calls, threads):
+    """Runs call() `calls` times on `threads` threads; returns (ok, failed, latencies, seconds)."""
+    latencies = []
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            call()
+            return True
+        except Exception:
+            return False
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(one, range(calls)))
+    return sum(results), results.count(False), latencies, time.perf_counter() - started
+
+
+def governor(name, args, budget=300.0):
+    return CallGovernor(
+        name,
+        limiter=AdaptiveLimiter(initial=args.threads, max_limit=args.threads),
+        breaker=CircuitBreaker(name, reset_timeout=30.0),
+        attempt_timeout=budget,
+        latency_budget=budget,
+        backoff_base=args.backoff_ms / 1000,
+    )
+
+
+def generate(model=gemini.MODEL, timeout=None):
+    return gemini.generate("gs://benchmark/video.mp4", "prompt", "text", model=model, timeout=timeout)
+
+
+def governed(args):
+    pro = governor("pro", args)
+    return lambda: pro.call(lambda timeout: generate(timeout=timeout))
+
+
+def governed_with_fallback(args):
+    """main.call_pro_model 처럼 Pro 가 예산 안에 답하지 못하면 Flash 로 다시 묻습니다."""
+    pro = governor("pro", args, budget=args.budget_ms / 1000)
+    flash = governor("flash", args)
+
+    def call():
+        try:
+            return pro.call(lambda timeout: generate(gemini.MODEL, timeout))
+        except Exception as e:
+            if not is_transient(e):
+                raise
+        return flash.call(lambda timeout: generate(gemini.FLASH_MODEL, timeout))
+    return call
+
+
+def scenarios(args):
+    """Yields (name, FakeVertexServer options, {mode: make_call(args)})."""
+    latency = args.latency_ms / 1000
+    yield "quota", dict(latency=latency, max_concurrent=args.quota), {
+        "direct": lambda args: generate, "governed": governed}
+    yield "outage", dict(latency=latency), {"direct": lambda args: generate, "governed": governed}
+    yield "slow", dict(latency=latency, model_latency={gemini.MODEL: args.pro_latency_ms / 1000}), {
+        "direct": lambda args: generate, "governed": governed_with_fallback}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=64, help="Concurrent callers (and the limiter's maximum).")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake Gemini latency per call.")
+    parser.add_argument("--quota", type=int, default=8, help="Calls in flight the fake accepts before 429.")
+    parser.add_argument("--pro-latency-ms", type=float, default=2000.0)
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="Pro latency budget before falling back.")
+    parser.add_argument("--backoff-ms", type=float, default=50.0, help="Base retry backoff.")
+    parser.add_argument("--scenarios", default="quota,outage,slow")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'scenario':>8} {'mode':>9} {'ok':>5} {'failed':>6} {'vertex reqs':>11} {'seconds':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    selected = args.scenarios.split(",")
+    for name, server_options, modes in scenarios(args):
+        if name not in selected:
+            continue
+        for mode, make_call in modes.items():
+            with FakeVertexServer("True", **server_options) as vertex:
+                if name == "outage":
+                    vertex.fail_status = 503
+                gemini.set_client(gemini.create_client(
+                    project="benchmark", credentials=fake_credentials(), base_url=vertex.url, pool_size=args.threads))
+                ok, failed, latencies, seconds = run_calls(make_call(args), args.calls, args.threads)
+                print(f"{name:>8} {mode:>9} {ok:>5} {failed:>6} {vertex.requests:>11} {seconds:>8.2f} "
+                      f"{percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
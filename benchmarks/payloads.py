@@ -0,0 +1,87 @@
+"""Synthetic webhook payloads shaped like the real provider notifications."""
+import hashlib
+import hmac
+import json
+import time
+
+
+def youtube_entry(i, channel_id="UCbenchmarkchannel00000", disclosed=True):
+    disclosure = " (확률형 아이템 포함)" if disclosed else ""
+    return (
+        "<entry>"
+        f"<id>yt:video:vid{i:08d}</id>"
+        f"<yt:videoId>vid{i:08d}</yt:videoId>"
+        f"<yt:channelId>{channel_id}</yt:channelId>"
+        f"<title>신작 업데이트 영상 #{i}{disclosure}</title>"
+        f'<link rel="alternate" href="https://www.youtube.com/watch?v=vid{i:08d}"/>'
+        f"<author><name>Benchmark Channel</name><uri>https://www.youtube.com/channel/{channel_id}</uri></author>"
+        "<published>2026-10-01T00:00:00+00:00</published>"
+        "<updated>2026-10-01T00:00:05.123456+00:00</updated>"
+        "</entry>"
+    )
+
+
+def youtube_feed(entries=1, deleted=0, channel_id="UCbenchmarkchannel00000", start=0, disclosed_ratio=1.0):
+    """Builds a PubSubHubbub Atom feed with `entries` uploads and `deleted` tombstones.
+
+    Videos are numbered from `start`; about disclosed_ratio of the titles carry the disclosure phrase.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+        'xmlns:at="http://purl.org/atompub/tombstones/1.0" xmlns="http://www.w3.org/2005/Atom">'
+        '<link rel="hub" href="https://pubsubhubbub.appspot.com"/>'
+        f'<link rel="self" href="https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"/>'
+        "<title>YouTube video feed</title>"
+        "<updated>2026-10-01T00:00:05.123456+00:00</updated>"
+    ]
+    parts.extend(
+        youtube_entry(i, channel_id, disclosed=(i % 100) < disclosed_ratio * 100)
+        for i in range(start, start + entries)
+    )
+    parts.extend(
+        f'<at:deleted-entry ref="yt:video:del{i:08d}" when="2026-10-01T00:00:00+00:00">'
+        f'<link href="https://www.youtube.com/watch?v=del{i:08d}"/>'
+        f"<at:by><name>Benchmark Channel</name><uri>https://www.youtube.com/channel/{channel_id}</uri></at:by>"
+        "</at:deleted-entry>"
+        for i in range(start, start + deleted)
+    )
+    parts.append("</feed>")
+    return "".join(parts).encode("utf-8")
+
+
+def facebook_feed(changes=1, changes_per_entry=10, video_ratio=1.0, start=0):
+    """Builds a batched Facebook page feed webhook with `changes` feed changes numbered from `start`.
+
+    Roughly video_ratio of the changes are videos; the rest are photo posts.
+    """
+    entries = []
+    for first in range(start, start + changes, changes_per_entry):
+        entry_changes = []
+        for i in range(first, min(start + changes, first + changes_per_entry)):
+            is_video = (i % 100) < video_ratio * 100
+            entry_changes.append({"field": "feed", "value": {
+                "post_id": f"1234567890_{i}",
+                "item": "video" if is_video else "photo",
+                "verb": "add",
+                "message": f"신규 영상 #{i}",
+                "link": f"https://www.facebook.com/1234567890/videos/{i}/",
+                "created_time": 1790000000 + i,
+                "from": {"id": "1234567890", "name": "Benchmark Page"},
+            }})
+        entries.append({"id": "1234567890", "time": 1790000000 + first, "changes": entry_changes})
+    return json.dumps({"object": "page", "entry": entries}).encode("utf-8")
+
+
+def tiktok_event(i, secret, timestamp=None):
+    """Returns (headers, body) for a signed TikTok video.publish.complete webhook for video `i`."""
+    body = json.dumps({
+        "client_key": "benchmark",
+        "event": "video.publish.complete",
+        "create_time": 1790000000 + i,
+        "user_openid": "act.benchmark",
+        "content": json.dumps({"share_id": f"video.{7000000000000000000 + i}.bench"}),
+    }).encode("utf-8")
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + body, hashlib.sha256).hexdigest()
+    return {"Content-Type": "application/json", "TikTok-Signature": f"t={timestamp},s={signature}"}, body
@@ -0,0 +1,323 @@
+"""Whole-pipeline load and replay benchmark for main.youtube_webhook.
+
+Requests go through the real functions_framework Flask app in this process
+(routing, job queue, verification, parsing, dedup, analysis tiers, Slack
+formatting). Only services.gemini.generate and
+services.slack.send_slack_notification are replaced by stand-ins with
+configurable latency and error distributions.
+Traffic is either generated (YouTube Atom, signed TikTok, batched Facebook
+feed) at a fixed or Poisson arrival rate, or replayed from a capture file.
+The report is one JSON object, so runs can be diffed for regressions.
+
+    python -m benchmarks.pipeline_load --rate 50 --duration 20 --gemini-latency lognormal:800,0.5
+    python -m benchmarks.pipeline_load --save-traffic traffic.jsonl --duration 60
+    python -m benchmarks.pipeline_load --replay traffic.jsonl --speed 4 --output result.json
+
+Capture files are JSON lines: {"offset": <seconds from start>, "headers": {...},
+"body": "<utf-8 text>"} (or "body_b64" for binary bodies).
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.payloads import facebook_feed, tiktok_event, youtube_feed
+from services.log import configure_logging
+
+SECRET = "bench-secret"
+VIDEO_URL = re.compile(r"영상 URL: (\S+)")
+
+
+class Latency:
+    """A latency distribution parsed from 'fixed:MS', 'uniform:LO,HI', 'exp:MEAN' or 'lognormal:MEDIAN,SIGMA'."""
+
+    def __init__(self, spec):
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value]
+        samplers = {
+            "fixed": lambda: values[0] / 1000,
+            "uniform": lambda: random.uniform(values[0], values[1]) / 1000,
+            "exp": lambda: random.expovariate(1000 / values[0]),
+            "lognormal": lambda: values[0] / 1000 * random.lognormvariate(0, values[1]),
+        }
+        if kind not in samplers:
+            raise argparse.ArgumentTypeError(f"unknown latency distribution: {spec}")
+        self.spec = spec
+        self.sample = samplers[kind]
+
+
+class StandIn:
+    """Sleeps for a sampled latency and fails with probability error_rate."""
+
+    def __init__(self, name, latency, error_rate):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        time.sleep(self.latency.sample())
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+        if failed:
+            raise RuntimeError(f"simulated {self.name} failure")
+
+
+def parse_mix(value):
+    """Parses 'youtube=0.5,tiktok=0.3,facebook=0.2' into normalized weights."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    total = sum(mix.values())
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def generate_traffic(args):
+    """Yields (offset, headers, body) with fixed or Poisson inter-arrival times."""
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    offset = 0.0
+    video = 0
+    for _ in range(int(args.rate * args.duration)):
+        platform = random.choices(names, weights)[0]
+        if platform == "youtube":
+            headers = {"Content-Type": "application/atom+xml"}
+            body = youtube_feed(args.youtube_entries, start=video, disclosed_ratio=args.disclosed_ratio)
+            video += args.youtube_entries
+        elif platform == "tiktok":
+            headers, body = tiktok_event(video, SECRET)
+            video += 1
+        else:
+            headers = {"Content-Type": "application/json", "X-Hub-Signature-256": "sha256=0"}
+            body = facebook_feed(args.facebook_changes, video_ratio=0.8, start=video)
+            video += args.facebook_changes
+        yield offset, headers, body
+        offset += random.expovariate(args.rate) if args.arrivals == "poisson" else 1 / args.rate
+
+
+def read_capture(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                body = base64.b64decode(record["body_b64"]) if "body_b64" in record else record["body"].encode("utf-8")
+                yield record["offset"], record["headers"], body
+
+
+def write_capture(path, traffic):
+    with open(path, "w", encoding="utf-8") as f:
+        for offset, headers, body in traffic:
+            record = {"offset": round(offset, 6), "headers": headers}
+            try:
+                record["body"] = body.decode("utf-8")
+            except UnicodeDecodeError:
+                record["body_b64"] = base64.b64encode(body).decode("ascii")
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else None
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": ordered[-1] * 1000 if ordered else None, "count": len(ordered)}
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceSampler(threading.Thread):
+    """Samples RSS and thread count every `interval` seconds."""
+
+    def __init__(self, interval=0.25):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self.samples.append((time.perf_counter(), rss_bytes(), threading.active_count()))
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        self.samples.append((time.perf_counter(), rss_bytes(), threading.active_count()))
+
+    def summary(self):
+        rss = [sample[1] for sample in self.samples]
+        threads = [sample[2] for sample in self.samples]
+        return {
+            "rss_start_bytes": rss[0], "rss_end_bytes": rss[-1], "rss_peak_bytes": max(rss),
+            "rss_growth_bytes": rss[-1] - rss[0],
+            "threads_start": threads[0], "threads_end": threads[-1], "threads_peak": max(threads),
+        }
+
+
+def run(args, traffic):
+    os.environ.setdefault("TIKTOK_CLIENT_SECRET", SECRET)
+    # 저장된 트래픽은 서명 시각이 오래되었으므로 타임스탬프 윈도 검사를 끕니다.
+    os.environ.setdefault("TIKTOK_SIGNATURE_TOLERANCE_SECONDS", "0")
+    os.environ.setdefault("JOB_QUEUE_PATH", tempfile.mktemp(prefix="pipeline_load_", suffix=".sqlite3"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    imported_at = time.perf_counter()
+    from functions_framework import create_app
+    app = create_app(target="youtube_webhook", source="main.py")
+    main = sys.modules["main"]
+    import_seconds = time.perf_counter() - imported_at
+    # 로그는 stderr 로 보내서 stdout 에는 JSON 결과만 남깁니다.
+    configure_logging(stream=sys.stderr)
+    # 메모리 증가량은 import 이후를 기준으로 측정합니다.
+    sampler = ResourceSampler()
+    sampler.start()
+
+    sent_at = {}
+    alert_latencies = []
+    gemini = StandIn("gemini", args.gemini_latency, args.gemini_error_rate)
+    slack = StandIn("slack", args.slack_latency, args.slack_error_rate)
+
+    def fake_generate(file_uri, prompt, text, model=main.MODEL, timeout=None, profile=None):
+        gemini()
+        return "False"
+
+    def fake_send_slack_notification(message):
+        slack()
+        match = VIDEO_URL.search(message)
+        started = sent_at.get(match.group(1)) if match else None
+        if started is not None:
+            alert_latencies.append(time.perf_counter() - started)
+
+    # main 은 두 모듈을 첫 분석 때 import 하므로 모듈의 함수를 바꿔 둡니다.
+    from services import gemini as gemini_module, slack as slack_module
+    gemini_module.generate = fake_generate
+    slack_module.send_slack_notification = fake_send_slack_notification
+
+    client = app.test_client()
+    ack_latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def send(headers, body, video_uris):
+        started = time.perf_counter()
+        for uri in video_uris:
+            sent_at[uri] = started
+        response = client.post("/", data=body, headers=headers)
+        elapsed = time.perf_counter() - started
+        with lock:
+            ack_latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    late = 0
+    with ThreadPoolExecutor(max_workers=args.senders, thread_name_prefix="sender") as senders:
+        for offset, headers, body in traffic:
+            delay = started + offset / args.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.05:
+                late += 1
+            senders.submit(send, headers, body, video_uris(headers, body))
+    send_seconds = time.perf_counter() - started
+
+    # 큐가 비고 모든 워커가 쉬면 파이프라인이 끝난 것으로 봅니다.
+    while time.perf_counter() - started < args.drain_timeout:
+        stats = main.JOB_QUEUE.stats()
+        if stats["depth"] == 0 and stats["busy_workers"] == 0:
+            break
+        time.sleep(0.05)
+    total_seconds = time.perf_counter() - started
+    sampler.stop()
+
+    requests = len(ack_latencies)
+    return {
+        "config": {key: getattr(value, "spec", value) for key, value in vars(args).items()},
+        "requests": requests,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "late_sends": late,
+        "import_seconds": import_seconds,
+        "send_seconds": send_seconds,
+        "drain_seconds": total_seconds,
+        "throughput": {
+            "requests_per_second": requests / send_seconds if send_seconds else 0.0,
+            "alerts_per_second": len(alert_latencies) / total_seconds if total_seconds else 0.0,
+        },
+        "ack_latency": percentiles(ack_latencies),
+        "alert_latency": percentiles(alert_latencies),
+        "stand_ins": {
+            name: {"calls": stand_in.calls, "errors": stand_in.errors}
+            for name, stand_in in (("gemini", gemini), ("slack", slack))
+        },
+        "queue": main.JOB_QUEUE.stats(),
+        "analysis_tiers": main.ANALYSIS_PIPELINE.stats(),
+        "resources": sampler.summary(),
+    }
+
+
+def video_uris(headers, body):
+    """Video URIs a request will be alerted under, for end-to-end latency."""
+    if "TikTok-Signature" in headers:
+        share_id = json.loads(json.loads(body)["content"])["share_id"]
+        return [f"https://www.tiktok.com/@{os.environ['TIKTOK_CHANNEL_NAME']}/video/{share_id.split('.')[1]}"]
+    if "X-Hub-Signature-256" in headers:
+        return [change["value"].get("link") for entry in json.loads(body).get("entry", [])
+                for change in entry.get("changes", [])]
+    return [f"https://www.youtube.com/watch?v={video_id.decode()}"
+            for video_id in re.findall(rb"<yt:videoId>([^<]+)</yt:videoId>", body)]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20.0, help="Webhooks per second.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of generated traffic.")
+    parser.add_argument("--arrivals", choices=("fixed", "poisson"), default="poisson")
+    parser.add_argument("--mix", default="youtube=0.5,tiktok=0.3,facebook=0.2")
+    parser.add_argument("--youtube-entries", type=int, default=1)
+    parser.add_argument("--disclosed-ratio", type=float, default=0.5, help="YouTube titles with the phrase.")
+    parser.add_argument("--facebook-changes", type=int, default=5, help="Changes per Facebook webhook.")
+    parser.add_argument("--replay", help="Replay a capture file instead of generating traffic.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier.")
+    parser.add_argument("--save-traffic", help="Write the generated traffic as a capture file and exit.")
+    parser.add_argument("--gemini-latency", type=Latency, default=Latency("lognormal:500,0.4"))
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--slack-latency", type=Latency, default=Latency("fixed:50"))
+    parser.add_argument("--slack-error-rate", type=float, default=0.0)
+    parser.add_argument("--senders", type=int, default=64, help="Threads posting webhooks.")
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.save_traffic:
+        write_capture(args.save_traffic, generate_traffic(args))
+        return
+    os.environ.setdefault("TIKTOK_CHANNEL_NAME", "benchmark")
+    traffic = list(read_capture(args.replay) if args.replay else generate_traffic(args))
+    report = json.dumps(run(args, traffic), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main_cli()
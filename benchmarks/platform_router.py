@@ -0,0 +1,65 @@
+"""Per-event CPU cost of detect -> verify -> parse, by number of registered platforms.
+
+    python -m benchmarks.platform_router
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import time
+
+from benchmarks.payloads import youtube_feed
+from services.platforms import PlatformHandler, WebhookRequest, create_platform_registry
+
+
+def dummy_handler(i):
+    return type(f"Dummy{i}", (PlatformHandler,), {
+        "name": f"Dummy{i}", "slack_header": "", "marker_header": f"X-Dummy-{i}-Signature",
+        "parse": lambda self, request: [],
+    })()
+
+
+def sample_requests():
+    tiktok_body = json.dumps({
+        "event": "video.publish.complete", "create_time": 1,
+        "content": json.dumps({"share_id": "video.6974245311675353080.VDCrcMJV"}),
+    }).encode()
+    signature = hmac.new(b"bench-secret", b"1." + tiktok_body, hashlib.sha256).hexdigest()
+    facebook_body = json.dumps({"entry": [{"changes": [{"field": "feed", "value": {
+        "post_id": "1_2", "item": "video", "link": "https://www.facebook.com/v/1", "created_time": 1700000000,
+    }}]}]}).encode()
+    return {
+        "TikTok": ({"Content-Type": "application/json", "TikTok-Signature": f"t=1,s={signature}"}, tiktok_body),
+        "Facebook": ({"Content-Type": "application/json", "X-Hub-Signature-256": "sha256=0"}, facebook_body),
+        "YouTube": ({"Content-Type": "application/atom+xml"}, youtube_feed(1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    args = parser.parse_args()
+    os.environ["TIKTOK_CLIENT_SECRET"] = "bench-secret"
+    # 같은 서명을 반복 검증하므로 타임스탬프 윈도와 재전송 캐시는 끕니다.
+    os.environ["TIKTOK_SIGNATURE_TOLERANCE_SECONDS"] = "0"
+    os.environ["TIKTOK_REPLAY_CACHE_SIZE"] = "0"
+    requests = sample_requests()
+
+    for extra in (0, 30, 300):
+        registry = create_platform_registry()
+        for i in range(extra):
+            registry.register(dummy_handler(i))
+        row = []
+        for name, (headers, body) in requests.items():
+            started = time.perf_counter()
+            for _ in range(args.events):
+                handler = registry.detect(headers)
+                request = WebhookRequest(headers, body)
+                assert handler.verify(request) and handler.parse(request)
+            row.append(f"{name}={(time.perf_counter() - started) / args.events * 1e6:.1f}us")
+        print(f"platforms={3 + extra:<4} " + " ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Request-path latency with the previous eager logging vs the structured logging layer.
+
+The job queue is replaced by a no-op so only the 202 path is measured, and
+log output goes to os.devnull.
+
+    python -m benchmarks.request_logging --requests 2000
+"""
+import argparse
+import logging
+import os
+import time
+
+from flask import Flask
+
+import main
+from benchmarks.payloads import youtube_feed
+from services.log import BodySampler, configure_logging
+
+
+class _NullQueue:
+    def submit(self, platform, headers, body):
+        return 0
+
+
+def legacy_webhook(request):
+    """The previous handler prologue: five INFO records with the full request."""
+    logging.info(request)
+    logging.info(request.method)
+    logging.info(request.headers)
+    logging.info(request.get_data())
+    logging.info(request.data)
+    return main.route_request(request, None)
+
+
+def measure(app, handler, body, count):
+    samples = []
+    for _ in range(count):
+        with app.test_request_context("/", method="POST", data=body,
+                                      headers={"Content-Type": "application/atom+xml"}):
+            from flask import request
+            started = time.perf_counter()
+            handler(request)
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--entries", type=int, default=10, help="Entries per Atom feed (body size).")
+    args = parser.parse_args()
+
+    app = Flask("bench")
+    body = youtube_feed(args.entries)
+    main.JOB_QUEUE = _NullQueue()
+    devnull = open(os.devnull, "w")
+
+    logging.basicConfig(level=logging.INFO, stream=devnull, force=True)
+    legacy = measure(app, legacy_webhook, body, args.requests)
+
+    configure_logging(level="INFO", fmt="json", stream=devnull)
+    results = {"legacy eager logging": legacy}
+    for rate in (0.0, 0.01):
+        main.BODY_SAMPLER = BodySampler(rate=rate, max_bytes=512)
+        results[f"structured, sample={rate}"] = measure(app, main.youtube_webhook, body, args.requests)
+
+    print(f"body={len(body)} bytes, requests={args.requests}")
+    for name, (p50, p99) in results.items():
+        print(f"{name:28s} p50={p50:8.1f}us p99={p99:8.1f}us")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,136 @@
+"""Results store: cost on the analysis path, write throughput and query latency.
+
+Compares ResultsStore.record() (buffered, written by a background thread)
+with one synchronous SQLite INSERT per result on the same schema, then
+fills the store with --rows results over --channels channels and 90 days
+and times the compliance queries the GET ?results endpoint serves: one
+channel's results without a disclosure in the last 30 days (first page
+and the full walk through every page) and the newest results overall.
+
+    python -m benchmarks.results_store --rows 200000 --channels 2000
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from services.results_store import COLUMNS, ResultsStore, analysis_result
+
+DAY = 86400
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def make_rows(count, channels, now, seed):
+    rng = random.Random(seed)
+    usage = {"model": "gemini-2.5-pro", "calls": 1, "prompt": 2900, "candidates": 1, "thoughts": 300, "total": 3201}
+    for i in range(count):
+        published = now - rng.uniform(0, 90 * DAY)
+        yield analysis_result("YouTube", f"v{i:08d}", f"https://www.youtube.com/watch?v=v{i:08d}",
+                              f"UC{rng.randrange(channels):06d}", published, "True" if rng.random() < 0.8 else "False",
+                              "pro", "gemini-2.5-pro", rng.uniform(2, 20), usage,
+                              analyzed_at=published + rng.uniform(10, 120))
+
+
+def time_calls(fn, rows):
+    latencies = []
+    started = time.perf_counter()
+    for row in rows:
+        t = time.perf_counter()
+        fn(row)
+        latencies.append(time.perf_counter() - t)
+    return latencies, time.perf_counter() - started
+
+
+def bench_writes(rows, directory):
+    """Returns {mode: (latencies, seconds)} for direct inserts and buffered record()."""
+    direct = ResultsStore(os.path.join(directory, "direct.sqlite3"))
+    direct.close()
+    conn = sqlite3.connect(os.path.join(directory, "direct.sqlite3"), isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    sql = f"INSERT INTO results ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * (len(COLUMNS) - 1))})"
+    results = {"direct insert": time_calls(lambda row: conn.execute(sql, row), rows)}
+    conn.close()
+
+    store = ResultsStore(os.path.join(directory, "buffered.sqlite3"))
+    latencies, seconds = time_calls(store.record, rows)
+    store.close()
+    results["buffered record"] = (latencies, seconds)
+    return results, store
+
+
+def walk(store, pages=None, **filters):
+    """Follows next_cursor through every page (or `pages` pages); returns the rows seen."""
+    cursor = None
+    seen = 0
+    for _ in range(pages or 1_000_000):
+        rows, cursor = store.query(cursor=cursor, **filters)
+        seen += len(rows)
+        if cursor is None:
+            break
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000, help="Results in the store for the query benchmark.")
+    parser.add_argument("--write-rows", type=int, default=20000, help="Results written one by one per mode.")
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    now = time.time()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = list(make_rows(args.write_rows, args.channels, now, args.seed))
+        writes, store = bench_writes(rows, directory)
+        print(f"{args.write_rows} results written one at a time")
+        print(f"{'mode':>16} {'p50 us':>8} {'p99 us':>8} {'results/s':>10}")
+        for mode, (latencies, seconds) in writes.items():
+            print(f"{mode:>16} {percentile(latencies, 0.5) * 1e6:>8.1f} {percentile(latencies, 0.99) * 1e6:>8.1f} "
+                  f"{len(latencies) / seconds:>10.0f}")
+        print(f"buffered writer: {store.stats()['batches']} transactions")
+
+        store = ResultsStore(os.path.join(directory, "query.sqlite3"))
+        started = time.perf_counter()
+        for row in make_rows(args.rows, args.channels, now, args.seed + 1):
+            store.record(row)
+        store.flush()
+        print(f"\nloaded {args.rows} results in {time.perf_counter() - started:.1f}s "
+              f"({args.rows / (time.perf_counter() - started):.0f} results/s)")
+
+        rng = random.Random(args.seed)
+        since = now - 30 * DAY
+        queries = {
+            "channel, 30d, no disclosure": lambda channel: store.query(
+                channel=channel, verdict="false", since=since, limit=args.page_size),
+            "channel, 30d, all pages": lambda channel: walk(store, channel=channel, since=since,
+                                                            limit=args.page_size),
+            "newest overall": lambda channel: store.query(by="analyzed", limit=args.page_size),
+            "newest overall, page 50": lambda channel: walk(store, by="analyzed", limit=args.page_size, pages=50),
+        }
+        print(f"{'query':>28} {'p50 ms':>8} {'p99 ms':>8} {'rows':>6}")
+        for name, query in queries.items():
+            latencies = []
+            returned = 0
+            for _ in range(args.queries):
+                channel = f"UC{rng.randrange(args.channels):06d}"
+                t = time.perf_counter()
+                result = query(channel)
+                latencies.append(time.perf_counter() - t)
+                returned = len(result[0]) if isinstance(result, tuple) else result
+            print(f"{name:>28} {percentile(latencies, 0.5) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f} "
+                  f"{returned:>6}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""TikTok signature verification: previous decode/re-encode path vs TikTokSignatureVerifier.
+
+Reports time per verification and throughput for 1KB-1MB bodies, with one
+and two active secrets (rotation, signed with the older secret), and the
+cost of rejecting a replayed request. Before timing anything it checks
+that the verifier accepts and rejects the expected requests (bad secret,
+tampered body, malformed header, timestamps outside the window, replays,
+including a replay after the receiver's clock has caught up with a sender
+whose clock runs ahead) and exits with an error if one does not.
+
+    python -m benchmarks.tiktok_signature
+    python -m benchmarks.tiktok_signature --check-only
+"""
+import argparse
+import hashlib
+import hmac
+import sys
+import time
+
+from services.signatures import ReplayCache, TikTokSignatureVerifier
+
+SIZES = (1 << 10, 16 << 10, 256 << 10, 1 << 20)
+
+
+def legacy_verify(headers, body, client_secret):
+    """The previous implementation, without the (disabled) timestamp check."""
+    timestamp = signature = None
+    for part in headers['TikTok-Signature'].split(','):
+        if part.startswith('t='):
+            timestamp = part[2:]
+        elif part.startswith('s='):
+            signature = part[2:]
+    signed_payload = f"{timestamp}.{body.decode('utf-8')}"
+    expected_signature = hmac.new(
+        client_secret.encode('utf-8'), signed_payload.encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(signature, expected_signature)
+
+
+def signed_request(size, secret, timestamp=None):
+    body = (b'{"event":"video.publish.complete","content":"' + b"x" * size)[:size - 2] + b'"}'
+    timestamp = str(int(time.time() if timestamp is None else timestamp))
+    signature = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return {"TikTok-Signature": f"t={timestamp},s={signature}"}, body
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def check_behavior(tolerance=300):
+    """Returns the names of the cases where the verifier gave the wrong answer."""
+    clock = FakeClock(1_700_000_000.0)
+
+    def verifier(secrets=("old-secret",)):
+        # create_tiktok_verifier() 와 같은 재전송 캐시 TTL (2 x tolerance)
+        cache = ReplayCache(ttl_seconds=2 * tolerance, clock=clock)
+        return TikTokSignatureVerifier(list(secrets), tolerance_seconds=tolerance, replay_cache=cache, clock=clock)
+
+    def signed_at(timestamp):
+        return signed_request(1024, "old-secret", timestamp)
+
+    headers, body = signed_at(clock.now)
+    t, s = headers["TikTok-Signature"].split(",")
+    cases = {
+        "valid request accepted": (verifier(), headers, body, True),
+        "rotated secret accepted": (verifier(("new-secret", "old-secret")), headers, body, True),
+        "wrong secret rejected": (verifier(("other-secret",)), headers, body, False),
+        "tampered body rejected": (verifier(), headers, body[:-3] + b'y"}', False),
+        "missing header rejected": (verifier(), {}, body, False),
+        "missing signature rejected": (verifier(), {"TikTok-Signature": t}, body, False),
+        "non-hex signature rejected": (verifier(), {"TikTok-Signature": f"{t},s=zz"}, body, False),
+        "non-integer timestamp rejected": (verifier(), {"TikTok-Signature": f"t=abc,{s}"}, body, False),
+        "stale timestamp rejected": (verifier(), *signed_at(clock.now - tolerance - 1), False),
+        "future timestamp rejected": (verifier(), *signed_at(clock.now + tolerance + 1), False),
+    }
+    failures = [name for name, (v, h, b, expected) in cases.items() if v.verify(h, b) is not expected]
+
+    guarded = verifier()
+    if not guarded.verify(headers, body) or guarded.verify(headers, body):
+        failures.append("replay rejected")
+    # 송신 측 시계가 tolerance 만큼 앞서 있으면 서명은 받은 뒤 2 x tolerance 동안 윈도 안에 있습니다.
+    ahead = verifier()
+    headers, body = signed_at(clock.now + tolerance)
+    accepted = ahead.verify(headers, body)
+    clock.now += 2 * tolerance - 1
+    if not accepted or ahead.verify(headers, body):
+        failures.append("replay from a fast sender rejected for its whole window")
+    return failures
+
+
+def per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        assert fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=0.5, help="Seconds spent per measurement.")
+    parser.add_argument("--check-only", action="store_true", help="Only run the behavior checks.")
+    args = parser.parse_args()
+
+    failures = check_behavior()
+    if failures:
+        sys.exit("verifier behavior check failed: " + ", ".join(failures))
+    print("verifier behavior checks passed")
+    if args.check_only:
+        return
+
+    single = TikTokSignatureVerifier(["old-secret"])
+    rotating = TikTokSignatureVerifier(["new-secret", "old-secret"])
+    print(f"{'body':>7} {'legacy us':>10} {'new us':>8} {'rotating us':>12} {'new MB/s':>9}")
+    for size in SIZES:
+        headers, body = signed_request(size, "old-secret")
+        repeat = max(10, int(args.budget / max(per_call(lambda: legacy_verify(headers, body, "old-secret"), 3), 1e-6)))
+        legacy = per_call(lambda: legacy_verify(headers, body, "old-secret"), repeat)
+        new = per_call(lambda: single.verify(headers, body), repeat)
+        rotation = per_call(lambda: rotating.verify(headers, body), repeat)
+        print(f"{size >> 10:>5}KB {legacy * 1e6:>10.1f} {new * 1e6:>8.1f} {rotation * 1e6:>12.1f} "
+              f"{size / new / 1e6:>9.0f}")
+
+    headers, body = signed_request(SIZES[-1], "old-secret")
+    guarded = TikTokSignatureVerifier(["old-secret"], replay_cache=ReplayCache())
+    assert guarded.verify(headers, body)
+    replay = per_call(lambda: not guarded.verify(headers, body), 1000)
+    print(f"replayed 1MB request rejected in {replay * 1e6:.1f}us (no HMAC)")
+
+
+if __name__ == "__main__":
+    main()
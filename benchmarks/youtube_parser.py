@@ -0,0 +1,60 @@
+"""Streaming expat YouTube parser vs the previous xmltodict path.
+
+Reports time per feed and peak traced memory for synthetic feeds of
+1-1000 entries. Requires xmltodict for the comparison.
+
+    python -m benchmarks.youtube_parser
+"""
+import argparse
+import time
+import tracemalloc
+
+import xmltodict
+
+from benchmarks.payloads import youtube_feed
+from services.youtube_parser import parse_youtube_webhook_entries
+
+
+def xmltodict_entries(xml_data):
+    """The previous implementation, extended to every entry for a fair comparison."""
+    entry = xmltodict.parse(xml_data).get("feed", {}).get("entry")
+    entries = entry if isinstance(entry, list) else [entry]
+    return [{
+        "video_id": e.get("yt:videoId"),
+        "channel_id": e.get("yt:channelId"),
+        "title": e.get("title"),
+        "published": e.get("published"),
+        "updated": e.get("updated"),
+    } for e in entries]
+
+
+def measure(fn, payload, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,1000")
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'bytes':>9} {'xmltodict ms':>13} {'expat ms':>9} {'xmltodict KiB':>14} {'expat KiB':>10}")
+    for size in map(int, args.sizes.split(",")):
+        payload = youtube_feed(size)
+        repeat = max(3, 2000 // size)
+        assert len(parse_youtube_webhook_entries(payload)) == len(xmltodict_entries(payload)) == size
+        old_ms, old_kib = measure(xmltodict_entries, payload, repeat)
+        new_ms, new_kib = measure(parse_youtube_webhook_entries, payload, repeat)
+        print(f"{size:>8} {len(payload):>9} {old_ms:>13.3f} {new_ms:>9.3f} {old_kib:>14.1f} {new_kib:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""YouTube subscriptions: bulk subscribe, scheduling cost and verification latency.
+
+Subscribes --channels channels through a local fake hub (which answers 202
+after --hub-latency seconds and then sends the verification request) at
+several renewal concurrencies and reports how long until every lease is
+active. Then fills a store with --scheduled subscriptions whose renewals
+are spread over one lease and compares what it costs to find the due
+ones: the manager's heap (one check per wake-up, one pop per due
+renewal) against polling the table with SQL every --poll-interval
+seconds, with and without an index on renew_at. Finally times
+verify_intent(), the work behind each hub verification GET.
+
+    python -m benchmarks.youtube_subscriptions --channels 2000 --concurrency 1,8,32
+    python -m benchmarks.youtube_subscriptions --scheduled 50000 --skip-bulk
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.fakes import FakeHubServer
+from services.subscriptions import DEFAULT_LEASE_SECONDS, SubscriptionManager, SubscriptionStore, topic_url
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def channel_ids(count):
+    return [f"UC{i:022d}" for i in range(count)]
+
+
+def bench_bulk(channels, concurrency, hub_latency, directory):
+    """Returns (seconds until all active, requests sent) for one concurrency level."""
+    with FakeHubServer(latency=hub_latency) as hub:
+        store = SubscriptionStore(os.path.join(directory, f"bulk_{concurrency}.sqlite3"))
+        manager = SubscriptionManager(store, "https://example.com/webhook", hub_url=hub.url,
+                                      concurrency=concurrency, channels=channel_ids(channels), sync_spread=0)
+        hub.set_verify(manager.verify_intent)
+        started = time.perf_counter()
+        manager.start()
+        while store.counts().get("active", 0) < channels:
+            time.sleep(0.05)
+        return time.perf_counter() - started, len(hub.received)
+
+
+def bench_scheduling(scheduled, poll_interval, directory, seed):
+    """Returns {strategy: (ms per check, ms per due renewal, checks per lease)}."""
+    rng = random.Random(seed)
+    now = time.time()
+    ids = channel_ids(scheduled)
+    store = SubscriptionStore(os.path.join(directory, "scheduling.sqlite3"))
+    store.upsert(ids, "active", now)
+    conn = sqlite3.connect(os.path.join(directory, "scheduling.sqlite3"), isolation_level=None)
+    conn.execute("BEGIN")
+    conn.executemany("UPDATE subscriptions SET renew_at = ? WHERE topic = ?",
+                     [(now + rng.uniform(0, DEFAULT_LEASE_SECONDS), topic_url(i)) for i in ids])
+    conn.execute("COMMIT")
+
+    manager = SubscriptionManager(store, "https://example.com/webhook", scheduler=False)
+    started = time.perf_counter()
+    manager._load()
+    load_ms = (time.perf_counter() - started) * 1000
+    # 다음 renew 까지 아무것도 만기가 아닐 때의 확인 비용과, 만기가 된 항목을 꺼내는 비용
+    checks = 2000
+    started = time.perf_counter()
+    for _ in range(checks):
+        manager._pop_due(lambda: now, block=False)
+    heap_check = (time.perf_counter() - started) * 1000 / checks
+    horizon = now + DEFAULT_LEASE_SECONDS / 10
+    popped = 0
+    started = time.perf_counter()
+    while manager._pop_due(lambda: horizon, block=False) is not None:
+        popped += 1
+    heap_pop = (time.perf_counter() - started) * 1000 / max(popped, 1)
+
+    polls_per_lease = DEFAULT_LEASE_SECONDS / poll_interval
+    results = {"heap (scheduler)": (heap_check, heap_pop, popped, load_ms)}
+    for name, index in (("SQL poll, no index", False), ("SQL poll, renew_at index", True)):
+        if index:
+            conn.execute("CREATE INDEX IF NOT EXISTS subscriptions_renew_at ON subscriptions (renew_at)")
+        polls = 50
+        started = time.perf_counter()
+        for _ in range(polls):
+            conn.execute("SELECT topic FROM subscriptions WHERE renew_at <= ?", (now,)).fetchall()
+        results[name] = ((time.perf_counter() - started) * 1000 / polls, None, None, None)
+    conn.close()
+    return results, polls_per_lease
+
+
+def bench_verify(store_size, requests, directory, seed):
+    rng = random.Random(seed)
+    ids = channel_ids(store_size)
+    store = SubscriptionStore(os.path.join(directory, "verify.sqlite3"))
+    store.upsert(ids, "pending", time.time())
+    manager = SubscriptionManager(store, "https://example.com/webhook", scheduler=False)
+    manager._load()
+    latencies = []
+    for _ in range(requests):
+        topic = topic_url(rng.choice(ids))
+        started = time.perf_counter()
+        manager.verify_intent("subscribe", topic, str(DEFAULT_LEASE_SECONDS))
+        latencies.append(time.perf_counter() - started)
+    unknown = []
+    for i in range(requests):
+        started = time.perf_counter()
+        manager.verify_intent("subscribe", topic_url(f"unknown{i}"), None)
+        unknown.append(time.perf_counter() - started)
+    return latencies, unknown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=2000, help="Channels subscribed in the bulk benchmark.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated renewal concurrencies.")
+    parser.add_argument("--hub-latency", type=float, default=0.02, help="Seconds the fake hub takes per request.")
+    parser.add_argument("--scheduled", type=int, default=50000, help="Subscriptions in the scheduling benchmark.")
+    parser.add_argument("--poll-interval", type=float, default=60.0, help="Seconds between SQL polls.")
+    parser.add_argument("--verify-requests", type=int, default=5000)
+    parser.add_argument("--skip-bulk", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.skip_bulk:
+            print(f"bulk subscribe: {args.channels} channels, hub latency {args.hub_latency * 1000:.0f}ms")
+            print(f"{'concurrency':>11} {'seconds':>8} {'requests':>8} {'channels/s':>10}")
+            for concurrency in (int(value) for value in args.concurrency.split(",")):
+                seconds, sent = bench_bulk(args.channels, concurrency, args.hub_latency, directory)
+                print(f"{concurrency:>11} {seconds:>8.2f} {sent:>8} {args.channels / seconds:>10.0f}")
+
+        results, polls_per_lease = bench_scheduling(args.scheduled, args.poll_interval, directory, args.seed)
+        print(f"\nscheduling: {args.scheduled} subscriptions renewing over one {DEFAULT_LEASE_SECONDS}s lease")
+        print(f"{'strategy':>26} {'ms/check':>9} {'CPU s/lease':>11}  notes")
+        heap_check, heap_pop, popped, load_ms = results.pop("heap (scheduler)")
+        # 스케줄러는 만기 renew 하나당 한 번 깨어나므로 lease 동안 확인 횟수는 구독 수와 같습니다.
+        heap_cpu = args.scheduled * (heap_check + heap_pop) / 1000
+        print(f"{'heap (scheduler)':>26} {heap_check:>9.4f} {heap_cpu:>11.2f}  "
+              f"startup load {load_ms:.0f}ms, {heap_pop * 1000:.1f}us per due renewal ({popped} popped)")
+        for name, (ms, _, _, _) in results.items():
+            print(f"{name:>26} {ms:>9.4f} {ms * polls_per_lease / 1000:>11.2f}  "
+                  f"one poll every {args.poll_interval:.0f}s ({polls_per_lease:.0f} per lease)")
+
+        latencies, unknown = bench_verify(args.scheduled, args.verify_requests, directory, args.seed)
+        print(f"\nverify_intent over {args.scheduled} subscriptions")
+        print(f"{'topic':>8} {'p50 us':>8} {'p99 us':>8}")
+        for name, values in (("known", latencies), ("unknown", unknown)):
+            print(f"{name:>8} {percentile(values, 0.5) * 1e6:>8.1f} {percentile(values, 0.99) * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Exports stored analysis results to CSV or Parquet.
+
+Reads the SQLite results store written by the webhook (RESULTS_DB_PATH)
+and streams the matching rows to a columnar file. Parquet needs the
+optional 'pyarrow' package.
+
+    python export_results.py results.parquet --channel UCxxxx --since 2026-09-01 --verdict false
+"""
+import argparse
+import os
+
+from services.results_store import TIME_COLUMNS, ResultsStore
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Export analysis results to CSV or Parquet.")
+    parser.add_argument("output", help="Output file (.csv or .parquet).")
+    parser.add_argument("--db", default=os.getenv("RESULTS_DB_PATH", "/tmp/webhook_results.sqlite3"))
+    parser.add_argument("--format", choices=("csv", "parquet"), help="Defaults to the output file extension.")
+    parser.add_argument("--channel")
+    parser.add_argument("--platform")
+    parser.add_argument("--verdict", choices=("true", "false"))
+    parser.add_argument("--since", help="Epoch seconds or ISO 8601 date/time.")
+    parser.add_argument("--until", help="Epoch seconds or ISO 8601 date/time.")
+    parser.add_argument("--by", choices=tuple(TIME_COLUMNS), default="analyzed",
+                        help="Time column used by --since/--until.")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    count = store.export(args.output, args.format, channel=args.channel, platform=args.platform,
+                         verdict=args.verdict, since=args.since, until=args.until, by=args.by)
+    store.close()
+    print(f"exported={count} output={args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,35 +1,88 @@
+import hmac
 import logging
 import functions_framework
-import os
+import contextvars
 import threading
-import json
-from dotenv import load_dotenv
-from services.youtube_parser import parse_youtube_webhook_data
-from services.gemini import generate
-from services.slack import send_slack_notification
-from services.facebook_parser import parse_facebook_webhook
-from services.tiktok_parser import verify_tiktok_signature, extract_video_id_from_content
-
-load_dotenv()
-
-FACEBOOK_VERIFY_TOKEN = os.getenv('FACEBOOK_VERIFY_TOKEN')
-TIKTOK_CLIENT_SECRET=os.getenv("TIKTOK_CLIENT_SECRET")
+import time
+import uuid
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait
+from werkzeug.datastructures import Headers
+from services.settings import get_settings
+from services.platforms import WebhookRequest, create_platform_registry
+from services.job_queue import QueueFull, create_job_queue
+from services.dedup import create_idempotency_store
+from services.verdict_cache import create_verdict_cache, verdict_key
+from services.batcher import create_analysis_batcher
+from services.analysis import AnalysisPipeline, AnalysisRequest, model_tier, text_tier
+from services.text_matcher import PhraseMatcher
+from services.resilience import create_governor, create_retry_queue, is_transient
+from services.profiles import DEFAULT_PROFILE, FLASH_MODEL, MODEL
+from services.results_store import analysis_result, create_results_store
+from services.subscriptions import create_subscription_manager
+from services.metrics import (DEDUP, EVENTS, GEMINI_CALLS, GEMINI_CIRCUIT_OPEN, GEMINI_CONCURRENCY_LIMIT, PROMETHEUS_CONTENT_TYPE,
+                             QUEUE_BUSY_WORKERS, QUEUE_DEPTH, REGISTRY, RESULTS_PENDING, RETRY_QUEUE_DEPTH, STAGE_SECONDS,
+                             track_token_usage)
+from services.log import CORRELATION_HEADER, bind_correlation_id, configure_logging, create_body_sampler, new_correlation_id
+
+# .env 와 환경 변수는 여기서 한 번만 읽습니다. 다른 create_*() 함수들보다 먼저 호출해야 합니다.
+SETTINGS = get_settings()
 # instagram_verify_token = os.getenv('INSTAGRAM_VERIFY_TOKEN')
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
+BODY_SAMPLER = create_body_sampler()
+
+# 처리된 이벤트 ID를 추적하는 중복 방지 저장소 (TTL/크기 제한, IDEMPOTENCY_BACKEND로 SQLite/Redis 공유 가능)
+IDEMPOTENCY_STORE = create_idempotency_store()
+
+# 하나의 웹훅에 묶여 온 여러 영상을 동시에 분석하기 위한 스레드 풀
+FANOUT_EXECUTOR = ThreadPoolExecutor(max_workers=SETTINGS.fanout_concurrency, thread_name_prefix="fanout")
+
+# 같은 영상에 대한 Gemini 분석 결과 캐시 (재공지/재시도 시 모델 재호출 방지)
+VERDICT_CACHE = create_verdict_cache()
+
+# 모델별 Gemini 호출 제어 (지연 예산/재시도, 429 에 따라 줄어드는 동시 호출 수, 회로 차단기)
+GEMINI_GOVERNORS = {model: create_governor(model) for model in (MODEL, FLASH_MODEL)}
+GEMINI_PRO_FALLBACK = SETTINGS.gemini_pro_fallback
+
+# Gemini 장애로 분석하지 못한 영상을 버리지 않고 나중에 다시 분석하기 위한 대기열
+RETRY_QUEUE = create_retry_queue()
 
-# 메모리 내에서 처리된 이벤트 ID를 추적하기 위한 세트 (간단한 중복 방지용)
-# 더 강력한 중복 방지를 위해서는 Redis나 Firestore 같은 외부 저장소 사용을 권장합니다.
-PROCESSED_EVENTS = set()
+# 분석 결과 저장소 (채널/기간별 조회와 CSV/Parquet 내보내기용). 쓰기는 백그라운드 스레드에서 묶어서 합니다.
+RESULTS_STORE = create_results_store()
 
-PLATFORM_HEADERS = {
-    "TikTok": "TikTok 영상 업데이트 🎥",
-    "YouTube": "YouTube 영상 업데이트 📺",
-    "Facebook": "Facebook 영상 업데이트 📘",
-}
+# YouTube 허브 구독 관리 (YOUTUBE_CALLBACK_URL 이 있을 때만). 구독 목록은 백그라운드 스레드에서 읽고 만료 전에 갱신합니다.
+SUBSCRIPTIONS = create_subscription_manager()
+
+# genai SDK(services.gemini)와 Slack 클라이언트(services.slack)는 처음 쓸 때 import 합니다.
+# 콜드 스타트 직후의 GET 인증 요청은 이 모듈들을 불러오지 않고 응답합니다 (WARMUP 으로 미리 불러올 수 있음).
+def governed_generate(file_uri, prompt, text, model=MODEL, profile=DEFAULT_PROFILE):
+    from services.gemini import generate
+    return GEMINI_GOVERNORS[model].call(
+        lambda timeout: generate(file_uri, prompt, text, model=model, timeout=timeout, profile=profile))
+
+def governed_generate_batch(items, prompt, profile=DEFAULT_PROFILE):
+    from services.gemini import generate_batch
+    return GEMINI_GOVERNORS[MODEL].call(
+        lambda timeout: generate_batch(items, prompt, timeout=timeout, profile=profile))
+
+# ANALYSIS_BATCH_SIZE > 1 이면 짧은 시간 동안 모인 분석 요청을 한 번의 Gemini 호출로 묶어 처리합니다.
+ANALYSIS_BATCHER = create_analysis_batcher(governed_generate_batch, governed_generate)
+
+# 플랫폼별 설정(시크릿, 채널 이름, 프롬프트)은 시작 시 한 번만 읽습니다.
+PLATFORMS = create_platform_registry()
+PLATFORM_HEADERS = {handler.name: handler.slack_header for handler in PLATFORMS}
+# 운영용 GET 경로 (큐/중복 방지/회로 상태, Prometheus 지표, 분석 결과). ADMIN_API_TOKEN 이 있어야 응답합니다.
+ADMIN_QUERIES = ("stats", "metrics", "results")
+
+# 수신 시점에 서명을 검증한 작업에 route_request 가 붙이는 헤더 (클라이언트가 보낸 같은 이름의 헤더는 지웁니다)
+VERIFIED_HEADER = "X-Webhook-Verified"
+# 작업마다 붙이는 ID. 프로세스가 죽어 같은 작업을 다시 실행할 때 처리 중이던 중복 방지 키를 다시 가져가는 데 씁니다.
+JOB_ID_HEADER = "X-Webhook-Job-Id"
+INTERNAL_HEADERS = {VERIFIED_HEADER.lower(), JOB_ID_HEADER.lower()}
 
 def structure_slack_response(response_text, platform, channel_name, video_uri, published):
-    is_included = response_text.strip() == "True"
+    is_included = response_text == "True"
     result_message = "포함" if is_included else "미포함"
     header = PLATFORM_HEADERS.get(platform, f"{platform} 영상 업데이트")
 
@@ -43,12 +96,18 @@ def structure_slack_response(response_text, platform, channel_name, video_uri, p
 
 @functions_framework.http
 def youtube_webhook(request):
-    logging.info(request)
-    logging.info(request.method)
-    logging.info(request.headers)
-    logging.info(request.get_data())
-    logging.info(request.data)
+    with bind_correlation_id(new_correlation_id(request.headers)) as cid:
+        BODY_SAMPLER.log(request.method, request.path, request.headers, request.get_data())
+        return route_request(request, cid)
+
+def is_admin(headers):
+    """Authorization: Bearer <ADMIN_API_TOKEN> 이 맞으면 True. 토큰이 설정되지 않았으면 항상 False 입니다."""
+    if not SETTINGS.admin_api_token:
+        return False
+    scheme, _, token = headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip().encode(), SETTINGS.admin_api_token.encode())
 
+def route_request(request, cid):
     if request.method == 'GET':
         logging.info("GET 요청: Webhook 인증을 시작합니다.")
         # Case 1: Facebook 인증 요청 (verify_token이 존재)
@@ -56,7 +115,7 @@ def youtube_webhook(request):
             logging.info("Facebook 인증 요청을 감지했습니다.")
             verify_token = request.args.get('hub.verify_token')  
             
-            if verify_token == FACEBOOK_VERIFY_TOKEN:
+            if verify_token == SETTINGS.facebook_verify_token:
                 challenge = request.args.get('hub.challenge')
                 logging.info("Facebook 확인 토큰이 일치합니다. challenge를 반환합니다s.")
                 return challenge, 200
@@ -67,126 +126,327 @@ def youtube_webhook(request):
         elif 'hub.challenge' in request.args:
             logging.info("YouTube 인증 요청을 감지했습니다.")
             challenge = request.args.get('hub.challenge')
+            # 구독 관리를 켠 경우 알고 있는 토픽에 대한 요청에만 challenge 를 돌려줍니다.
+            if SUBSCRIPTIONS is not None and not SUBSCRIPTIONS.verify_intent(
+                    request.args.get('hub.mode'), request.args.get('hub.topic'), request.args.get('hub.lease_seconds')):
+                return "Unknown topic", 404
             logging.info("YouTube challenge를 반환합니다.")
             return challenge, 200, {'Content-Type': 'text/plain'}
-        # Case 3: 그 외의 GET 요청
+        # 운영용 경로는 공개 웹훅 URL 에 있으므로 Bearer 토큰을 확인합니다.
+        elif any(name in request.args for name in ADMIN_QUERIES) and not is_admin(request.headers):
+            logging.warning("Rejected unauthenticated admin GET request.")
+            return "Unauthorized", 401, {'WWW-Authenticate': 'Bearer'}
+        # Case 2-1: YouTube 허브의 구독 거부 알림 (challenge 없이 hub.mode=denied 로 옴)
+        elif request.args.get('hub.mode') == 'denied' and SUBSCRIPTIONS is not None:
+            SUBSCRIPTIONS.deny(request.args.get('hub.topic'), request.args.get('hub.reason'))
+            return "OK", 200
+        # Case 3: 작업 큐 및 중복 방지 상태 조회 (인스턴스 크기 산정용)
+        elif 'stats' in request.args:
+            return {
+                "queue": JOB_QUEUE.stats(),
+                "dedup": IDEMPOTENCY_STORE.stats(),
+                "verdict_cache": VERDICT_CACHE.stats(),
+                "batcher": ANALYSIS_BATCHER.stats() if ANALYSIS_BATCHER else None,
+                "analysis_tiers": ANALYSIS_PIPELINE.stats(),
+                "gemini": {model: governor.stats() for model, governor in GEMINI_GOVERNORS.items()},
+                "retry_queue": RETRY_QUEUE.stats(),
+                "results": RESULTS_STORE.stats() if RESULTS_STORE else None,
+                "subscriptions": SUBSCRIPTIONS.stats() if SUBSCRIPTIONS else None,
+            }, 200
+        # Case 4: Prometheus 지표
+        elif 'metrics' in request.args:
+            return REGISTRY.render(), 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+        # Case 5: 분석 결과 조회 (?results&channel=...&since=...&verdict=false&cursor=...)
+        elif 'results' in request.args:
+            return query_results(request.args)
+        # Case 6: 그 외의 GET 요청
         else:
             logging.warning("인증 파라미터가 없는 GET 요청입니다.")
             return "Webhook Endpoint", 200     
     elif request.method == 'POST':
         logging.info("POST 요청: 새로운 데이터를 수신했습니다.")
-        # Gemini API 호출과 같은 오래 걸리는 작업을 백그라운드에서 처리합니다.
+        handler = PLATFORMS.detect(request.headers)
+        if handler is None:
+            logging.warning("Unsupported webhook event received.")
+            return "Accepted", 202
+        platform = handler.name
+        data = request.get_data()
+
+        # 타임스탬프 윈도와 재전송 캐시는 받은 시각 기준이어야 하므로 큐에서 기다리기 전에 검증합니다.
+        webhook_request = WebhookRequest(request.headers, data)
+        if handler.verify_on_receive and not verify_request(handler, webhook_request):
+            return "Unauthorized", 401
+
+        # Gemini API 호출과 같은 오래 걸리는 작업은 작업 큐에 넣고 워커 풀에서 처리합니다.
         # 이렇게 하면 Webhook 제공자에게 빠르게 응답하여 timeout 및 재시도를 방지할 수 있습니다.
-        thread = threading.Thread(target=handle_webhook, args=(request,))
-        thread.start()
+        try:
+            headers = {name: value for name, value in request.headers.items()
+                       if name.lower() not in INTERNAL_HEADERS}
+            headers[CORRELATION_HEADER] = cid
+            headers[JOB_ID_HEADER] = uuid.uuid4().hex
+            if handler.verify_on_receive:
+                headers[VERIFIED_HEADER] = "1"
+            JOB_QUEUE.submit(platform, headers, data)
+        except QueueFull as e:
+            # 재시도가 재전송으로 거부되지 않도록 수신 시 검증에서 기록한 서명을 되돌립니다.
+            if handler.verify_on_receive:
+                handler.reject(webhook_request)
+            EVENTS.inc(platform=platform, outcome="rejected")
+            logging.warning("Rejecting %s webhook: %s", platform, e)
+            return "Busy", e.status_code, {'Retry-After': str(e.retry_after)}
+        except Exception:
+            # 저장하지 못한 작업(예: SQLite 오류로 500)도 재시도되므로 같은 방법으로 되돌립니다.
+            if handler.verify_on_receive:
+                handler.reject(webhook_request)
+            raise
 
         # 요청을 성공적으로 수신했으며 비동기적으로 처리 중임을 알립니다.
         return "Accepted", 202
     else:
         return "Method Not Allowed", 405
 
-def handle_webhook(request):
-    """백그라운드에서 실제 웹훅 처리 로직을 수행합니다."""
-    headers = request.headers
-    data = request.get_data()
-
-    content_type = headers.get('Content-Type', '')
-    is_tiktok_webhook = 'TikTok-Signature' in headers
-    is_youtube_webhook = 'application/atom+xml' in content_type
-    is_facebook_webhook = 'X-Hub-Signature-256' in headers
-    
-    if is_tiktok_webhook:
-        logging.info("Detected TikTok webhook.")
-        if not verify_tiktok_signature(request, TIKTOK_CLIENT_SECRET):
-            logging.error("Unauthorized: Invalid TikTok signature")
-            return
-        
-        tiktok_payload = json.loads(data)
-        event_type = tiktok_payload.get('event')
-        
-        # 멱등성 키로 사용할 고유 ID (예: create_time + share_id)
-        idempotency_key = f"tiktok-{tiktok_payload.get('create_time')}-{tiktok_payload.get('content', {}).get('share_id')}"
-        if idempotency_key in PROCESSED_EVENTS:
-            logging.info(f"Skipping already processed TikTok event: {idempotency_key}")
-            return
-        PROCESSED_EVENTS.add(idempotency_key)
+def timed_generate(request, model):
+    """실제 Gemini 호출(배치 포함)에 걸린 시간을 기록합니다."""
+    with STAGE_SECONDS.time(stage="generate", platform=request.platform):
+        if model == MODEL and ANALYSIS_BATCHER is not None:
+            return ANALYSIS_BATCHER.submit(request.file_uri, request.prompt, request.text, request.profile).result()
+        return governed_generate(request.file_uri, request.prompt, request.text, model=model, profile=request.profile)
 
-        if event_type == 'tiktok.ping':
-            logging.info("Received TikTok ping event.")
-            return
-        elif event_type == 'video.publish.complete':
-            content = tiktok_payload.get('content', {})
-            video_id = extract_video_id_from_content(content)
-            if not video_id:
-                logging.error("Could not extract video_id from TikTok webhook.")
-                return
-
-            published = tiktok_payload.get('create_time')
-            tiktok_channel_name = os.getenv('TIKTOK_CHANNEL_NAME')
-            video_uri = f"https://www.tiktok.com/@{tiktok_channel_name}/video/{video_id}"
-            prompt = "다음 TikTok 영상 URI에서 영상의 제목과 설명에 '확률형 아이템 포함' 이라는 문구가 정확히 포함되어 있는지 여부를 판단하여 포함인 경우 'True' 또는 미포함 인 경우 'False' 으로만 답변해주세요."
-
-            try:
-                response_text = generate(video_uri, prompt, "")
-                message = structure_slack_response(response_text, "TikTok", tiktok_channel_name, video_uri, published)
-                send_slack_notification(message)
-            except Exception as e:
-                logging.error(f"Error processing TikTok webhook: {e}")
-
-    elif is_facebook_webhook:
-        logging.info("Detected Facebook webhook.")
-        facebook_video_data = parse_facebook_webhook(json.loads(data))
-        if not facebook_video_data:
-            logging.warning("Invalid or incomplete Facebook webhook data")
-            return
+def should_fall_back(error):
+    """Pro 가 지연 예산 안에 답하지 못하면 (예산 초과, 회로 열림, 재시도 소진) Flash 로 대신 분석합니다."""
+    if not GEMINI_PRO_FALLBACK or not is_transient(error):
+        return False
+    GEMINI_CALLS.inc(model=MODEL, outcome="fallback")
+    logging.warning("Gemini Pro unavailable, falling back to %s: %s", FLASH_MODEL, error)
+    return True
 
-        # 멱등성 키로 사용할 고유 ID (예: post_id)
-        idempotency_key = f"facebook-{facebook_video_data.get('post_id')}"
-        if idempotency_key in PROCESSED_EVENTS:
-            logging.info(f"Skipping already processed Facebook event: {idempotency_key}")
-            return
-        PROCESSED_EVENTS.add(idempotency_key)
+def call_pro_model(request):
+    """Gemini Pro 영상 분석 결과를 캐시에서 찾고, 없으면 한 번만 호출합니다."""
+    key = verdict_key(request.platform, request.video_id, request.prompt, MODEL, request.text, request.profile)
+    try:
+        return VERDICT_CACHE.get_or_compute(key, lambda: timed_generate(request, MODEL))
+    except Exception as e:
+        if not should_fall_back(e):
+            raise
+    return call_flash_model(request)
 
-        video_uri = facebook_video_data.get('media_url')
-        if not video_uri:
-            logging.error("No media_url in Facebook webhook data.")
-            return
+def call_flash_model(request):
+    """Gemini Flash 영상 분석 결과를 캐시에서 찾고, 없으면 한 번만 호출합니다."""
+    key = verdict_key(request.platform, request.video_id, request.prompt, FLASH_MODEL, request.text, request.profile)
+    return VERDICT_CACHE.get_or_compute(key, lambda: timed_generate(request, FLASH_MODEL))
 
-        prompt = "다음 Facebook 영상 URI에서 영상의 제목과 설명에 '확률형 아이템 포함' 이라는 문구가 정확히 포함되어 있는지 여부를 판단하여 포함인 경우 'True' 또는 미포함 인 경우 'False' 으로만 답변해주세요."
+def create_analysis_pipeline(tier_names, pro=call_pro_model, flash=call_flash_model, make_tier=model_tier):
+    """ANALYSIS_TIERS (예: "text,flash,pro") 순서대로 분석 단계를 구성합니다. 마지막 단계의 결과는 항상 채택합니다.
 
-        facebook_channel_name = os.getenv('FACEBOOK_PAGE_NAME', 'Facebook Page')
-        published = facebook_video_data.get('created_time', 'N/A')
-        try:
-            response_text = generate(video_uri, prompt, facebook_video_data.get('message', ''))
-            message = structure_slack_response(response_text, "Facebook", facebook_channel_name, video_uri, published)
+    비동기 진입점(main_async.py)은 pro/flash 에 코루틴 함수를, make_tier 에 async_model_tier 를 넘깁니다.
+    """
+    factories = {
+        "text": lambda last: text_tier(PhraseMatcher()),
+        "flash": lambda last: make_tier("flash", flash, accept=None if last else ("True",)),
+        "pro": lambda last: make_tier("pro", pro, accept=None),
+    }
+    names = [name.strip() for name in tier_names.split(",") if name.strip() in factories]
+    if not names or names[-1] == "text":
+        names.append("pro")
+    return AnalysisPipeline(factories[name](i == len(names) - 1) for i, name in enumerate(names))
+
+def analysis_request(platform, video_id, video_uri, prompt, text):
+    """플랫폼의 분석 프로필(샘플링 구간, fps, 해상도, 토큰 예산)을 붙인 AnalysisRequest 를 만듭니다."""
+    handler = PLATFORMS.get(platform)
+    return AnalysisRequest(platform, video_id, video_uri, prompt, text,
+                           handler.profile if handler is not None else DEFAULT_PROFILE)
+
+def query_results(args):
+    """결과 저장소를 조회합니다. 필터는 ResultsStore.query 를, 다음 페이지는 next_cursor 를 사용합니다."""
+    if RESULTS_STORE is None:
+        return "Results store is disabled", 404
+    filters = {name: args.get(name) for name in ("channel", "platform", "video_id", "verdict", "since", "until")}
+    try:
+        rows, next_cursor = RESULTS_STORE.query(cursor=args.get("cursor"), limit=args.get("limit"),
+                                                by=args.get("by") or "published", **filters)
+    except ValueError as e:
+        return str(e), 400
+    return {"results": rows, "next_cursor": next_cursor}, 200
+
+# 토큰 사용량이 없는 결과(캐시 적중, 배치 호출)는 단계 이름으로 모델을 기록합니다.
+TIER_MODELS = {"pro": MODEL, "flash": FLASH_MODEL}
+
+def record_result(platform, video_id, video_uri, channel_name, published, verdict, tier, usage, started):
+    """분석 결과를 결과 저장소 버퍼에 넣습니다. SQLite 쓰기는 백그라운드 스레드가 합니다."""
+    if RESULTS_STORE is None:
+        return
+    RESULTS_STORE.record(analysis_result(
+        platform, video_id, video_uri, channel_name, published, verdict, tier,
+        usage["model"] or TIER_MODELS.get(tier), time.monotonic() - started, usage))
+
+def analyze_video(platform, video_id, video_uri, prompt, text, channel_name=None, published=None):
+    """저렴한 단계부터 분석하여 확신할 수 있는 단계에서 결과를 반환하고 결과 저장소에 기록합니다."""
+    started = time.monotonic()
+    with track_token_usage() as usage:
+        verdict, tier = ANALYSIS_PIPELINE.run(analysis_request(platform, video_id, video_uri, prompt, text))
+    record_result(platform, video_id, video_uri, channel_name, published, verdict, tier, usage, started)
+    return verdict
+
+def handle_webhook(platform, headers, data):
+    """워커 스레드에서 실제 웹훅 처리 로직을 수행합니다."""
+    headers = Headers(headers)
+    with bind_correlation_id(new_correlation_id(headers)):
+        process_webhook(platform, headers, data, verified=headers.get(VERIFIED_HEADER) == "1",
+                        job_id=headers.get(JOB_ID_HEADER))
+
+def is_new_event(platform, idempotency_key, job_id=None):
+    """중복 이벤트면 False를 반환하고 dedup 지표를 기록합니다.
+
+    job_id 가 있으면 키는 분석이 끝나 confirm_event() 를 부를 때까지 짧은 TTL 로만 기록되고,
+    같은 작업이 다시 실행되면 (프로세스가 죽어 lease 가 끝난 경우) 다시 새 이벤트로 봅니다.
+    """
+    if IDEMPOTENCY_STORE.check_and_set(idempotency_key, owner=job_id):
+        DEDUP.inc(platform=platform, result="miss")
+        return True
+    DEDUP.inc(platform=platform, result="hit")
+    EVENTS.inc(platform=platform, outcome="duplicate")
+    logging.info("Skipping already processed %s event: %s", platform, idempotency_key)
+    return False
+
+def confirm_event(idempotency_key):
+    """분석과 알림이 끝난 이벤트의 중복 방지 키를 전체 TTL 동안 유지합니다."""
+    if idempotency_key is None:
+        return
+    try:
+        IDEMPOTENCY_STORE.confirm(idempotency_key)
+    except Exception as e:
+        logging.warning("Could not confirm idempotency key %s: %s", idempotency_key, e)
+
+def park_for_retry(platform, video_id, error, task, attempt):
+    """일시적인 Gemini 장애로 실패한 분석을 재시도 대기열에 넣습니다. 넣지 못하면 False 를 반환합니다."""
+    if not is_transient(error):
+        return False
+    # 회로가 열려 있으면 최소한 다시 시험 호출이 가능해질 때까지 기다립니다.
+    if not RETRY_QUEUE.park(task, attempt, min_delay=getattr(error, "retry_after", 0.0)):
+        return False
+    EVENTS.inc(platform=platform, outcome="parked")
+    logging.warning("Parked %s video %s for retry (attempt %s): %s", platform, video_id, attempt + 1, error)
+    return True
+
+def analyze_and_notify(platform, video_id, video_uri, prompt, text, channel_name, published, attempt=0,
+                       idempotency_key=None):
+    """영상을 분석하고 결과를 Slack으로 전송합니다. Gemini 장애로 실패하면 재시도 대기열에 넣습니다.
+
+    성공하면 idempotency_key 를 확정합니다.
+    """
+    from services.slack import send_slack_notification
+    try:
+        response_text = analyze_video(platform, video_id, video_uri, prompt, text, channel_name, published)
+        message = structure_slack_response(response_text, platform, channel_name, video_uri, published)
+        with STAGE_SECONDS.time(stage="slack", platform=platform):
             send_slack_notification(message)
-        except Exception as e:
-            logging.error(f"Error processing Facebook webhook: {e}")
-
-    elif is_youtube_webhook:
-        logging.info("Detected YouTube webhook.")
-        video_data = parse_youtube_webhook_data(data)
-        if not video_data:
-            logging.warning("Invalid or incomplete YouTube webhook data")
+        EVENTS.inc(platform=platform, outcome="analyzed")
+        confirm_event(idempotency_key)
+    except Exception as e:
+        retry = partial(analyze_and_notify, platform, video_id, video_uri, prompt, text, channel_name, published,
+                        attempt=attempt + 1, idempotency_key=idempotency_key)
+        if park_for_retry(platform, video_id, e, retry, attempt):
             return
+        EVENTS.inc(platform=platform, outcome="error")
+        logging.error("Error processing %s webhook: %s", platform, e)
 
-        # 멱등성 키로 사용할 고유 ID (video_id)
-        idempotency_key = f"youtube-{video_data['video_id']}"
-        if idempotency_key in PROCESSED_EVENTS:
-            logging.info(f"Skipping already processed YouTube event: {idempotency_key}")
-            return
-        PROCESSED_EVENTS.add(idempotency_key)
+def verify_request(handler, request):
+    """서명을 검증하고 실패하면 unauthorized 로 집계합니다."""
+    with STAGE_SECONDS.time(stage="verify", platform=handler.name):
+        verified = handler.verify(request)
+    if not verified:
+        EVENTS.inc(platform=handler.name, outcome="unauthorized")
+        logging.error("Unauthorized: Invalid %s signature", handler.name)
+    return verified
 
-        video_uri = f"https://www.youtube.com/watch?v={video_data['video_id']}"
-        prompt = "다음 YouTube 영상 URI에서 영상의 제목과 설명에 '확률형 아이템 포함' 이라는 문구가 정확히 포함되어 있는지 여부를 판단하여 포함인 경우 'True' 또는 미포함 인 경우 'False' 으로만 답변해주세요."
-        
-        youtube_channel_name = video_data.get('channel_id', 'Unknown')
-        published = video_data.get('published', 'N/A')
-        try:
-            response_text = generate(video_uri, prompt, "")
-            message = structure_slack_response(response_text, "YouTube", youtube_channel_name, video_uri, published)
-            send_slack_notification(message)
-        except Exception as e:
-            logging.error(f"Error processing YouTube webhook: {e}")
-    else:
-        logging.warning("Unsupported webhook event received.")
\ No newline at end of file
+def accept_events(platform, headers, data, verified=False, job_id=None):
+    """서명 검증 → 파싱 → 중복 제거를 거쳐 (handler, 새로 분석할 VideoEvent 목록)을 반환합니다.
+
+    동기 워커(process_webhook)와 비동기 진입점(main_async.py)이 함께 사용합니다.
+    verified 는 route_request 가 받을 때 이미 검증한 요청이고, job_id 는 is_new_event() 를 참고하세요.
+    """
+    handler = PLATFORMS.get(platform)
+    if handler is None:
+        logging.warning("Unsupported webhook event received.")
+        return None, []
+    logging.info("Detected %s webhook.", platform)
+    request = WebhookRequest(headers, data)
+
+    if not verified and not verify_request(handler, request):
+        return handler, []
+
+    try:
+        with STAGE_SECONDS.time(stage="parse", platform=platform):
+            events = handler.parse(request)
+    except ValueError as e:
+        logging.error("Could not decode %s webhook body: %s", platform, e)
+        events = []
+    if not events:
+        EVENTS.inc(platform=platform, outcome="invalid")
+        logging.warning("Invalid or incomplete %s webhook data", platform)
+        return handler, []
+
+    new_events = []
+    for event in events:
+        if event.skip:
+            EVENTS.inc(platform=platform, outcome=event.skip)
+            logging.info("Skipping %s event (%s): %s", platform, event.skip, event.video_id)
+            continue
+        if is_new_event(platform, event.idempotency_key, job_id):
+            new_events.append(event)
+    return handler, new_events
+
+def process_webhook(platform, headers, data, verified=False, job_id=None):
+    handler, new_events = accept_events(platform, headers, data, verified, job_id)
+
+    # 하나의 요청에 여러 영상이 묶여 오면 (Facebook 배치, YouTube 다중 entry) 동시에 분석합니다.
+    # JOB_QUEUE_PLATFORM_LIMITS 가 있는 플랫폼은 한도가 분석 수에도 적용되도록 워커에서 차례로 분석합니다.
+    fanout = platform not in JOB_QUEUE.platform_limits
+    futures = [
+        FANOUT_EXECUTOR.submit(contextvars.copy_context().run, partial(
+            analyze_and_notify, platform, event.video_id, event.video_uri, handler.prompt, event.text,
+            event.channel_name, event.published, idempotency_key=event.idempotency_key))
+        for event in new_events[1:]
+    ] if fanout else []
+    for event in new_events if not fanout else new_events[:1]:
+        analyze_and_notify(platform, event.video_id, event.video_uri, handler.prompt, event.text,
+                           event.channel_name, event.published, idempotency_key=event.idempotency_key)
+    wait(futures)
+
+def warm_up():
+    """genai SDK, Vertex AI 클라이언트, 플랫폼별 생성 설정과 Slack 세션을 미리 만들어 첫 분석의 지연을 줄입니다."""
+    started = time.monotonic()
+    try:
+        from services import gemini, slack
+        gemini.get_client()
+        for handler in PLATFORMS:
+            for model in (MODEL, FLASH_MODEL):
+                gemini.generation_config(model, handler.profile)
+        if SETTINGS.slack_webhook_url:
+            slack.get_dispatcher(SETTINGS.slack_webhook_url)
+    except Exception as e:
+        logging.warning("Warm-up failed, clients will be created on first use: %s", e)
+        return False
+    logging.info("Warm-up finished in %.0fms", (time.monotonic() - started) * 1000)
+    return True
+
+def start_warm_up(mode):
+    """WARMUP=eager 는 import 중에, background 는 별도 스레드에서 warm_up() 을 실행합니다."""
+    if mode == "eager":
+        warm_up()
+    elif mode == "background":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+ANALYSIS_PIPELINE = create_analysis_pipeline(SETTINGS.analysis_tiers)
+JOB_QUEUE = create_job_queue(handle_webhook)
+QUEUE_DEPTH.set_function(lambda: JOB_QUEUE.stats()["depth"])
+QUEUE_BUSY_WORKERS.set_function(lambda: JOB_QUEUE.stats()["busy_workers"])
+RETRY_QUEUE_DEPTH.set_function(RETRY_QUEUE.depth)
+if RESULTS_STORE is not None:
+    RESULTS_PENDING.set_function(lambda: RESULTS_STORE.stats()["pending"])
+GEMINI_CONCURRENCY_LIMIT.set_function(lambda: {(model,): g.limiter.limit for model, g in GEMINI_GOVERNORS.items()})
+GEMINI_CIRCUIT_OPEN.set_function(
+    lambda: {(model,): int(g.breaker.state != "closed") for model, g in GEMINI_GOVERNORS.items()})
+if SUBSCRIPTIONS is not None:
+    SUBSCRIPTIONS.start()
+start_warm_up(SETTINGS.warmup)
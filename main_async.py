@@ -0,0 +1,147 @@
+"""asyncio (ASGI) entry point for always-on deployments.
+
+    functions-framework --source main_async.py --target youtube_webhook_async --asgi
+
+Verification, parsing, dedup, the verdict cache, analysis tiers and Slack
+formatting are shared with main.py. POSTs are acknowledged from the event
+loop and the analysis runs as an asyncio task with async Gemini and Slack
+clients, so thousands of pending analyses need no worker threads; bounded
+semaphores cap concurrent Gemini and Slack calls, and Gemini calls go
+through the same deadline/retry/adaptive-limit/circuit-breaker governors. Pending work is held in
+memory only, unlike the SQLite job queue of the functions_framework handler.
+"""
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import functions_framework.aio
+from starlette.responses import JSONResponse, Response
+
+import main
+from services.analysis import async_model_tier
+from services.profiles import FLASH_MODEL, MODEL
+from services.verdict_cache import verdict_key
+from services.metrics import EVENTS, STAGE_SECONDS, track_token_usage
+from services.log import bind_correlation_id, new_correlation_id
+
+ASYNC_MAX_PENDING = main.SETTINGS.async_max_pending
+ASYNC_GEMINI_CONCURRENCY = main.SETTINGS.async_gemini_concurrency
+ASYNC_SLACK_CONCURRENCY = main.SETTINGS.async_slack_concurrency
+
+GEMINI_SEMAPHORE = asyncio.Semaphore(ASYNC_GEMINI_CONCURRENCY)
+SLACK_SEMAPHORE = asyncio.Semaphore(ASYNC_SLACK_CONCURRENCY)
+
+# 응답 후 처리 중인 웹훅 task (GC 되지 않도록 참조를 유지하고, 개수로 backpressure 를 겁니다)
+PENDING = set()
+
+async def timed_generate_async(request, model):
+    """동시 호출 수를 제한하고 실제 Gemini 호출에 걸린 시간을 기록합니다."""
+    from services.gemini import generate_async
+    async with GEMINI_SEMAPHORE:
+        with STAGE_SECONDS.time(stage="generate", platform=request.platform):
+            return await main.GEMINI_GOVERNORS[model].call_async(
+                lambda timeout: generate_async(request.file_uri, request.prompt, request.text, model=model,
+                                               timeout=timeout, profile=request.profile))
+
+async def call_pro_model_async(request):
+    key = verdict_key(request.platform, request.video_id, request.prompt, MODEL, request.text, request.profile)
+    try:
+        return await main.VERDICT_CACHE.get_or_compute_async(key, lambda: timed_generate_async(request, MODEL))
+    except Exception as e:
+        if not main.should_fall_back(e):
+            raise
+    return await call_flash_model_async(request)
+
+async def call_flash_model_async(request):
+    key = verdict_key(request.platform, request.video_id, request.prompt, FLASH_MODEL, request.text, request.profile)
+    return await main.VERDICT_CACHE.get_or_compute_async(key, lambda: timed_generate_async(request, FLASH_MODEL))
+
+ANALYSIS_PIPELINE = main.create_analysis_pipeline(
+    main.SETTINGS.analysis_tiers,
+    pro=call_pro_model_async, flash=call_flash_model_async, make_tier=async_model_tier,
+)
+
+async def analyze_and_notify_async(platform, video_id, video_uri, prompt, text, channel_name, published, attempt=0):
+    """main.analyze_and_notify 와 같지만 Gemini/Slack 호출을 이벤트 루프에서 기다립니다."""
+    from services.slack import send_slack_notification_async
+    try:
+        started = time.monotonic()
+        with track_token_usage() as usage:
+            response_text, tier = await ANALYSIS_PIPELINE.run_async(
+                main.analysis_request(platform, video_id, video_uri, prompt, text))
+        main.record_result(platform, video_id, video_uri, channel_name, published, response_text, tier, usage, started)
+        message = main.structure_slack_response(response_text, platform, channel_name, video_uri, published)
+        async with SLACK_SEMAPHORE:
+            with STAGE_SECONDS.time(stage="slack", platform=platform):
+                await send_slack_notification_async(message)
+        EVENTS.inc(platform=platform, outcome="analyzed")
+    except Exception as e:
+        # 재시도 대기열은 스레드에서 실행되므로 코루틴을 이 이벤트 루프로 돌려보냅니다.
+        loop = asyncio.get_running_loop()
+        def retry():
+            asyncio.run_coroutine_threadsafe(analyze_and_notify_async(
+                platform, video_id, video_uri, prompt, text, channel_name, published, attempt=attempt + 1), loop)
+        if main.park_for_retry(platform, video_id, e, retry, attempt):
+            return
+        EVENTS.inc(platform=platform, outcome="error")
+        logging.error("Error processing %s webhook: %s", platform, e)
+
+async def process_webhook_async(platform, headers, data, cid):
+    with bind_correlation_id(cid):
+        # 서명 검증(최대 1MB HMAC)과 중복 제거(SQLite 쓰기)는 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+        handler, new_events = await asyncio.to_thread(main.accept_events, platform, headers, data)
+        await asyncio.gather(*(
+            analyze_and_notify_async(platform, event.video_id, event.video_uri, handler.prompt, event.text,
+                                     event.channel_name, event.published)
+            for event in new_events
+        ))
+
+def to_response(result):
+    """main.route_request 의 Flask 스타일 반환값을 Starlette Response 로 바꿉니다."""
+    body, status, headers = (tuple(result) + (None,))[:3] if isinstance(result, tuple) else (result, 200, None)
+    if isinstance(body, dict):
+        return JSONResponse(body, status_code=status, headers=headers)
+    return Response(body, status_code=status, headers=headers)
+
+def stats():
+    return {
+        "pending": len(PENDING),
+        "max_pending": ASYNC_MAX_PENDING,
+        "dedup": main.IDEMPOTENCY_STORE.stats(),
+        "verdict_cache": main.VERDICT_CACHE.stats(),
+        "analysis_tiers": ANALYSIS_PIPELINE.stats(),
+        "gemini": {model: governor.stats() for model, governor in main.GEMINI_GOVERNORS.items()},
+        "retry_queue": main.RETRY_QUEUE.stats(),
+        "results": main.RESULTS_STORE.stats() if main.RESULTS_STORE else None,
+        "subscriptions": main.SUBSCRIPTIONS.stats() if main.SUBSCRIPTIONS else None,
+    }
+
+@functions_framework.aio.http
+async def youtube_webhook_async(request):
+    body = await request.body()
+    with bind_correlation_id(new_correlation_id(request.headers)) as cid:
+        main.BODY_SAMPLER.log(request.method, request.url.path, request.headers, body)
+        if request.method != 'POST':
+            if request.method == 'GET' and 'stats' in request.query_params and main.is_admin(request.headers):
+                return JSONResponse(stats())
+            # GET 인증 요청과 지표는 동기 핸들러와 같은 코드로 처리합니다.
+            shim = SimpleNamespace(method=request.method, args=request.query_params,
+                                   headers=request.headers, get_data=lambda: body)
+            return to_response(main.route_request(shim, cid))
+
+        handler = main.PLATFORMS.detect(request.headers)
+        if handler is None:
+            logging.warning("Unsupported webhook event received.")
+            return Response("Accepted", status_code=202)
+        if len(PENDING) >= ASYNC_MAX_PENDING:
+            EVENTS.inc(platform=handler.name, outcome="rejected")
+            logging.warning("Rejecting %s webhook: %s analyses pending", handler.name, len(PENDING))
+            return Response("Busy", status_code=503, headers={'Retry-After': '5'})
+
+        # 응답을 먼저 보내고 검증/분석은 task 로 이어서 처리합니다.
+        task = asyncio.get_running_loop().create_task(
+            process_webhook_async(handler.name, request.headers, body, cid))
+        PENDING.add(task)
+        task.add_done_callback(PENDING.discard)
+        return Response("Accepted", status_code=202)
@@ -0,0 +1,69 @@
+"""Manages YouTube hub subscriptions in the subscription store.
+
+Uses the same YOUTUBE_* settings as the webhook, so the store
+(YOUTUBE_SUBSCRIPTIONS_PATH) must be the one the webhook reads. `renew`
+sends every request that is due and exits; run it from cron when the
+webhook runs with YOUTUBE_SUBSCRIPTION_SCHEDULER=false. add/remove are
+refused while YOUTUBE_CHANNEL_IDS / YOUTUBE_CHANNELS_FILE set the list.
+
+    python manage_subscriptions.py add UCxxxx UCyyyy
+    python manage_subscriptions.py add --file channels.txt
+    python manage_subscriptions.py remove UCxxxx
+    python manage_subscriptions.py list --state pending
+    python manage_subscriptions.py renew
+"""
+import argparse
+import datetime
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+from services.subscriptions import create_subscription_manager, read_channel_ids
+
+
+def format_time(value):
+    if value is None:
+        return "-"
+    return datetime.datetime.fromtimestamp(value, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Manage YouTube hub subscriptions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("add", "remove"):
+        command = commands.add_parser(name, help=f"{name.capitalize()} channels and send the requests now.")
+        command.add_argument("channel_ids", nargs="*")
+        command.add_argument("--file", help="File with one channel id per line.")
+    listing = commands.add_parser("list", help="Print subscriptions ordered by next request time.")
+    listing.add_argument("--state", choices=("pending", "active", "unsubscribing"))
+    commands.add_parser("renew", help="Send every request that is due now.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    manager = create_subscription_manager()
+    if manager is None:
+        sys.exit("YOUTUBE_CALLBACK_URL is not set.")
+
+    if args.command == "list":
+        print("channel_id\tstate\texpires_at\tnext_request_at\tattempts\tlast_error")
+        for subscription in manager.store.iter_subscriptions(args.state):
+            print(f"{subscription.channel_id}\t{subscription.state}\t{format_time(subscription.expires_at)}\t"
+                  f"{format_time(subscription.renew_at)}\t{subscription.attempts}\t{subscription.last_error or '-'}")
+        return
+    if args.command in ("add", "remove"):
+        channel_ids = list(args.channel_ids) + (read_channel_ids(args.file) if args.file else [])
+        if not channel_ids:
+            parser.error("no channel ids given")
+        try:
+            getattr(manager, args.command)(channel_ids)
+        except ValueError as e:
+            sys.exit(str(e))
+    sent = manager.run_due()
+    stats = manager.stats()
+    print(f"sent={sent} accepted={stats['sent']} failed={stats['failed']} subscriptions={stats['subscriptions']}")
+
+
+if __name__ == "__main__":
+    main_cli()
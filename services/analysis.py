@@ -0,0 +1,108 @@
+import inspect
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from services.profiles import DEFAULT_PROFILE
+
+# profile 은 영상 샘플링 구간과 토큰 예산을 정하는 services.profiles.AnalysisProfile
+AnalysisRequest = namedtuple("AnalysisRequest", ["platform", "video_id", "file_uri", "prompt", "text", "profile"],
+                             defaults=(DEFAULT_PROFILE,))
+
+
+class AnalysisTier:
+    """One step of the analysis pipeline.
+
+    run(request) takes an AnalysisRequest and returns a "True"/"False"
+    verdict, or None to escalate to the next tier.
+    """
+
+    def __init__(self, name, run):
+        self.name = name
+        self.run = run
+
+
+def text_tier(matcher):
+    """Resolves to "True" when the disclosure phrase is already in the text; escalates otherwise."""
+    def run(request):
+        return "True" if matcher.search(request.text) else None
+    return AnalysisTier("text", run)
+
+
+def model_tier(name, call, accept=("True",)):
+    """Runs a model call and accepts only the listed verdicts, escalating the rest.
+
+    The last tier in a pipeline should accept every verdict.
+    """
+    def run(request):
+        verdict = call(request)
+        return verdict if accept is None or verdict in accept else None
+    return AnalysisTier(name, run)
+
+
+def async_model_tier(name, call, accept=("True",)):
+    """model_tier() for a coroutine call; use with AnalysisPipeline.run_async."""
+    async def run(request):
+        verdict = await call(request)
+        return verdict if accept is None or verdict in accept else None
+    return AnalysisTier(name, run)
+
+
+class AnalysisPipeline:
+    """Runs tiers from cheapest to most expensive until one returns a verdict."""
+
+    def __init__(self, tiers):
+        self._tiers = list(tiers)
+        self._lock = threading.Lock()
+        self._stats = {tier.name: {"runs": 0, "resolved": 0, "seconds": 0.0} for tier in self._tiers}
+
+    def _record(self, tier, elapsed, verdict):
+        with self._lock:
+            stats = self._stats[tier.name]
+            stats["runs"] += 1
+            stats["seconds"] += elapsed
+            if verdict is not None:
+                stats["resolved"] += 1
+
+    def run(self, request):
+        """Returns (verdict, tier_name) for an AnalysisRequest."""
+        for tier in self._tiers:
+            verdict = None
+            started = time.monotonic()
+            try:
+                verdict = tier.run(request)
+            finally:
+                self._record(tier, time.monotonic() - started, verdict)
+            if verdict is not None:
+                logging.info("Analysis resolved at tier '%s': %s", tier.name, verdict)
+                return verdict, tier.name
+        raise RuntimeError("No analysis tier produced a verdict.")
+
+    async def run_async(self, request):
+        """run() for pipelines whose tiers may be coroutines (see async_model_tier)."""
+        for tier in self._tiers:
+            verdict = None
+            started = time.monotonic()
+            try:
+                verdict = tier.run(request)
+                if inspect.isawaitable(verdict):
+                    verdict = await verdict
+            finally:
+                self._record(tier, time.monotonic() - started, verdict)
+            if verdict is not None:
+                logging.info("Analysis resolved at tier '%s': %s", tier.name, verdict)
+                return verdict, tier.name
+        raise RuntimeError("No analysis tier produced a verdict.")
+
+    def stats(self):
+        with self._lock:
+            total = sum(stats["resolved"] for stats in self._stats.values())
+            return {
+                name: {
+                    "resolved": stats["resolved"],
+                    "share": stats["resolved"] / total if total else 0.0,
+                    "avg_latency_seconds": stats["seconds"] / stats["runs"] if stats["runs"] else 0.0,
+                }
+                for name, stats in self._stats.items()
+            }
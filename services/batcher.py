@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from services.settings import get_settings
+
+
+class MultiVideoBatchBackend:
+    """Sends each batch as one multi-video Gemini request.
+
+    Falls back to one generate() call per video only when the batched answer
+    cannot be mapped back to the videos (ValueError/TypeError). Quota,
+    circuit-breaker and latency-budget errors reach the callers' futures
+    unchanged, so a throttled batch is not multiplied into one call per video.
+    """
+
+    def __init__(self, generate_batch, generate):
+        self._generate_batch = generate_batch
+        self._generate = generate
+
+    def analyze(self, prompt, items, profile=None):
+        options = {} if profile is None else {"profile": profile}
+        if len(items) == 1:
+            file_uri, text = items[0]
+            return [self._generate(file_uri, prompt, text, **options)]
+        try:
+            return self._generate_batch(items, prompt, **options)
+        except (ValueError, TypeError) as e:
+            logging.warning("Batched analysis of %s videos failed, retrying one by one: %s", len(items), e)
+            return [self._generate(file_uri, prompt, text, **options) for file_uri, text in items]
+
+
+class AnalysisBatcher:
+    """Collects pending analyses for a short window and submits them together.
+
+    A batch is flushed when it reaches max_batch_size or when its oldest
+    request has waited max_wait_seconds. Requests are grouped by prompt and
+    analysis profile, so every batch asks the same question about the same
+    video segments. Any object with
+    analyze(prompt, [(file_uri, text), ...], profile) -> [verdict, ...] can be
+    used as the backend (e.g. an adapter for Vertex batch prediction).
+    """
+
+    def __init__(self, backend, max_batch_size=8, max_wait_seconds=0.2, concurrency=2):
+        self._backend = backend
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_seconds
+        self._pending = {}  # (prompt, profile) -> deque[(enqueued_at, file_uri, text, future)]
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="analysis-batch")
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, file_uri, prompt, text, profile=None):
+        """Queues one analysis and returns a Future resolving to its verdict."""
+        future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="analysis-batcher", daemon=True)
+                self._thread.start()
+            self._pending.setdefault((prompt, profile), deque()).append((time.monotonic(), file_uri, text, future))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        """Blocks until a batch is due and removes it from the pending queues."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                next_deadline = None
+                for group, queue in self._pending.items():
+                    deadline = queue[0][0] + self._max_wait
+                    if len(queue) >= self._max_batch_size or deadline <= now:
+                        batch = [queue.popleft() for _ in range(min(len(queue), self._max_batch_size))]
+                        if not queue:
+                            del self._pending[group]
+                        return group, batch
+                    next_deadline = deadline if next_deadline is None else min(next_deadline, deadline)
+                self._cond.wait(None if next_deadline is None else next_deadline - now)
+
+    def _run(self):
+        while True:
+            group, batch = self._next_batch()
+            self.batches += 1
+            self.items += len(batch)
+            self._executor.submit(self._analyze, group, batch)
+
+    def _analyze(self, group, batch):
+        prompt, profile = group
+        try:
+            verdicts = self._backend.analyze(prompt, [(file_uri, text) for _, file_uri, text, _ in batch], profile)
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        for (*_, future), verdict in zip(batch, verdicts):
+            future.set_result(verdict)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+def create_analysis_batcher(generate_batch, generate):
+    """Builds an AnalysisBatcher from ANALYSIS_BATCH_* settings, or None when batching is off."""
+    settings = get_settings()
+    max_batch_size = settings.analysis_batch_size
+    if max_batch_size <= 1:
+        return None
+    return AnalysisBatcher(
+        MultiVideoBatchBackend(generate_batch, generate),
+        max_batch_size=max_batch_size,
+        max_wait_seconds=int(os.getenv("ANALYSIS_BATCH_WINDOW_MS", "200")) / 1000,
+        concurrency=settings.analysis_batch_concurrency,
+    )
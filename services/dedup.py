@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+
+def compact_key(key):
+    """Reduces an idempotency key to a signed 64-bit integer (blake2b digest)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryIdempotencyStore(_Counters):
+    """Process-local idempotency store with TTL and size based eviction.
+
+    Keys are kept in generations: the current generation is a set, older
+    generations are frozen into sorted array('q') blocks (8 bytes per key) and
+    searched with bisect. Whole generations are dropped once they are older
+    than ttl_seconds or when more than max_keys are held, so a million keys
+    cost roughly 15-20 MB.
+    """
+
+    def __init__(self, ttl_seconds=86400, max_keys=1_000_000, generations=8):
+        super().__init__()
+        self._ttl = ttl_seconds
+        self._generation_size = max(1, max_keys // generations)
+        self._generation_span = ttl_seconds / generations
+        self._max_sealed = generations
+        self._current = set()
+        self._current_started = time.monotonic()
+        self._sealed = deque()  # (sealed_at, array('q'))
+        self._lock = threading.Lock()
+
+    def _rotate(self, now):
+        if self._current:
+            self._sealed.append((now, array("q", sorted(self._current))))
+        self._current = set()
+        self._current_started = now
+
+    def _evict(self, now):
+        while self._sealed and (len(self._sealed) > self._max_sealed or now - self._sealed[0][0] > self._ttl):
+            self._sealed.popleft()
+
+    def _contains(self, value):
+        if value in self._current:
+            return True
+        for _, keys in self._sealed:
+            i = bisect_left(keys, value)
+            if i < len(keys) and keys[i] == value:
+                return True
+        return False
+
+    def check_and_set(self, key, owner=None):
+        """Atomically records key. Returns True if it was not seen before.
+
+        owner is ignored: keys live in this process only, so a job re-run
+        after the process died starts from an empty store anyway.
+        """
+        value = compact_key(key)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._current) >= self._generation_size or now - self._current_started >= self._generation_span:
+                self._rotate(now)
+            self._evict(now)
+            if self._contains(value):
+                self.hits += 1
+                return False
+            self._current.add(value)
+            self.misses += 1
+            return True
+
+    def confirm(self, key):
+        """Keys are recorded for the full TTL by check_and_set() already."""
+
+    def __len__(self):
+        with self._lock:
+            return len(self._current) + sum(len(keys) for _, keys in self._sealed)
+
+
+class SQLiteIdempotencyStore(_Counters):
+    """Idempotency store shared by every process that can reach the SQLite file.
+
+    A key recorded with an owner (the job that is processing the event) is
+    only held for pending_ttl_seconds until confirm() marks the event as
+    done. If the process dies before that, the job re-run by another
+    process has the same owner and gets the key again, while a duplicate
+    webhook (another owner) is still skipped.
+    """
+
+    def __init__(self, path, ttl_seconds=86400, max_keys=1_000_000, pending_ttl_seconds=600):
+        super().__init__()
+        self._ttl = ttl_seconds
+        self._pending_ttl = pending_ttl_seconds
+        self._max_keys = max_keys
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "key INTEGER PRIMARY KEY, expires_at REAL NOT NULL, owner TEXT) WITHOUT ROWID"
+        )
+        # 이전 버전에서 만든 파일에는 owner 컬럼이 없습니다.
+        if "owner" not in {row[1] for row in self._conn.execute("PRAGMA table_info(idempotency_keys)")}:
+            self._conn.execute("ALTER TABLE idempotency_keys ADD COLUMN owner TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idempotency_keys_expires ON idempotency_keys (expires_at)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def check_and_set(self, key, owner=None):
+        """Atomically records key. Returns True if it was not seen before (or is pending for the same owner)."""
+        value = compact_key(key)
+        now = time.time()
+        expires_at = now + (self._pending_ttl if owner else self._ttl)
+        with self._lock:
+            # 만료된 키와 같은 작업이 처리 중이던 키는 덮어쓰고, 그 외에 유효한 키가 있으면 아무 것도 바꾸지 않습니다.
+            cur = self._conn.execute(
+                "INSERT INTO idempotency_keys (key, expires_at, owner) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at, owner = excluded.owner "
+                "WHERE idempotency_keys.expires_at < ? OR idempotency_keys.owner = excluded.owner",
+                (value, expires_at, owner, now),
+            )
+            is_new = cur.rowcount == 1
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune(now)
+        if is_new:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return is_new
+
+    def confirm(self, key):
+        """Marks a key recorded with an owner as done, keeping it for the full TTL."""
+        with self._lock:
+            self._conn.execute("UPDATE idempotency_keys SET expires_at = ?, owner = NULL WHERE key = ?",
+                               (time.time() + self._ttl, compact_key(key)))
+
+    def _prune(self, now):
+        self._conn.execute("DELETE FROM idempotency_keys WHERE expires_at < ?", (now,))
+        self._conn.execute(
+            "DELETE FROM idempotency_keys WHERE key IN ("
+            "SELECT key FROM idempotency_keys ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_keys,),
+        )
+
+
+class RedisIdempotencyStore(_Counters):
+    """Idempotency store backed by any client exposing redis-py's set(nx=, ex=) and get().
+
+    Pending keys (recorded with an owner) work as in SQLiteIdempotencyStore.
+    """
+
+    def __init__(self, client, ttl_seconds=86400, prefix="idem:", pending_ttl_seconds=600):
+        super().__init__()
+        self._client = client
+        self._ttl = int(ttl_seconds)
+        self._pending_ttl = int(pending_ttl_seconds)
+        self._prefix = prefix
+
+    def _name(self, key):
+        return f"{self._prefix}{compact_key(key):x}"
+
+    def check_and_set(self, key, owner=None):
+        """Atomically records key. Returns True if it was not seen before (or is pending for the same owner)."""
+        name = self._name(key)
+        if owner:
+            is_new = bool(self._client.set(name, owner, nx=True, ex=self._pending_ttl))
+            if not is_new:
+                value = self._client.get(name)
+                is_new = value is not None and (value.decode() if isinstance(value, bytes) else value) == owner
+        else:
+            is_new = bool(self._client.set(name, 1, nx=True, ex=self._ttl))
+        if is_new:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return is_new
+
+    def confirm(self, key):
+        """Marks a key recorded with an owner as done, keeping it for the full TTL."""
+        self._client.set(self._name(key), 1, ex=self._ttl)
+
+
+def create_idempotency_store():
+    """Builds an idempotency store from IDEMPOTENCY_* environment variables."""
+    backend_name = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    ttl_seconds = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    max_keys = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "1000000"))
+    pending_ttl_seconds = int(os.getenv("IDEMPOTENCY_PENDING_TTL_SECONDS", "600"))
+    if backend_name == "sqlite":
+        path = os.getenv("IDEMPOTENCY_PATH", "/tmp/webhook_idempotency.sqlite3")
+        return SQLiteIdempotencyStore(path, ttl_seconds=ttl_seconds, max_keys=max_keys,
+                                      pending_ttl_seconds=pending_ttl_seconds)
+    if backend_name == "redis":
+        try:
+            import redis
+        except ImportError:
+            logging.error("IDEMPOTENCY_BACKEND=redis requires the 'redis' package. Falling back to memory.")
+        else:
+            return RedisIdempotencyStore(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")),
+                                         ttl_seconds=ttl_seconds, pending_ttl_seconds=pending_ttl_seconds)
+    return MemoryIdempotencyStore(ttl_seconds=ttl_seconds, max_keys=max_keys)
@@ -3,43 +3,48 @@ from datetime import datetime, timezone
 
 def parse_facebook_webhook(data):
     """
-    수신된 Facebook Webhook JSON 데이터를 파싱합니다.
-    제공된 스크린샷의 구조를 기반으로 합니다.
+    수신된 Facebook Webhook JSON 데이터에서 영상 게시물 변경사항을 모두 추출합니다.
+    Facebook은 트래픽이 많을 때 여러 entry/changes를 하나의 요청으로 묶어 보내므로
+    모든 entry의 모든 change를 순회하며 영상 하나당 하나의 딕셔너리를 yield 합니다.
+    'feed' 필드가 아니거나 item 이 'video' 가 아닌 변경사항은 결과 딕셔너리를 만들기 전에 건너뜁니다.
     """
     try:
-        # 데이터 구조를 안전하게 탐색합니다.
-        # entry와 changes는 리스트(list) 형태일 수 있습니다.
-        change = data['entry'][0]['changes'][0]
-        
-        # 'feed' 필드에 대한 변경사항이 아니면 처리하지 않습니다.
-        if change.get('field') != 'feed':
-            return None
+        entries = data['entry']
+    except (KeyError, TypeError) as e:
+        logging.error("Facebook Webhook 데이터 파싱 오류: %s", e)
+        return
 
-        value = change['value']
+    for entry in entries:
+        try:
+            changes = entry['changes']
+        except (KeyError, TypeError) as e:
+            logging.error("Facebook Webhook 데이터 파싱 오류: %s", e)
+            continue
 
-        # .get() 메소드를 사용하여 키가 없는 경우에도 오류 없이 안전하게 값을 추출합니다.
-        post_id = value.get('post_id')
-        message = value.get('message', '')  # 메시지가 없는 경우 빈 문자열 반환
-        item_type = value.get('item')       # 'photo', 'video', 'status' 등
-        media_url = value.get('link')       # 이미지, 비디오 등의 실제 URL
-        created_timestamp = value.get('created_time')
+        for change in changes:
+            try:
+                # 'feed' 필드의 영상 변경사항이 아니면 처리하지 않습니다.
+                if change.get('field') != 'feed':
+                    continue
+                value = change['value']
+                if value.get('item') != 'video':
+                    continue
 
-        # Unix 타임스탬프를 사람이 읽을 수 있는 시간 포맷으로 변환합니다.
-        created_time_str = "N/A"
-        if created_timestamp:
-            created_time_str = datetime.fromtimestamp(
-                created_timestamp, tz=timezone.utc
-            ).strftime('%Y-%m-%d %H:%M:%S UTC')
+                # Unix 타임스탬프를 사람이 읽을 수 있는 시간 포맷으로 변환합니다.
+                created_timestamp = value.get('created_time')
+                created_time_str = "N/A"
+                if created_timestamp:
+                    created_time_str = datetime.fromtimestamp(
+                        created_timestamp, tz=timezone.utc
+                    ).strftime('%Y-%m-%d %H:%M:%S UTC')
 
-        # 추출한 값들을 딕셔너리 형태로 반환합니다.
-        return {
-            'post_id': post_id,
-            'message': message,
-            'item_type': item_type,
-            'media_url': media_url,
-            'created_time': created_time_str
-        }
-    except (KeyError, IndexError, TypeError) as e:
-        # JSON 구조가 예상과 다르거나 키가 없는 경우 에러를 기록하고 None을 반환합니다.
-        logging.error(f"Facebook Webhook 데이터 파싱 오류: {e}")
-        return None
\ No newline at end of file
+                yield {
+                    'post_id': value.get('post_id'),
+                    'message': value.get('message', ''),  # 메시지가 없는 경우 빈 문자열 반환
+                    'item_type': 'video',
+                    'media_url': value.get('link'),       # 비디오의 실제 URL
+                    'created_time': created_time_str
+                }
+            except (KeyError, TypeError, AttributeError, ValueError, OverflowError) as e:
+                # 변경사항 하나의 구조가 예상과 다르더라도 나머지 변경사항은 계속 처리합니다.
+                logging.error("Facebook Webhook 데이터 파싱 오류: %s", e)
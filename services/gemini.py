@@ -1,78 +1,236 @@
-import os
+import json
 import logging
+import threading
+from functools import lru_cache
+import httpx
 from google import genai
 from google.genai import types
-from dotenv import load_dotenv
+from services.metrics import record_token_usage
+from services.profiles import DEFAULT_PROFILE, FLASH_MODEL, MODEL
+from services.settings import get_settings
 
-load_dotenv()
+# Gemini 2.5 Pro 는 thinking 을 끌 수 없으며 최소 예산은 128 입니다.
+PRO_MIN_THINKING_BUDGET = 128
 
-def generate(file_uri, prompt, text):
-  client = genai.Client(
-      vertexai=True,
-      project=os.getenv('GCP_PROJECT'),
-      location="global",
+# 분석 프로필별 설정의 기반이 되는 공통 설정입니다. 읽기 전용으로만 사용하세요.
+GENERATE_CONTENT_CONFIG = types.GenerateContentConfig(
+  temperature = 1,
+  top_p = 0.95,
+  seed = 0,
+  max_output_tokens = 65535,
+  safety_settings = [types.SafetySetting(
+    category="HARM_CATEGORY_HATE_SPEECH",
+    threshold="OFF"
+  ),types.SafetySetting(
+    category="HARM_CATEGORY_DANGEROUS_CONTENT",
+    threshold="OFF"
+  ),types.SafetySetting(
+    category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    threshold="OFF"
+  ),types.SafetySetting(
+    category="HARM_CATEGORY_HARASSMENT",
+    threshold="OFF"
+  )],
+  thinking_config=types.ThinkingConfig(
+    thinking_budget=-1,
+  ),
+)
+
+# 답변을 JSON boolean 으로 강제하여 "True"/"False" 문자열 비교에 의존하지 않습니다.
+VERDICT_SCHEMA = types.Schema(type="BOOLEAN")
+BATCH_VERDICT_SCHEMA = types.Schema(type="ARRAY", items=types.Schema(type="BOOLEAN"))
+
+MEDIA_RESOLUTIONS = {
+  "low": types.MediaResolution.MEDIA_RESOLUTION_LOW,
+  "medium": types.MediaResolution.MEDIA_RESOLUTION_MEDIUM,
+  "high": types.MediaResolution.MEDIA_RESOLUTION_HIGH,
+}
+
+
+@lru_cache(maxsize=64)
+def generation_config(model=MODEL, profile=DEFAULT_PROFILE, batch_size=0):
+  """Builds the GenerateContentConfig for a model and AnalysisProfile (cached, read-only).
+
+  batch_size > 0 asks for a JSON array of that many verdicts (generate_batch).
+  """
+  thinking_budget = profile.thinking_budget
+  if model == FLASH_MODEL:
+    # Flash 는 이전과 같이 thinking 없이 빠르게 답합니다.
+    thinking_budget = 0
+  elif 0 <= thinking_budget < PRO_MIN_THINKING_BUDGET:
+    thinking_budget = PRO_MIN_THINKING_BUDGET
+  if thinking_budget < 0:
+    max_output_tokens = GENERATE_CONTENT_CONFIG.max_output_tokens
+  else:
+    # thinking 토큰도 max_output_tokens 에 포함되므로 답변 토큰에 thinking 예산을 더합니다.
+    max_output_tokens = profile.max_output_tokens * max(1, batch_size) + thinking_budget
+  return GENERATE_CONTENT_CONFIG.model_copy(update={
+    "max_output_tokens": min(max_output_tokens, GENERATE_CONTENT_CONFIG.max_output_tokens),
+    "thinking_config": types.ThinkingConfig(thinking_budget=thinking_budget),
+    "media_resolution": MEDIA_RESOLUTIONS.get(profile.media_resolution),
+    "response_mime_type": "application/json",
+    "response_schema": BATCH_VERDICT_SCHEMA if batch_size else VERDICT_SCHEMA,
+  })
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def create_client(project=None, credentials=None, base_url=None, pool_size=None, async_pool_size=None):
+  """Creates a Vertex AI client whose HTTP connection pools fit every concurrent Gemini caller.
+
+  The sync pool serves the job-queue handler's threads and the async pool
+  main_async.py's coroutines; pool_size alone sets both.
+  """
+  settings = get_settings()
+  if async_pool_size is None:
+    async_pool_size = pool_size or settings.gemini_async_http_pool_size
+  if pool_size is None:
+    pool_size = settings.gemini_http_pool_size
+  http_options = types.HttpOptions(
+    base_url=base_url or settings.gemini_base_url,
+    client_args={"limits": httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)},
+    async_client_args={
+      "limits": httpx.Limits(max_connections=async_pool_size, max_keepalive_connections=async_pool_size)},
   )
-  msg_text = types.Part(text=text)
-  msg_video = types.FileData(
-      file_uri=file_uri,
-      mime_type="video/*"
+  return genai.Client(
+    vertexai=True,
+    project=project or settings.gcp_project,
+    location="global",
+    credentials=credentials,
+    http_options=http_options,
   )
 
-  video_meta=types.VideoMetadata(
-    start_offset="0.0s",
-    end_offset="10.0s",
-    fps=1.0
-  )
 
-  msg_prompt= types.Part(text=prompt)
+def get_client():
+  """Returns the shared client, creating it on first use."""
+  global _client
+  if _client is None:
+    with _client_lock:
+      if _client is None:
+        _client = create_client()
+  return _client
+
+
+def set_client(client):
+  """Replaces the shared client (e.g. to point at a local fake endpoint)."""
+  global _client
+  with _client_lock:
+    _client = client
+
+
+@lru_cache(maxsize=64)
+def _prompt_part(prompt):
+  return types.Part(text=prompt)
+
+
+def request_config(config, timeout=None):
+  """Returns config with a per-request timeout in seconds (None keeps the client default)."""
+  if timeout is None:
+    return config
+  # HttpOptions.timeout 은 밀리초 단위이며, 이 요청에만 적용됩니다.
+  return config.model_copy(update={"http_options": types.HttpOptions(timeout=max(1, int(timeout * 1000)))})
+
 
-  part_vidoe_content = types.Part(
-    file_data=msg_video,
-    video_metadata=video_meta,
+@lru_cache(maxsize=64)
+def _video_metadata(profile):
+  return tuple(
+    types.VideoMetadata(start_offset=f"{float(start)}s", end_offset=f"{float(end)}s", fps=profile.fps)
+    for start, end in profile.segments
   )
-  model = "gemini-2.5-pro"
-  # contents = [
-  #     types.Content(role="user", parts=[
-  #       msg_video,
-  #       msg_text,
-  #       msg_prompt
-  #       ]
-  #     )
-  # ]
-  contents = types.Content(
+
+
+def video_parts(file_uri, profile=DEFAULT_PROFILE):
+  """One video Part per segment of the profile, all pointing at the same file."""
+  file_data = types.FileData(file_uri=file_uri, mime_type="video/*")
+  return [types.Part(file_data=file_data, video_metadata=metadata) for metadata in _video_metadata(profile)]
+
+
+def build_contents(file_uri, prompt, text, profile=DEFAULT_PROFILE):
+  return types.Content(
     role="user",
     parts=[
-      part_vidoe_content,
-      msg_text,
-      msg_prompt
+      *video_parts(file_uri, profile),
+      types.Part(text=text),
+      _prompt_part(prompt)
     ]
   )
-  generate_content_config = types.GenerateContentConfig(
-    temperature = 1,
-    top_p = 0.95,
-    seed = 0,
-    max_output_tokens = 65535,
-    safety_settings = [types.SafetySetting(
-      category="HARM_CATEGORY_HATE_SPEECH",
-      threshold="OFF"
-    ),types.SafetySetting(
-      category="HARM_CATEGORY_DANGEROUS_CONTENT",
-      threshold="OFF"
-    ),types.SafetySetting(
-      category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-      threshold="OFF"
-    ),types.SafetySetting(
-      category="HARM_CATEGORY_HARASSMENT",
-      threshold="OFF"
-    )],
-    thinking_config=types.ThinkingConfig(
-      thinking_budget=-1,
-    ),
+
+
+def parse_verdict(text):
+  """Maps the schema-constrained JSON boolean answer to a "True"/"False" verdict."""
+  try:
+    verdict = json.loads(text) if text else None
+  except ValueError:
+    verdict = None
+  if not isinstance(verdict, bool):
+    raise ValueError(f"Expected a JSON boolean verdict, got: {text!r}")
+  return "True" if verdict else "False"
+
+
+def generate(file_uri, prompt, text, model=MODEL, timeout=None, profile=DEFAULT_PROFILE):
+  response = get_client().models.generate_content(
+    model = model,
+    contents = build_contents(file_uri, prompt, text, profile),
+    config = request_config(generation_config(model, profile), timeout)
   )
-  response = client.models.generate_content(
+  record_token_usage(model, response.usage_metadata)
+  logging.debug("Gemini response: %s", response.text)
+  return parse_verdict(response.text)
+
+
+async def generate_async(file_uri, prompt, text, model=MODEL, timeout=None, profile=DEFAULT_PROFILE):
+  """Async variant of generate() so many analyses can share one event loop."""
+  response = await get_client().aio.models.generate_content(
     model = model,
-    contents = contents,
-    config = generate_content_config
+    contents = build_contents(file_uri, prompt, text, profile),
+    config = request_config(generation_config(model, profile), timeout)
   )
-  logging.info(response.text)
-  return response.text
+  record_token_usage(model, response.usage_metadata)
+  logging.debug("Gemini response: %s", response.text)
+  return parse_verdict(response.text)
+
+
+def generate_batch(items, prompt, timeout=None, profile=DEFAULT_PROFILE):
+  """Analyzes several videos with one request.
+
+  Args:
+    items: List of (file_uri, text) tuples.
+    prompt: The question asked about every video.
+    timeout: Request timeout in seconds.
+    profile: AnalysisProfile applied to every video.
+
+  Returns:
+    A list of "True"/"False" strings in the same order as items.
+  """
+  parts = []
+  for i, (file_uri, text) in enumerate(items):
+    parts.append(types.Part(text=f"[{i}]"))
+    parts.extend(video_parts(file_uri, profile))
+    if text:
+      parts.append(types.Part(text=text))
+  parts.append(types.Part(text=(
+    f"위의 영상 [0]부터 [{len(items) - 1}]까지 각각에 대해 다음 질문에 답하고, "
+    f"결과를 순서대로 JSON boolean 배열로만 답변해주세요.\n{prompt}"
+  )))
+  response = get_client().models.generate_content(
+    model = MODEL,
+    contents = types.Content(role="user", parts=parts),
+    config = request_config(generation_config(MODEL, profile, len(items)), timeout)
+  )
+  record_token_usage(MODEL, response.usage_metadata)
+  logging.debug("Gemini response: %s", response.text)
+  return parse_batch_verdicts(response.text, len(items))
+
+
+def parse_batch_verdicts(text, count):
+  """Maps a JSON array of `count` booleans to "True"/"False" verdicts; raises ValueError like parse_verdict."""
+  try:
+    verdicts = json.loads(text) if text else None
+  except ValueError:
+    verdicts = None
+  if (not isinstance(verdicts, list) or len(verdicts) != count
+      or not all(isinstance(verdict, bool) for verdict in verdicts)):
+    raise ValueError(f"Expected {count} JSON boolean verdicts, got: {text!r}")
+  return ["True" if verdict else "False" for verdict in verdicts]
@@ -0,0 +1,423 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+from services.metrics import QUEUE_WAIT_SECONDS
+from services.settings import get_settings
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when the job cannot be accepted.
+
+    status_code is 503 when the whole queue is full and 429 when only the
+    platform's own backlog limit is exceeded.
+    """
+
+    def __init__(self, message, status_code=503, retry_after=5):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Job:
+    __slots__ = ("id", "platform", "headers", "body", "enqueued_at")
+
+    def __init__(self, id, platform, headers, body, enqueued_at):
+        self.id = id
+        self.platform = platform
+        self.headers = headers
+        self.body = body
+        self.enqueued_at = enqueued_at
+
+
+class MemoryJobBackend:
+    """In-process backend. Jobs are lost on restart."""
+
+    def __init__(self):
+        self._pending = deque()
+        self._running = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def put(self, platform, headers, body):
+        with self._lock:
+            self._next_id += 1
+            self._pending.append(Job(self._next_id, platform, headers, body, time.time()))
+            return self._next_id
+
+    def claim(self, skip_platforms=()):
+        with self._lock:
+            for i, job in enumerate(self._pending):
+                if job.platform not in skip_platforms:
+                    del self._pending[i]
+                    self._running[job.id] = job
+                    return job
+            return None
+
+    def ack(self, job_id):
+        with self._lock:
+            self._running.pop(job_id, None)
+
+    def depth(self, platform=None):
+        with self._lock:
+            if platform is None:
+                return len(self._pending)
+            return sum(1 for job in self._pending if job.platform == platform)
+
+    def recover(self):
+        return 0
+
+
+class SQLiteJobBackend:
+    """SQLite file backend so accepted jobs survive instance restarts.
+
+    Several processes may share the file. A job is claimed with a single
+    UPDATE ... RETURNING inside BEGIN IMMEDIATE, so only one process gets it,
+    and the claiming process holds a lease on it that a background thread
+    renews every lease_seconds / 3. Jobs whose lease ran out (their process
+    died) are claimed again like pending ones.
+
+    Any backend exposing put/claim/ack/depth/recover (e.g. a Redis or Pub/Sub
+    adapter) can be passed to JobQueue instead.
+    """
+
+    def __init__(self, path, lease_seconds=60.0):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "platform TEXT NOT NULL, "
+            "headers TEXT NOT NULL, "
+            "body BLOB NOT NULL, "
+            "enqueued_at REAL NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "owner TEXT, "
+            "lease_expires_at REAL)"
+        )
+        # 이전 버전에서 만든 파일에는 lease 컬럼이 없습니다.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_id ON jobs (status, id)")
+        self._lock = threading.Lock()
+        self._lease_seconds = lease_seconds
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heartbeat = None
+
+    def put(self, platform, headers, body):
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (platform, headers, body, enqueued_at) VALUES (?, ?, ?, ?)",
+                (platform, json.dumps(headers), body, time.time()),
+            )
+            return cur.lastrowid
+
+    def claim(self, skip_platforms=()):
+        now = time.time()
+        subquery = ("SELECT id FROM jobs WHERE (status = 'pending' "
+                    "OR (status = 'running' AND lease_expires_at < ?))")
+        params = [now, *skip_platforms]
+        if skip_platforms:
+            subquery += f" AND platform NOT IN ({','.join('?' * len(skip_platforms))})"
+        subquery += " ORDER BY id LIMIT 1"
+        with self._lock:
+            self._start_heartbeat()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, lease_expires_at = ? "
+                    f"WHERE id = ({subquery}) RETURNING id, platform, headers, body, enqueued_at",
+                    [self._owner, now + self._lease_seconds, *params],
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Job(row[0], row[1], json.loads(row[2]), row[3], row[4])
+
+    def ack(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ? AND owner = ?", (job_id, self._owner))
+
+    def depth(self, platform=None):
+        with self._lock:
+            if platform is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'pending' AND platform = ?", (platform,)
+                ).fetchone()
+        return row[0]
+
+    def recover(self):
+        """Returns jobs whose lease expired (their process died) to the pending state."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'pending', owner = NULL, lease_expires_at = NULL "
+                "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (time.time(),),
+            )
+        return cur.rowcount
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._renew_leases, name="job-lease", daemon=True)
+            self._heartbeat.start()
+
+    def _renew_leases(self):
+        while True:
+            time.sleep(self._lease_seconds / 3)
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE jobs SET lease_expires_at = ? WHERE owner = ? AND status = 'running'",
+                        (time.time() + self._lease_seconds, self._owner),
+                    )
+            except sqlite3.Error as e:
+                logging.warning("Could not renew job leases: %s", e)
+
+
+class JobQueue:
+    """Bounded worker pool fed by a pluggable job backend.
+
+    Args:
+        handler: Called as handler(platform, headers, body) on a worker thread.
+        backend: Job storage. Defaults to MemoryJobBackend.
+        workers: Number of worker threads.
+        max_depth: Pending jobs allowed before submit raises QueueFull (503).
+        platform_limits: {platform: max concurrent jobs}. Platforms without an
+            entry may use every worker.
+        platform_max_depth: Pending jobs allowed per platform before submit
+            raises QueueFull (429).
+        error_backoff: (first, max) seconds a worker waits after a backend
+            error (e.g. a locked SQLite file) before claiming again; the
+            delay doubles while the errors continue.
+    """
+
+    def __init__(self, handler, backend=None, workers=4, max_depth=1000,
+                 platform_limits=None, platform_max_depth=None, error_backoff=(0.1, 5.0)):
+        self._handler = handler
+        self._backend = backend or MemoryJobBackend()
+        self._workers = workers
+        self._max_depth = max_depth
+        self._platform_limits = dict(platform_limits or {})
+        self._platform_max_depth = platform_max_depth
+        self._error_backoff = error_backoff
+        self._cond = threading.Condition()
+        # claim 은 SQLite 쓰기 트랜잭션이라 기다릴 수 있으므로 _cond 가 아닌 별도 락으로 한 번에 하나씩만 합니다.
+        self._claim_lock = threading.Lock()
+        self._generation = 0
+        self._threads = []
+        self._running = {}
+        self._busy = 0
+        self._stopping = False
+        self._started_at = None
+        self._busy_seconds = 0.0
+        self._processed = 0
+        self._rejected = 0
+        self._backend_errors = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            self._started_at = time.monotonic()
+            recovered = self._backend.recover()
+            if recovered:
+                logging.info("Recovered %s unfinished jobs from the job backend.", recovered)
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, platform, headers, body):
+        """Stores the job and wakes a worker. Raises QueueFull on backpressure."""
+        if not self._threads:
+            self.start()
+        if self._backend.depth() >= self._max_depth:
+            self._rejected += 1
+            raise QueueFull("Job queue is full", status_code=503)
+        if self._platform_max_depth is not None and self._backend.depth(platform) >= self._platform_max_depth:
+            self._rejected += 1
+            raise QueueFull(f"{platform} backlog is full", status_code=429)
+        job_id = self._backend.put(platform, headers, body)
+        self._wake()
+        return job_id
+
+    @property
+    def platform_limits(self):
+        return dict(self._platform_limits)
+
+    def _wake(self, all_workers=False):
+        with self._cond:
+            self._generation += 1
+            if all_workers:
+                self._cond.notify_all()
+            else:
+                self._cond.notify()
+
+    def _saturated_platforms(self):
+        return [platform for platform, limit in self._platform_limits.items()
+                if self._running.get(platform, 0) >= limit]
+
+    def _claim(self):
+        """Claims the next job whose platform has a free slot and counts it as running.
+
+        Returns None if there is nothing to claim. Backend errors (e.g. sqlite3
+        "database is locked" while another process holds the file) propagate.
+        """
+        with self._claim_lock:
+            with self._cond:
+                skip = self._saturated_platforms()
+            job = self._backend.claim(skip)
+            if job is not None:
+                # 다음 claim 이 플랫폼 한도를 보기 전에 실행 중으로 셉니다.
+                with self._cond:
+                    self._running[job.platform] = self._running.get(job.platform, 0) + 1
+                    self._busy += 1
+            return job
+
+    def _backoff(self, failures):
+        low, high = self._error_backoff
+        return min(high, low * 2 ** (failures - 1))
+
+    def _next_job(self):
+        """Blocks until a job is claimed, or returns None once the queue is stopping."""
+        failures = 0
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return None
+                generation = self._generation
+            try:
+                job = self._claim()
+            except Exception as e:
+                failures += 1
+                self._backend_errors += 1
+                delay = self._backoff(failures)
+                logging.warning("Could not claim a job (retrying in %.1fs): %s", delay, e)
+                with self._cond:
+                    if not self._stopping:
+                        self._cond.wait(timeout=delay)
+                continue
+            failures = 0
+            if job is not None:
+                return job
+            with self._cond:
+                # claim 하는 동안 새 작업이나 반환된 슬롯이 없었을 때만 기다립니다.
+                # timeout은 다른 프로세스가 넣은 작업과 lease 가 끝난 작업을 위한 폴링입니다.
+                if not self._stopping and generation == self._generation:
+                    self._cond.wait(timeout=1.0)
+
+    def _ack(self, job):
+        failures = 0
+        while True:
+            try:
+                self._backend.ack(job.id)
+                return
+            except Exception as e:
+                failures += 1
+                self._backend_errors += 1
+                if self._stopping:
+                    # 지우지 못한 작업은 lease 가 끝나면 다른 프로세스가 다시 처리합니다.
+                    logging.error("Could not acknowledge job %s: %s", job.id, e)
+                    return
+                delay = self._backoff(failures)
+                logging.warning("Could not acknowledge job %s (retrying in %.1fs): %s", job.id, delay, e)
+                time.sleep(delay)
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            wait = max(0.0, time.time() - job.enqueued_at)
+            with self._cond:
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+            QUEUE_WAIT_SECONDS.observe(wait, platform=job.platform)
+
+            started = time.monotonic()
+            try:
+                self._handler(job.platform, job.headers, job.body)
+            except Exception as e:
+                logging.error("Unhandled error in job %s (%s): %s", job.id, job.platform, e)
+            finally:
+                self._ack(job)
+                with self._cond:
+                    self._running[job.platform] -= 1
+                    self._busy -= 1
+                    self._processed += 1
+                    self._busy_seconds += time.monotonic() - started
+                self._wake(all_workers=True)
+
+    def stats(self):
+        """Returns queue depth, wait time and worker utilization counters."""
+        # depth() 는 백엔드를 조회하므로 _cond 를 잡기 전에 읽습니다.
+        depth = self._backend.depth()
+        with self._cond:
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+            capacity = elapsed * self._workers
+            return {
+                "depth": depth,
+                "workers": self._workers,
+                "live_workers": sum(thread.is_alive() for thread in self._threads),
+                "busy_workers": self._busy,
+                "running_by_platform": dict(self._running),
+                "processed": self._processed,
+                "rejected": self._rejected,
+                "backend_errors": self._backend_errors,
+                "avg_wait_seconds": self._wait_total / self._processed if self._processed else 0.0,
+                "max_wait_seconds": self._wait_max,
+                "utilization": self._busy_seconds / capacity if capacity else 0.0,
+            }
+
+
+def parse_platform_limits(value):
+    """Parses 'YouTube=2,TikTok=1' into {'YouTube': 2, 'TikTok': 1}."""
+    limits = {}
+    for item in (value or "").split(","):
+        name, sep, limit = item.partition("=")
+        if sep and name.strip() and limit.strip().isdigit():
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+def create_job_queue(handler):
+    """Builds a JobQueue from JOB_QUEUE_* environment variables (the worker count from Settings)."""
+    backend_name = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+    if backend_name == "memory":
+        backend = MemoryJobBackend()
+    else:
+        backend = SQLiteJobBackend(os.getenv("JOB_QUEUE_PATH", "/tmp/webhook_jobs.sqlite3"),
+                                   lease_seconds=float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "60")))
+    platform_max_depth = os.getenv("JOB_QUEUE_PLATFORM_MAX_DEPTH")
+    return JobQueue(
+        handler,
+        backend=backend,
+        workers=get_settings().job_queue_workers,
+        max_depth=int(os.getenv("JOB_QUEUE_MAX_DEPTH", "1000")),
+        platform_limits=parse_platform_limits(os.getenv("JOB_QUEUE_PLATFORM_LIMITS")),
+        platform_max_depth=int(platform_max_depth) if platform_max_depth else None,
+    )
@@ -0,0 +1,111 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import sys
+import uuid
+from contextlib import contextmanager
+
+CORRELATION_HEADER = "X-Correlation-Id"
+SENSITIVE_HEADERS = frozenset(("tiktok-signature", "x-hub-signature", "x-hub-signature-256", "authorization", "cookie"))
+
+correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+# Slack webhook URL, 서명 헤더, 토큰 파라미터 등은 로그에 남기지 않습니다.
+_REDACTIONS = (
+    (re.compile(r"https://hooks\.slack\.com/services/[A-Za-z0-9/_-]+"), "https://hooks.slack.com/services/[REDACTED]"),
+    (re.compile(r"((?:TikTok-Signature|X-Hub-Signature(?:-256)?|Authorization|X-Goog-Api-Key)['\"]?\s*[:=]\s*['\"]?)[^'\"\n}]+",
+                re.IGNORECASE), r"\1[REDACTED]"),
+    (re.compile(r"((?:hub\.verify_token|hub\.secret|access_token|api_key|client_secret)=)[^&\s'\"]+", re.IGNORECASE),
+     r"\1[REDACTED]"),
+)
+
+
+def redact(text):
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def new_correlation_id(headers=None):
+    """Reuses an incoming correlation/trace id when present, otherwise generates one."""
+    if headers is not None:
+        incoming = headers.get(CORRELATION_HEADER) or headers.get("X-Cloud-Trace-Context", "").split("/")[0]
+        if incoming:
+            return incoming
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def bind_correlation_id(value):
+    """Attaches value to every log record emitted in this context."""
+    token = correlation_id.set(value)
+    try:
+        yield value
+    finally:
+        correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with Cloud Logging's severity field and secrets redacted."""
+
+    def format(self, record):
+        entry = {
+            "severity": record.levelname,
+            "message": redact(record.getMessage()),
+            "logger": record.name,
+            "time": self.formatTime(record),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RedactingFormatter(logging.Formatter):
+    def format(self, record):
+        return redact(super().format(record))
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """Installs the root handler. LOG_FORMAT=json (default) or text, LOG_LEVEL=INFO by default."""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.addFilter(CorrelationFilter())
+    if (fmt or os.getenv("LOG_FORMAT", "json")) == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(RedactingFormatter("%(levelname)s:%(name)s:[%(correlation_id)s] %(message)s"))
+    logging.basicConfig(level=level or os.getenv("LOG_LEVEL", "INFO"), handlers=[handler], force=True)
+
+
+class BodySampler:
+    """Logs a truncated request body for a sampled fraction of requests."""
+
+    def __init__(self, rate=0.0, max_bytes=512):
+        self.rate = rate
+        self.max_bytes = max_bytes
+
+    def log(self, method, path, headers, body):
+        if self.rate <= 0 or random.random() >= self.rate or not logging.getLogger().isEnabledFor(logging.INFO):
+            return
+        snippet = body[:self.max_bytes].decode("utf-8", "replace")
+        safe_headers = {name: "[REDACTED]" if name.lower() in SENSITIVE_HEADERS else value
+                        for name, value in headers.items()}
+        logging.info("Sampled %s %s headers=%s body(%d bytes)=%s",
+                     method, path, safe_headers, len(body), snippet)
+
+
+def create_body_sampler():
+    return BodySampler(
+        rate=float(os.getenv("LOG_BODY_SAMPLE_RATE", "0")),
+        max_bytes=int(os.getenv("LOG_BODY_MAX_BYTES", "512")),
+    )
@@ -0,0 +1,196 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("youtube-monitoring-webhook")
+except ImportError:
+    _tracer = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Gauge whose samples are read from a callback at scrape time."""
+    type = "gauge"
+
+    def __init__(self, name, help, labels=(), callback=None):
+        super().__init__(name, help, labels)
+        self._callback = callback
+
+    def set_function(self, callback):
+        """callback() returns {label_values_tuple: value}, or a number when there are no labels."""
+        self._callback = callback
+
+    def _render_samples(self):
+        if self._callback is None:
+            return []
+        values = self._callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # 버킷별 개수 + (+Inf 개수, 합계)
+                counts = self._values[key] = [0] * len(self.buckets) + [0, 0.0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the block and, with OpenTelemetry installed, records a span."""
+        span = _tracer.start_as_current_span(self.name, attributes=labels) if _tracer else nullcontext()
+        started = time.perf_counter()
+        with span:
+            try:
+                yield
+            finally:
+                self.observe(time.perf_counter() - started, **labels)
+
+    def _render_samples(self):
+        lines = []
+        for key, counts in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', '+Inf')])} {counts[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {counts[-2]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "webhook_stage_seconds", "Time spent in each processing stage.", ["stage", "platform"]))
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "webhook_queue_wait_seconds", "Time jobs wait in the job queue before a worker picks them up.", ["platform"]))
+EVENTS = REGISTRY.register(Counter(
+    "webhook_events_total", "Webhook events by platform and outcome.", ["platform", "outcome"]))
+DEDUP = REGISTRY.register(Counter(
+    "webhook_dedup_total", "Idempotency checks by result (hit = duplicate skipped).", ["platform", "result"]))
+GEMINI_TOKENS = REGISTRY.register(Counter(
+    "gemini_tokens_total", "Gemini token usage from response.usage_metadata.", ["model", "kind"]))
+GEMINI_CALLS = REGISTRY.register(Counter(
+    "gemini_calls_total", "Gemini call attempts and fast failures by outcome.", ["model", "outcome"]))
+GEMINI_CONCURRENCY_LIMIT = REGISTRY.register(Gauge(
+    "gemini_concurrency_limit", "Current adaptive concurrency limit per model.", ["model"]))
+GEMINI_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "gemini_circuit_open", "1 while the model's circuit breaker is open or half-open.", ["model"]))
+RETRY_QUEUE_DEPTH = REGISTRY.register(Gauge("webhook_retry_queue_depth", "Analyses parked for a later retry."))
+QUEUE_DEPTH = REGISTRY.register(Gauge("webhook_queue_depth", "Pending jobs in the job queue."))
+QUEUE_BUSY_WORKERS = REGISTRY.register(Gauge("webhook_queue_busy_workers", "Workers currently running a job."))
+RESULTS_PENDING = REGISTRY.register(Gauge(
+    "webhook_results_pending", "Analysis results buffered for the next results store write."))
+SUBSCRIPTION_REQUESTS = REGISTRY.register(Counter(
+    "webhook_youtube_subscription_requests_total",
+    "YouTube hub subscription requests sent and verification requests answered.", ["mode", "outcome"]))
+
+
+# track_token_usage() 블록 안에서 받은 Gemini 응답의 토큰 수를 모읍니다 (같은 스레드/task 에서만).
+_TOKEN_USAGE = contextvars.ContextVar("gemini_token_usage", default=None)
+
+
+@contextmanager
+def track_token_usage():
+    """Yields a dict that collects the model and token counts of the Gemini responses received inside the block."""
+    usage = {"model": None, "calls": 0, "prompt": 0, "candidates": 0, "thoughts": 0, "total": 0}
+    token = _TOKEN_USAGE.set(usage)
+    try:
+        yield usage
+    finally:
+        _TOKEN_USAGE.reset(token)
+
+
+def record_token_usage(model, usage_metadata):
+    """Adds the token counts of one Gemini response to GEMINI_TOKENS."""
+    tracked = _TOKEN_USAGE.get()
+    if tracked is not None:
+        tracked["model"] = model
+        tracked["calls"] += 1
+    if usage_metadata is None:
+        return
+    for kind, field in (("prompt", "prompt_token_count"), ("candidates", "candidates_token_count"),
+                        ("thoughts", "thoughts_token_count"), ("total", "total_token_count")):
+        count = getattr(usage_metadata, field, None)
+        if count:
+            GEMINI_TOKENS.inc(count, model=model, kind=kind)
+            if tracked is not None:
+                tracked[kind] += count
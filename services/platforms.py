@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+from collections import namedtuple
+
+from services.facebook_parser import parse_facebook_webhook
+from services.profiles import create_analysis_profile
+from services.signatures import create_tiktok_verifier, create_youtube_verifier
+from services.tiktok_parser import extract_video_id_from_content
+from services.youtube_parser import parse_youtube_webhook_entries
+
+ANALYSIS_PROMPT_TEMPLATE = "다음 {platform} 영상 URI에서 영상의 제목과 설명에 '확률형 아이템 포함' 이라는 문구가 정확히 포함되어 있는지 여부를 판단하여 포함인 경우 'True' 또는 미포함 인 경우 'False' 으로만 답변해주세요."
+
+# 하나의 웹훅에서 추출한 분석 대상 영상. skip 이 있으면 분석하지 않고 해당 outcome 으로 집계합니다.
+VideoEvent = namedtuple("VideoEvent", [
+    "video_id", "video_uri", "text", "channel_name", "published", "idempotency_key", "skip",
+], defaults=(None,))
+
+
+def skipped_event(outcome, video_id=None, idempotency_key=None):
+    return VideoEvent(video_id, None, "", None, None, idempotency_key, outcome)
+
+
+class WebhookRequest:
+    """Headers and raw body of one webhook, with the JSON body decoded at most once."""
+
+    __slots__ = ("headers", "body", "_json")
+
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.body = body
+        self._json = None
+
+    @property
+    def json(self):
+        if self._json is None:
+            self._json = json.loads(self.body)
+        return self._json
+
+
+class PlatformHandler:
+    """One webhook source: detect -> verify -> parse into VideoEvents.
+
+    Subclasses set `name`, `slack_header`, and either `marker_header` (a header
+    only this platform sends) or `content_type`. Configuration is read from
+    the environment once, when the handler is constructed; `analysis_profile`
+    names the default AnalysisProfile, overridable with ANALYSIS_PROFILE_<NAME>.
+
+    Handlers whose verify() depends on when the request arrived (timestamp
+    windows, replay caches) set `verify_on_receive`; such requests are
+    verified before they are queued and not again by the worker. If such a
+    request is then refused (queue full), `reject()` undoes what verify()
+    recorded so the provider's retry of it is accepted.
+    """
+
+    name = None
+    slack_header = None
+    marker_header = None
+    content_type = None
+    analysis_profile = "standard"
+    verify_on_receive = False
+
+    def __init__(self):
+        self.prompt = ANALYSIS_PROMPT_TEMPLATE.format(platform=self.name)
+        self.profile = create_analysis_profile(self.name, self.analysis_profile)
+
+    def verify(self, request):
+        return True
+
+    def reject(self, request):
+        """Called when a request verified on receipt could not be queued (the provider will retry it)."""
+
+    def parse(self, request):
+        """Returns a list of VideoEvents. An empty list means the payload was invalid."""
+        raise NotImplementedError
+
+
+class TikTokHandler(PlatformHandler):
+    name = "TikTok"
+    slack_header = "TikTok 영상 업데이트 🎥"
+    marker_header = "TikTok-Signature"
+    verify_on_receive = True
+
+    def __init__(self):
+        super().__init__()
+        self.verifier = create_tiktok_verifier()
+        self.channel_name = os.getenv("TIKTOK_CHANNEL_NAME")
+
+    def verify(self, request):
+        return self.verifier.verify(request.headers, request.body)
+
+    def reject(self, request):
+        # 큐가 가득 차 503/429 로 답한 요청은 같은 서명으로 재시도되므로 재전송 캐시에서 지웁니다.
+        self.verifier.forget(request.headers)
+
+    def parse(self, request):
+        payload = request.json
+        # TikTok 은 content 를 JSON 문자열로 보내므로 한 번만 디코딩해서 재사용합니다.
+        content = payload.get('content') or {}
+        if isinstance(content, str):
+            content = json.loads(content)
+        # 멱등성 키로 사용할 고유 ID (예: create_time + share_id)
+        idempotency_key = f"tiktok-{payload.get('create_time')}-{content.get('share_id')}"
+        event_type = payload.get('event')
+        if event_type == 'tiktok.ping':
+            return [skipped_event("ping", idempotency_key=idempotency_key)]
+        if event_type != 'video.publish.complete':
+            return [skipped_event("ignored", idempotency_key=idempotency_key)]
+
+        video_id = extract_video_id_from_content(content)
+        if not video_id:
+            return []
+        return [VideoEvent(
+            video_id=video_id,
+            video_uri=f"https://www.tiktok.com/@{self.channel_name}/video/{video_id}",
+            text="",
+            channel_name=self.channel_name,
+            published=payload.get('create_time'),
+            idempotency_key=idempotency_key,
+        )]
+
+
+class FacebookHandler(PlatformHandler):
+    name = "Facebook"
+    slack_header = "Facebook 영상 업데이트 📘"
+    marker_header = "X-Hub-Signature-256"
+
+    def __init__(self):
+        super().__init__()
+        self.page_name = os.getenv("FACEBOOK_PAGE_NAME", "Facebook Page")
+
+    def parse(self, request):
+        payload = request.json
+        events = []
+        for data in parse_facebook_webhook(payload):
+            # 멱등성 키로 사용할 고유 ID (예: post_id)
+            idempotency_key = f"facebook-{data.get('post_id')}"
+            if not data.get('media_url'):
+                events.append(skipped_event("invalid", data.get('post_id'), idempotency_key))
+                continue
+            events.append(VideoEvent(
+                video_id=data.get('post_id'),
+                video_uri=data['media_url'],
+                text=data.get('message', ''),
+                channel_name=self.page_name,
+                published=data.get('created_time', 'N/A'),
+                idempotency_key=idempotency_key,
+            ))
+        if not events and isinstance(payload, dict) and payload.get('entry'):
+            # 영상이 아닌 게시물(사진, 상태 등)만 있는 경우
+            return [skipped_event("ignored")]
+        return events
+
+
+class YouTubeHandler(PlatformHandler):
+    name = "YouTube"
+    slack_header = "YouTube 영상 업데이트 📺"
+    content_type = "application/atom+xml"
+
+    def __init__(self):
+        super().__init__()
+        # 구독 시 hub.secret 을 보냈다면 허브는 본문의 HMAC-SHA1 을 X-Hub-Signature 로 보냅니다.
+        self.hub_hmac = create_youtube_verifier()
+
+    def verify(self, request):
+        if not self.hub_hmac:
+            return True
+        signature = request.headers.get('X-Hub-Signature', '')
+        if signature.startswith('sha1=') and self.hub_hmac.verify(signature[5:], request.body):
+            return True
+        logging.warning("YouTube notification with missing or invalid X-Hub-Signature")
+        return False
+
+    def parse(self, request):
+        events = []
+        for entry in parse_youtube_webhook_entries(request.body):
+            if entry['deleted']:
+                events.append(skipped_event("deleted", entry.get('video_id')))
+                continue
+            events.append(VideoEvent(
+                video_id=entry['video_id'],
+                video_uri=f"https://www.youtube.com/watch?v={entry['video_id']}",
+                text=entry.get('title', ''),
+                channel_name=entry.get('channel_id', 'Unknown'),
+                published=entry.get('published', 'N/A'),
+                # 멱등성 키로 사용할 고유 ID (video_id)
+                idempotency_key=f"youtube-{entry['video_id']}",
+            ))
+        return events
+
+
+class PlatformRegistry:
+    """Maps incoming requests to PlatformHandlers.
+
+    Detection walks the request's own headers once and looks each one up in
+    a dict, so its cost does not depend on how many platforms are registered.
+    """
+
+    def __init__(self, handlers=()):
+        self._handlers = {}
+        self._by_header = {}
+        self._by_content_type = {}
+        for handler in handlers:
+            self.register(handler)
+
+    def register(self, handler):
+        self._handlers[handler.name] = handler
+        if handler.marker_header:
+            self._by_header[handler.marker_header.lower()] = handler
+        if handler.content_type:
+            self._by_content_type[handler.content_type] = handler
+        return handler
+
+    def __getitem__(self, name):
+        return self._handlers[name]
+
+    def get(self, name):
+        return self._handlers.get(name)
+
+    def __iter__(self):
+        return iter(self._handlers.values())
+
+    def detect(self, headers):
+        """Returns the handler for the request, or None if no platform matches."""
+        for name in headers.keys():
+            handler = self._by_header.get(name.lower())
+            if handler is not None:
+                return handler
+        content_type = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        return self._by_content_type.get(content_type)
+
+
+def create_platform_registry():
+    # Instagram 등 새 플랫폼은 PlatformHandler 를 상속한 클래스를 만들어 여기에 추가합니다.
+    return PlatformRegistry([TikTokHandler(), FacebookHandler(), YouTubeHandler()])
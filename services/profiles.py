@@ -0,0 +1,79 @@
+import os
+from collections import namedtuple
+
+# 모델 이름은 genai SDK 를 불러오지 않고도 쓸 수 있도록 여기에 둡니다 (services.gemini 에서 다시 내보냄).
+MODEL = "gemini-2.5-pro"
+FLASH_MODEL = "gemini-2.5-flash"
+
+# 영상에서 잘라 볼 구간 (초). 웹훅에는 영상 길이가 없으므로 모든 구간은 영상 시작 기준입니다.
+AnalysisProfile = namedtuple("AnalysisProfile", [
+    "name",
+    "segments",           # ((start_seconds, end_seconds), ...)
+    "fps",                # 구간마다 초당 샘플링할 프레임 수
+    "media_resolution",   # None(기본), "low", "medium", "high"
+    "max_output_tokens",  # 답변에 쓸 토큰 수 (thinking 예산은 별도로 더합니다)
+    "thinking_budget",    # -1 이면 모델이 정함. Pro 는 128 미만으로 내려가지 않습니다.
+])
+
+PROFILES = {
+    # 이전 동작: 앞 10초, 1fps, 기본 해상도, 출력/thinking 제한 없음
+    "legacy": AnalysisProfile("legacy", ((0, 10),), 1.0, None, 65535, -1),
+    "standard": AnalysisProfile("standard", ((0, 10),), 1.0, None, 16, 512),
+    # 고지 문구는 대부분 영상 첫 화면에 나오므로 앞 5초만 저해상도로 봅니다.
+    "opening": AnalysisProfile("opening", ((0, 5),), 1.0, "low", 16, 128),
+    # 앞부분과 중간 광고 구간을 드문드문 확인합니다.
+    "sparse": AnalysisProfile("sparse", ((0, 10), (30, 60)), 0.5, "low", 16, 256),
+    "thorough": AnalysisProfile("thorough", ((0, 30),), 1.0, None, 16, 1024),
+}
+DEFAULT_PROFILE = PROFILES["standard"]
+
+
+def parse_segments(value):
+    """Parses '0-10|30-60' into ((0.0, 10.0), (30.0, 60.0))."""
+    segments = []
+    for item in value.split("|"):
+        start, sep, end = item.partition("-")
+        if not sep or float(end) <= float(start):
+            raise ValueError(f"Invalid segment: {item!r}")
+        segments.append((float(start), float(end)))
+    return tuple(segments)
+
+
+def parse_profile(spec, base=DEFAULT_PROFILE):
+    """Parses a profile spec such as 'opening' or 'standard,segments=0-5|50-60,fps=0.5,resolution=low'.
+
+    The first item may name a preset from PROFILES; key=value items
+    (segments, fps, resolution, output_tokens, thinking) override it.
+    """
+    items = [item.strip() for item in (spec or "").split(",") if item.strip()]
+    if items and "=" not in items[0]:
+        name = items.pop(0)
+        if name not in PROFILES:
+            raise ValueError(f"Unknown analysis profile: {name}")
+        base = PROFILES[name]
+    if not items:
+        return base
+    overrides = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        key = key.strip()
+        value = value.strip()
+        if key == "segments":
+            overrides["segments"] = parse_segments(value)
+        elif key == "fps":
+            overrides["fps"] = float(value)
+        elif key == "resolution":
+            overrides["media_resolution"] = None if value in ("", "default") else value
+        elif key == "output_tokens":
+            overrides["max_output_tokens"] = int(value)
+        elif key == "thinking":
+            overrides["thinking_budget"] = int(value)
+        else:
+            raise ValueError(f"Unknown analysis profile option: {key}")
+    return base._replace(name=f"{base.name}+custom", **overrides)
+
+
+def create_analysis_profile(platform, default="standard"):
+    """Reads ANALYSIS_PROFILE_<PLATFORM>, falling back to ANALYSIS_PROFILE and then `default`."""
+    spec = os.getenv(f"ANALYSIS_PROFILE_{platform.upper()}") or os.getenv("ANALYSIS_PROFILE") or default
+    return parse_profile(spec)
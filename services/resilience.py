@@ -0,0 +1,434 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from services.metrics import GEMINI_CALLS
+from services.settings import get_settings
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRYABLE_STATUSES = frozenset({"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL"})
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the model while its circuit breaker is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit is open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class LatencyBudgetExceeded(Exception):
+    """The call did not succeed within its latency budget (all attempts included)."""
+
+    retry_after = 0.0
+
+
+def _error_code(exc):
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_overload(exc):
+    """429 / RESOURCE_EXHAUSTED: Vertex 할당량 초과로 요청이 거절된 경우."""
+    return _error_code(exc) == 429 or getattr(exc, "status", None) == "RESOURCE_EXHAUSTED"
+
+
+def is_timeout(exc):
+    # httpx 는 genai SDK 와 함께 첫 Gemini 호출 때 불러오므로 여기서도 오류가 났을 때만 import 합니다.
+    import httpx
+    return (isinstance(exc, (TimeoutError, httpx.TimeoutException))
+            or _error_code(exc) == 504 or getattr(exc, "status", None) == "DEADLINE_EXCEEDED")
+
+
+def is_retryable(exc):
+    """Quota, server-side and network errors that may succeed when sent again."""
+    import httpx
+    return (is_overload(exc) or is_timeout(exc)
+            or _error_code(exc) in RETRYABLE_STATUS_CODES
+            or getattr(exc, "status", None) in RETRYABLE_STATUSES
+            or isinstance(exc, (httpx.NetworkError, httpx.RemoteProtocolError)))
+
+
+def is_transient(exc):
+    """Errors worth falling back to another model or retrying later, as opposed to bad input."""
+    return isinstance(exc, (CircuitOpenError, LatencyBudgetExceeded)) or is_retryable(exc)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for calls to one model.
+
+    Every success while at least half the limit is in use raises it by
+    1/limit (about +1 per round of calls); a 429/RESOURCE_EXHAUSTED
+    multiplies it by decrease_factor. Only calls started after the last
+    decrease can lower it again, so one burst of rejections halves it once.
+    Threads wait in acquire(); coroutines in acquire_async().
+    """
+
+    def __init__(self, initial=64, min_limit=1, max_limit=64, decrease_factor=0.5):
+        self._min = max(1, min_limit)
+        self._max = max(self._min, max_limit)
+        self._limit = float(min(max(initial, self._min), self._max))
+        self._decrease_factor = decrease_factor
+        self._last_decrease = 0.0
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()  # (loop, future)
+        self.decreases = 0
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def at_minimum(self):
+        return int(self._limit) <= self._min
+
+    def acquire(self, timeout=None):
+        """Waits for a free slot; returns False if none frees up within timeout seconds."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._inflight < int(self._limit), timeout):
+                return False
+            self._inflight += 1
+            return True
+
+    async def acquire_async(self, timeout=None):
+        """acquire() for coroutines; the event loop keeps running while waiting."""
+        # asyncio 는 비동기 진입점에서만 쓰이므로 functions_framework 핸들러의 import 비용에서 뺍니다.
+        import asyncio
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._inflight < int(self._limit) and not self._async_waiters:
+                self._inflight += 1
+                return True
+            future = loop.create_future()
+            self._async_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self, outcome=None, started_at=None):
+        """Returns a slot. outcome "ok" grows the limit, "overload" shrinks it, anything else leaves it.
+
+        started_at is the time.monotonic() at which the call was sent.
+        """
+        with self._cond:
+            self._inflight -= 1
+            if outcome == "ok":
+                # 한도를 다 쓰지도 않는 한가한 시간에 한도만 최대치로 부풀지 않도록 합니다.
+                if self._inflight + 1 >= self._limit / 2:
+                    self._limit = min(self._max, self._limit + 1 / self._limit)
+            elif outcome == "overload":
+                if started_at is None or started_at >= self._last_decrease:
+                    self._limit = max(self._min, self._limit * self._decrease_factor)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+                    logging.warning("Concurrency limit lowered to %s after a quota error", int(self._limit))
+            self._wake()
+
+    def _wake(self):
+        # 비동기 대기자에게는 슬롯을 미리 잡아 넘겨주고, 남는 슬롯은 스레드 대기자가 가져갑니다.
+        while self._async_waiters and self._inflight < int(self._limit):
+            loop, future = self._async_waiters.popleft()
+            self._inflight += 1
+            loop.call_soon_threadsafe(self._grant, future)
+        self._cond.notify_all()
+
+    def _grant(self, future):
+        if future.done():
+            # 슬롯을 넘기기 전에 대기자가 timeout/취소되었습니다.
+            self.release()
+        else:
+            future.set_result(None)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "inflight": self._inflight,
+                "waiting_tasks": len(self._async_waiters),
+                "decreases": self.decreases,
+            }
+
+
+class CircuitBreaker:
+    """Fails calls fast after failure_threshold consecutive failures.
+
+    After reset_timeout one probe call is let through (half-open); its
+    success closes the circuit and its failure opens it again. If the probe
+    never reports back, another one is allowed after reset_timeout.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def state(self):
+        return self._state
+
+    def check(self):
+        """Raises CircuitOpenError unless a call may be sent now."""
+        with self._lock:
+            if self._state == "closed":
+                return
+            now = time.monotonic()
+            wait = self._opened_at + self._reset_timeout - now
+            if wait > 0:
+                raise CircuitOpenError(self.name, wait)
+            self._state = "half_open"
+            self._opened_at = now
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != "closed":
+                logging.info("%s circuit closed", self.name)
+                self._state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or (self._state == "closed" and self._failures >= self._failure_threshold):
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                logging.warning("%s circuit opened after %s failures", self.name, self._failures)
+
+
+class CallGovernor:
+    """Runs calls to one model under a latency budget, retries, an AdaptiveLimiter and a CircuitBreaker.
+
+    fn(timeout) receives the seconds left for the attempt and should pass
+    them on as its request timeout. Retryable errors are retried with
+    jittered exponential backoff while attempts and budget remain; the last
+    error is raised otherwise (LatencyBudgetExceeded once the budget is spent).
+    """
+
+    def __init__(self, name, limiter=None, breaker=None, attempt_timeout=120.0, latency_budget=300.0,
+                 max_attempts=4, backoff_base=1.0, backoff_max=30.0):
+        self.name = name
+        self.limiter = limiter or AdaptiveLimiter()
+        self.breaker = breaker or CircuitBreaker(name)
+        self._attempt_timeout = attempt_timeout
+        self._latency_budget = latency_budget
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+
+    def _backoff(self, attempt):
+        delay = min(self._backoff_max, self._backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def _check(self, deadline):
+        """Fails fast on an open circuit or a spent budget; returns the seconds left."""
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            GEMINI_CALLS.inc(model=self.name, outcome="circuit_open")
+            raise
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise self._budget_exceeded("before the attempt")
+        return remaining
+
+    def _budget_exceeded(self, reason, error=None):
+        GEMINI_CALLS.inc(model=self.name, outcome="budget_exceeded")
+        detail = f": {error}" if error is not None else ""
+        return LatencyBudgetExceeded(f"{self.name} exceeded its {self._latency_budget:.0f}s budget {reason}{detail}")
+
+    def _settle(self, error, started_at):
+        """Returns the slot and records the attempt's outcome."""
+        if error is None:
+            outcome = "ok"
+        elif is_overload(error):
+            outcome = "overload"
+        elif is_timeout(error):
+            outcome = "timeout"
+        elif is_retryable(error):
+            outcome = "unavailable"
+        else:
+            outcome = "error"
+        # 429 는 한도를 더 줄일 수 없을 때만 장애로 봅니다. 잘못된 요청(4xx)은 모델 장애가 아니므로 회로를 열지 않습니다.
+        throttled_at_minimum = outcome == "overload" and self.limiter.at_minimum
+        self.limiter.release(outcome, started_at)
+        if outcome in ("ok", "error"):
+            self.breaker.record_success()
+        elif outcome != "overload" or throttled_at_minimum:
+            self.breaker.record_failure()
+        GEMINI_CALLS.inc(model=self.name, outcome=outcome)
+        return outcome
+
+    def _retry_delay(self, outcome, attempt, deadline):
+        """Seconds to sleep before the next attempt, or None to give up."""
+        if outcome == "error" or attempt + 1 >= self._max_attempts:
+            return None
+        delay = self._backoff(attempt)
+        return delay if time.monotonic() + delay < deadline else None
+
+    def _give_up(self, error, deadline):
+        if is_timeout(error) or time.monotonic() >= deadline:
+            return self._budget_exceeded("after retries", error)
+        return error
+
+    def call(self, fn):
+        deadline = time.monotonic() + self._latency_budget
+        for attempt in range(self._max_attempts):
+            remaining = self._check(deadline)
+            if not self.limiter.acquire(remaining):
+                raise self._budget_exceeded("waiting for a concurrency slot")
+            error = None
+            started_at = time.monotonic()
+            try:
+                result = fn(min(self._attempt_timeout, deadline - time.monotonic()))
+            except Exception as e:
+                error = e
+            outcome = self._settle(error, started_at)
+            if error is None:
+                return result
+            delay = self._retry_delay(outcome, attempt, deadline)
+            if delay is None:
+                raise self._give_up(error, deadline) from error
+            logging.warning("%s call failed (%s), retrying in %.1fs: %s", self.name, outcome, delay, error)
+            time.sleep(delay)
+
+    async def call_async(self, fn):
+        """call() for a coroutine function fn(timeout)."""
+        import asyncio
+        deadline = time.monotonic() + self._latency_budget
+        for attempt in range(self._max_attempts):
+            remaining = self._check(deadline)
+            if not await self.limiter.acquire_async(remaining):
+                raise self._budget_exceeded("waiting for a concurrency slot")
+            error = None
+            started_at = time.monotonic()
+            try:
+                timeout = min(self._attempt_timeout, deadline - time.monotonic())
+                result = await asyncio.wait_for(fn(timeout), timeout)
+            except asyncio.CancelledError:
+                self.limiter.release()
+                raise
+            except Exception as e:
+                error = e
+            outcome = self._settle(error, started_at)
+            if error is None:
+                return result
+            delay = self._retry_delay(outcome, attempt, deadline)
+            if delay is None:
+                raise self._give_up(error, deadline) from error
+            logging.warning("%s call failed (%s), retrying in %.1fs: %s", self.name, outcome, delay, error)
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return {"circuit": self.breaker.state, "circuit_opened": self.breaker.opened, **self.limiter.stats()}
+
+
+class RetryQueue:
+    """Parks work that failed on a transient error and runs it again later.
+
+    Delays grow exponentially (with jitter) per attempt and are never shorter
+    than the caller's min_delay (e.g. the time until an open circuit
+    half-opens). Parked tasks are held in memory and lost on restart.
+    """
+
+    def __init__(self, base_delay=60.0, max_delay=3600.0, max_attempts=5, max_parked=10000, workers=2):
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._max_attempts = max_attempts
+        self._max_parked = max_parked
+        self._heap = []  # (due, seq, context, task)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retry-queue")
+        self._thread = None
+        self.parked = 0
+        self.dropped = 0
+
+    def park(self, task, attempt=0, min_delay=0.0):
+        """Schedules task() to run again; returns False when attempts or capacity are used up."""
+        if attempt >= self._max_attempts:
+            self.dropped += 1
+            return False
+        delay = min(self._max_delay, self._base_delay * (2 ** attempt))
+        delay = max(min_delay, random.uniform(delay / 2, delay))
+        with self._cond:
+            if len(self._heap) >= self._max_parked:
+                self.dropped += 1
+                return False
+            # 재시도도 원래 이벤트의 correlation_id 로 로그가 남도록 현재 context 를 함께 보관합니다.
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), contextvars.copy_context(), task))
+            self.parked += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="retry-queue", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, context, task = heapq.heappop(self._heap)
+            self._executor.submit(context.run, task)
+
+    def depth(self):
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self):
+        return {"depth": self.depth(), "max_parked": self._max_parked, "parked": self.parked, "dropped": self.dropped}
+
+
+def create_governor(model):
+    """Builds a CallGovernor for one Gemini model from GEMINI_* environment variables."""
+    max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", "64"))
+    limiter = AdaptiveLimiter(
+        initial=int(os.getenv("GEMINI_INITIAL_CONCURRENCY", str(max_concurrency))),
+        min_limit=int(os.getenv("GEMINI_MIN_CONCURRENCY", "1")),
+        max_limit=max_concurrency,
+    )
+    breaker = CircuitBreaker(
+        model,
+        failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30")),
+    )
+    return CallGovernor(
+        model,
+        limiter=limiter,
+        breaker=breaker,
+        attempt_timeout=float(os.getenv("GEMINI_ATTEMPT_TIMEOUT_SECONDS", "120")),
+        latency_budget=float(os.getenv("GEMINI_LATENCY_BUDGET_SECONDS", "300")),
+        max_attempts=int(os.getenv("GEMINI_MAX_ATTEMPTS", "4")),
+        backoff_base=float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "1")),
+        backoff_max=float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "30")),
+    )
+
+
+def create_retry_queue():
+    """Builds the RetryQueue for parked analyses from RETRY_QUEUE_* environment variables (workers from Settings)."""
+    return RetryQueue(
+        base_delay=float(os.getenv("RETRY_QUEUE_BASE_DELAY_SECONDS", "60")),
+        max_delay=float(os.getenv("RETRY_QUEUE_MAX_DELAY_SECONDS", "3600")),
+        max_attempts=int(os.getenv("RETRY_QUEUE_MAX_ATTEMPTS", "5")),
+        max_parked=int(os.getenv("RETRY_QUEUE_MAX_PARKED", "10000")),
+        workers=get_settings().retry_queue_workers,
+    )
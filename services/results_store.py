@@ -0,0 +1,326 @@
+import atexit
+import csv
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+COLUMNS = (
+    "id", "platform", "channel", "video_id", "video_uri", "published", "published_at", "analyzed_at",
+    "verdict", "tier", "model", "latency_ms", "prompt_tokens", "output_tokens", "thought_tokens", "total_tokens",
+)
+# 조회/정렬 기준으로 쓸 수 있는 시각 컬럼
+TIME_COLUMNS = {"published": "published_at", "analyzed": "analyzed_at"}
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_ROWS = 10000
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "platform TEXT NOT NULL, "
+    "channel TEXT, "
+    "video_id TEXT NOT NULL, "
+    "video_uri TEXT, "
+    "published TEXT, "          # 웹훅에 온 그대로의 업로드 시각
+    "published_at REAL, "       # 해석할 수 있으면 epoch 초, 아니면 NULL
+    "analyzed_at REAL NOT NULL, "
+    "verdict INTEGER NOT NULL, "  # 1 이면 광고 고지가 있음
+    "tier TEXT, "
+    "model TEXT, "
+    "latency_ms REAL, "
+    "prompt_tokens INTEGER, "
+    "output_tokens INTEGER, "
+    "thought_tokens INTEGER, "
+    "total_tokens INTEGER)",
+    "CREATE INDEX IF NOT EXISTS results_channel_published ON results (channel, published_at, id)",
+    "CREATE INDEX IF NOT EXISTS results_channel_analyzed ON results (channel, analyzed_at, id)",
+    "CREATE INDEX IF NOT EXISTS results_published ON results (published_at, id)",
+    "CREATE INDEX IF NOT EXISTS results_analyzed ON results (analyzed_at, id)",
+)
+
+
+def parse_time(value):
+    """Parses epoch seconds or an ISO 8601 date/time into epoch seconds; returns None when it can't."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    # Facebook 핸들러는 "2023-11-14 22:13:20 UTC" 형식으로 바꿔서 넘깁니다.
+    if value.endswith(" UTC"):
+        value = value[:-4]
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_bool(value):
+    if value is None or value == "" or isinstance(value, bool):
+        return value if isinstance(value, bool) else None
+    lowered = str(value).strip().lower()
+    if lowered in ("true", "1", "yes"):
+        return True
+    if lowered in ("false", "0", "no"):
+        return False
+    raise ValueError(f"Invalid boolean: {value!r}")
+
+
+def analysis_result(platform, video_id, video_uri, channel, published, verdict, tier, model, latency_seconds,
+                    usage=None, analyzed_at=None):
+    """Builds a results row (without id) from one analysis.
+
+    usage is the dict of services.metrics.track_token_usage(); token columns
+    stay NULL when the analysis made no Gemini call of its own (text tier,
+    verdict cache hit, or a batched request whose tokens are shared).
+    """
+    tokens = (None, None, None, None)
+    if usage and usage.get("calls"):
+        tokens = (usage["prompt"], usage["candidates"], usage["thoughts"], usage["total"])
+    return (platform, channel, video_id, video_uri, None if published is None else str(published),
+            parse_time(published), analyzed_at or time.time(), int(verdict == "True"), tier, model,
+            round(latency_seconds * 1000, 3)) + tokens
+
+
+class ResultsStore:
+    """SQLite store of analysis results with batched background writes.
+
+    record() only appends to an in-memory buffer; a writer thread inserts
+    the buffer every flush_interval seconds (or as soon as batch_size rows
+    are waiting) in a single transaction. Queries use their own connection,
+    so with WAL they don't wait for the writer. Rows recorded in the last
+    flush_interval seconds may not be visible yet.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0, max_pending=100000):
+        self._path = path
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._writer = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._writer.execute(statement)
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self._thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, row):
+        """Queues one analysis_result() row. Never blocks on SQLite."""
+        with self._cond:
+            if len(self._pending) >= self._max_pending:
+                self.dropped += 1
+                logging.warning("Results store buffer is full, dropping result for %s", row[2])
+                return False
+            self._pending.append(row)
+            if len(self._pending) >= self._batch_size:
+                self._cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self._batch_size:
+                    self._cond.wait(self._flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self):
+        """Writes every buffered row now. Returns the number of rows written."""
+        written = 0
+        with self._write_lock:
+            while True:
+                with self._cond:
+                    if not self._pending:
+                        return written
+                    count = min(len(self._pending), self._batch_size)
+                    batch = [self._pending.popleft() for _ in range(count)]
+                try:
+                    self._writer.execute("BEGIN")
+                    self._writer.executemany(
+                        f"INSERT INTO results ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * (len(COLUMNS) - 1))})",
+                        batch,
+                    )
+                    self._writer.execute("COMMIT")
+                except sqlite3.Error as e:
+                    if self._writer.in_transaction:
+                        self._writer.execute("ROLLBACK")
+                    self.write_errors += len(batch)
+                    logging.error("Failed to write %s analysis results: %s", len(batch), e)
+                    continue
+                self.written += len(batch)
+                self.batches += 1
+                written += len(batch)
+
+    def close(self):
+        """Stops the writer thread after flushing the buffer."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _where(self, channel=None, platform=None, video_id=None, verdict=None, since=None, until=None,
+               by="published"):
+        column = TIME_COLUMNS.get(by)
+        if column is None:
+            raise ValueError(f"Unknown time column: {by!r} (use {', '.join(TIME_COLUMNS)})")
+        clauses = [f"{column} IS NOT NULL"]
+        params = []
+        for name, value in (("channel", channel), ("platform", platform), ("video_id", video_id)):
+            if value:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        verdict = parse_bool(verdict)
+        if verdict is not None:
+            clauses.append("verdict = ?")
+            params.append(int(verdict))
+        for op, value in ((">=", since), ("<", until)):
+            if value is None or value == "":
+                continue
+            parsed = parse_time(value)
+            if parsed is None:
+                raise ValueError(f"Invalid time: {value!r}")
+            clauses.append(f"{column} {op} ?")
+            params.append(parsed)
+        return column, " AND ".join(clauses), params
+
+    @staticmethod
+    def _to_dict(row):
+        result = dict(zip(COLUMNS, row))
+        result["verdict"] = bool(result["verdict"])
+        return result
+
+    def query(self, cursor=None, limit=100, **filters):
+        """Returns (rows, next_cursor), newest first by the `by` time column ("published" or "analyzed").
+
+        Pages use keyset pagination: pass the returned next_cursor to get the
+        following page; it is None on the last page. Filters: channel,
+        platform, video_id, verdict, since, until (epoch seconds or ISO 8601).
+        With by="published", results whose published time could not be
+        parsed are left out.
+        """
+        column, where, params = self._where(**filters)
+        limit = max(1, min(int(limit or 100), MAX_PAGE_SIZE))
+        if cursor:
+            try:
+                cursor_time, _, cursor_id = cursor.partition("_")
+                params += [float(cursor_time), int(cursor_id)]
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor!r}") from None
+            where += f" AND ({column}, id) < (?, ?)"
+        sql = (f"SELECT {', '.join(COLUMNS)} FROM results WHERE {where} "
+               f"ORDER BY {column} DESC, id DESC LIMIT ?")
+        with self._read_lock:
+            rows = self._reader.execute(sql, params + [limit + 1]).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = f"{last[COLUMNS.index(column)]!r}_{last[0]}"
+        return [self._to_dict(row) for row in rows], next_cursor
+
+    def iter_rows(self, **filters):
+        """Yields lists of raw rows (COLUMNS order) matching filters, EXPORT_CHUNK_ROWS at a time."""
+        column, where, params = self._where(**filters)
+        # 내보내기는 오래 걸릴 수 있으므로 조회용 연결을 붙잡지 않도록 따로 엽니다.
+        conn = sqlite3.connect(self._path)
+        try:
+            cur = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM results WHERE {where} ORDER BY {column}, id", params)
+            while True:
+                chunk = cur.fetchmany(EXPORT_CHUNK_ROWS)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            conn.close()
+
+    def export(self, path, fmt=None, **filters):
+        """Writes matching results to a CSV or Parquet file; fmt defaults to the file extension.
+
+        Parquet needs the optional 'pyarrow' package. Returns the row count.
+        """
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".") or "csv").lower()
+        if fmt == "csv":
+            return self._export_csv(path, filters)
+        if fmt == "parquet":
+            return self._export_parquet(path, filters)
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    def _export_csv(self, path, filters):
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for chunk in self.iter_rows(**filters):
+                writer.writerows(chunk)
+                count += len(chunk)
+        return count
+
+    def _export_parquet(self, path, filters):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the 'pyarrow' package.") from None
+        types = {"id": pa.int64(), "published_at": pa.float64(), "analyzed_at": pa.float64(), "verdict": pa.bool_(),
+                 "latency_ms": pa.float64(), "prompt_tokens": pa.int64(), "output_tokens": pa.int64(),
+                 "thought_tokens": pa.int64(), "total_tokens": pa.int64()}
+        schema = pa.schema([(name, types.get(name, pa.string())) for name in COLUMNS])
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in self.iter_rows(**filters):
+                columns = list(zip(*chunk))
+                columns[COLUMNS.index("verdict")] = [bool(v) for v in columns[COLUMNS.index("verdict")]]
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+                count += len(chunk)
+        return count
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+        }
+
+
+def create_results_store():
+    """Builds a ResultsStore from RESULTS_* environment variables; RESULTS_DB_PATH="" disables it."""
+    path = os.getenv("RESULTS_DB_PATH", "/tmp/webhook_results.sqlite3")
+    if not path:
+        return None
+    return ResultsStore(
+        path,
+        batch_size=int(os.getenv("RESULTS_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("RESULTS_FLUSH_INTERVAL_SECONDS", "1.0")),
+        max_pending=int(os.getenv("RESULTS_MAX_PENDING", "100000")),
+    )
@@ -0,0 +1,89 @@
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# 요청 경로에서 쓰는 설정. 프로세스 시작 시 한 번 읽고 바꾸지 않습니다.
+# 동시 실행 수처럼 커넥션 풀 크기를 정하는 데도 쓰이는 값은 여기에만 두고 create_*() 함수가 읽습니다.
+# (작업 큐, 캐시 등 각 구성 요소의 그 밖의 세부 설정은 해당 create_*() 함수가 생성 시 한 번 읽습니다.)
+Settings = namedtuple("Settings", [
+    "facebook_verify_token",
+    "admin_api_token",          # ?stats, ?metrics, ?results 에 필요한 Bearer 토큰 (없으면 비활성화)
+    "gcp_project",
+    "gemini_base_url",
+    "slack_webhook_url",
+    "slack_http_pool_size",     # 동기 경로에서 동시에 나갈 수 있는 Slack 요청 수
+    "slack_async_http_pool_size",   # 비동기 Slack 클라이언트(main_async.py) 커넥션 풀 크기
+    "gemini_http_pool_size",    # 동기 경로에서 동시에 나갈 수 있는 Gemini 호출 수
+    "gemini_async_http_pool_size",  # 비동기 클라이언트(main_async.py) 커넥션 풀 크기
+    "job_queue_workers",
+    "fanout_concurrency",
+    "retry_queue_workers",
+    "analysis_batch_size",      # 1 이면 배치 비활성화
+    "analysis_batch_concurrency",
+    "analysis_tiers",
+    "gemini_pro_fallback",
+    "async_max_pending",
+    "async_gemini_concurrency",
+    "async_slack_concurrency",
+    "warmup",                   # "off", "background" 또는 "eager"
+])
+
+WARMUP_MODES = ("off", "background", "eager")
+
+
+def notify_concurrency(job_queue_workers, fanout_concurrency, retry_queue_workers):
+    """Most threads of the sync entry point that can analyze a video and notify Slack at once.
+
+    Job workers, fan-out threads and retry-queue workers all run
+    analyze_and_notify(); a smaller connection pool would make them wait
+    for (or discard) connections.
+    """
+    return job_queue_workers + fanout_concurrency + retry_queue_workers
+
+
+def load_settings(environ=os.environ):
+    """Builds Settings from an environment mapping."""
+    warmup = environ.get("WARMUP", "off").lower()
+    if warmup not in WARMUP_MODES:
+        raise ValueError(f"Invalid WARMUP: {warmup!r} (use {', '.join(WARMUP_MODES)})")
+    job_queue_workers = int(environ.get("JOB_QUEUE_WORKERS", "4"))
+    fanout_concurrency = int(environ.get("FANOUT_CONCURRENCY", "8"))
+    retry_queue_workers = int(environ.get("RETRY_QUEUE_WORKERS", "2"))
+    analysis_batch_size = int(environ.get("ANALYSIS_BATCH_SIZE", "1"))
+    analysis_batch_concurrency = int(environ.get("ANALYSIS_BATCH_CONCURRENCY", "2"))
+    async_gemini_concurrency = int(environ.get("ASYNC_GEMINI_CONCURRENCY", "64"))
+    async_slack_concurrency = int(environ.get("ASYNC_SLACK_CONCURRENCY", "10"))
+    notifiers = notify_concurrency(job_queue_workers, fanout_concurrency, retry_queue_workers)
+    # 배치를 쓰면 배치 요청도 Gemini 를 호출합니다 (Slack 은 보내지 않음).
+    gemini_callers = notifiers + (analysis_batch_concurrency if analysis_batch_size > 1 else 0)
+    return Settings(
+        facebook_verify_token=environ.get("FACEBOOK_VERIFY_TOKEN"),
+        admin_api_token=environ.get("ADMIN_API_TOKEN") or None,
+        gcp_project=environ.get("GCP_PROJECT"),
+        gemini_base_url=environ.get("GEMINI_BASE_URL") or None,
+        slack_webhook_url=environ.get("SLACK_WEBHOOK_URL"),
+        slack_http_pool_size=int(environ.get("SLACK_HTTP_POOL_SIZE") or notifiers),
+        slack_async_http_pool_size=int(environ.get("SLACK_HTTP_POOL_SIZE") or async_slack_concurrency),
+        gemini_http_pool_size=int(environ.get("GEMINI_HTTP_POOL_SIZE") or gemini_callers),
+        gemini_async_http_pool_size=int(environ.get("GEMINI_HTTP_POOL_SIZE") or async_gemini_concurrency),
+        job_queue_workers=job_queue_workers,
+        fanout_concurrency=fanout_concurrency,
+        retry_queue_workers=retry_queue_workers,
+        analysis_batch_size=analysis_batch_size,
+        analysis_batch_concurrency=analysis_batch_concurrency,
+        analysis_tiers=environ.get("ANALYSIS_TIERS", "text,pro"),
+        gemini_pro_fallback=environ.get("GEMINI_PRO_FALLBACK", "true").lower() == "true",
+        async_max_pending=int(environ.get("ASYNC_MAX_PENDING", "10000")),
+        async_gemini_concurrency=async_gemini_concurrency,
+        async_slack_concurrency=async_slack_concurrency,
+        warmup=warmup,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_settings():
+    """Loads .env once and returns the process-wide Settings."""
+    load_dotenv()
+    return load_settings()
@@ -0,0 +1,197 @@
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def parse_secrets(value):
+    """Splits a comma separated list of secrets, ignoring blanks."""
+    return [secret.strip() for secret in (value or "").split(",") if secret.strip()]
+
+
+class HmacVerifier:
+    """HMAC check over raw request bytes for one or more active secrets.
+
+    The keyed HMAC object for each secret is built once and copied per call,
+    so the key schedule is not redone per request. Message parts are fed
+    with incremental update() calls, so the body is never decoded, joined
+    or copied. For rotation, list the new secret and keep the old one until
+    senders have switched; the secret that matched last is tried first.
+    """
+
+    def __init__(self, secrets, digestmod=hashlib.sha256):
+        if isinstance(secrets, (str, bytes)):
+            secrets = [secrets]
+        self._keyed = [
+            hmac.new(secret.encode("utf-8") if isinstance(secret, str) else secret, digestmod=digestmod)
+            for secret in secrets if secret
+        ]
+        self._last_match = 0
+
+    def __bool__(self):
+        return bool(self._keyed)
+
+    def verify(self, signature_hex, *parts):
+        """True if signature_hex matches the HMAC of parts under any active secret."""
+        try:
+            signature = bytes.fromhex(signature_hex)
+        except (TypeError, ValueError):
+            return False
+        # 마지막으로 일치한 시크릿부터 시도해서 교체 기간에도 보통 HMAC 한 번으로 끝납니다.
+        keyed = self._keyed
+        first = self._last_match
+        for i in range(len(keyed)):
+            index = (first + i) % len(keyed)
+            mac = keyed[index].copy()
+            for part in parts:
+                mac.update(part)
+            if hmac.compare_digest(signature, mac.digest()):
+                self._last_match = index
+                return True
+        return False
+
+
+class ReplayCache:
+    """Bounded set of recently accepted signatures.
+
+    Entries expire after ttl_seconds, which must cover the whole timestamp
+    window (2 x tolerance for a +/- tolerance window, since a sender whose
+    clock runs ahead produces signatures that stay valid that long; anything
+    older is rejected by the window check anyway); beyond max_entries the
+    oldest entry is dropped. Lookups are a dict probe, so a replayed request
+    is rejected before its body is hashed.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=100_000, clock=time.monotonic):
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._max_entries = max_entries
+        self._seen = OrderedDict()  # signature -> expires_at (monotonic)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _evict(self, now):
+        seen = self._seen
+        while seen and (len(seen) > self._max_entries or next(iter(seen.values())) <= now):
+            seen.popitem(last=False)
+
+    def seen(self, signature):
+        with self._lock:
+            expires_at = self._seen.get(signature)
+            if expires_at is not None and expires_at > self._clock():
+                self.rejected += 1
+                return True
+            return False
+
+    def add(self, signature):
+        """Records signature. Returns False if it was already recorded (a concurrent replay)."""
+        now = self._clock()
+        with self._lock:
+            expires_at = self._seen.get(signature)
+            if expires_at is not None and expires_at > now:
+                self.rejected += 1
+                return False
+            self._seen[signature] = now + self._ttl
+            self._seen.move_to_end(signature)
+            self._evict(now)
+            return True
+
+    def discard(self, signature):
+        """Forgets signature so a retry of a request we could not accept is not taken for a replay."""
+        with self._lock:
+            self._seen.pop(signature, None)
+
+    def stats(self):
+        return {"entries": len(self._seen), "rejected": self.rejected}
+
+
+def parse_signature_header(value):
+    """Splits `t=<ts>,s=<sig>` into (timestamp, signature); missing parts are None."""
+    timestamp = signature = None
+    for part in value.split(','):
+        key, _, item = part.strip().partition('=')
+        if key == 't':
+            timestamp = item
+        elif key == 's':
+            signature = item
+    return timestamp, signature
+
+
+class TikTokSignatureVerifier:
+    """Verifies `TikTok-Signature: t=<unix ts>,s=<hex sha256>` over `<t>.<raw body>`.
+
+    Checks run cheapest first: header format, timestamp window, replay cache,
+    and only then the HMAC over the body. The window is measured against the
+    time of receipt, so callers that queue requests verify them before
+    queueing (see PlatformHandler.verify_on_receive).
+    """
+
+    def __init__(self, secrets, tolerance_seconds=300, replay_cache=None, clock=time.time):
+        self.hmac = HmacVerifier(secrets)
+        self.tolerance_seconds = tolerance_seconds
+        self.replay_cache = replay_cache
+        self._clock = clock
+
+    def verify(self, headers, body):
+        signature_header = headers.get('TikTok-Signature')
+        if not signature_header:
+            logging.warning("TikTok-Signature header missing.")
+            return False
+        if not self.hmac:
+            logging.error("TikTok client secret is not configured.")
+            return False
+
+        timestamp, signature = parse_signature_header(signature_header)
+        if not timestamp or not signature:
+            logging.warning("TikTok-Signature header malformed (missing t or s).")
+            return False
+
+        if self.tolerance_seconds:
+            try:
+                skew = abs(self._clock() - int(timestamp))
+            except ValueError:
+                logging.warning("TikTok-Signature timestamp is not an integer.")
+                return False
+            if skew > self.tolerance_seconds:
+                logging.warning("TikTok-Signature timestamp outside the %ss window, potential replay attack.",
+                                self.tolerance_seconds)
+                return False
+
+        if self.replay_cache is not None and self.replay_cache.seen(signature):
+            logging.warning("TikTok signature already used, replay rejected.")
+            return False
+
+        if not self.hmac.verify(signature, f"{timestamp}.".encode('utf-8'), body):
+            logging.warning("TikTok signature mismatch.")
+            return False
+
+        if self.replay_cache is not None and not self.replay_cache.add(signature):
+            logging.warning("TikTok signature already used, replay rejected.")
+            return False
+        return True
+
+    def forget(self, headers):
+        """Removes the request's signature from the replay cache (the request was verified but not accepted)."""
+        _, signature = parse_signature_header(headers.get('TikTok-Signature') or '')
+        if self.replay_cache is not None and signature:
+            self.replay_cache.discard(signature)
+
+
+def create_tiktok_verifier():
+    """Builds the TikTok verifier from TIKTOK_CLIENT_SECRETS (or TIKTOK_CLIENT_SECRET)."""
+    secrets = parse_secrets(os.getenv("TIKTOK_CLIENT_SECRETS")) or [os.getenv("TIKTOK_CLIENT_SECRET")]
+    tolerance = int(os.getenv("TIKTOK_SIGNATURE_TOLERANCE_SECONDS", "300"))
+    replay_size = int(os.getenv("TIKTOK_REPLAY_CACHE_SIZE", "100000"))
+    # 윈도가 ±tolerance 이므로 송신 측 시계가 앞서 있으면 서명이 최대 2×tolerance 동안 유효합니다.
+    ttl = 2 * tolerance if tolerance else 86400
+    replay_cache = ReplayCache(ttl_seconds=ttl, max_entries=replay_size) if replay_size > 0 else None
+    return TikTokSignatureVerifier(secrets, tolerance_seconds=tolerance, replay_cache=replay_cache)
+
+
+def create_youtube_verifier():
+    """Builds the X-Hub-Signature (HMAC-SHA1) verifier from YOUTUBE_HUB_SECRETS (or YOUTUBE_HUB_SECRET)."""
+    secrets = parse_secrets(os.getenv("YOUTUBE_HUB_SECRETS")) or [os.getenv("YOUTUBE_HUB_SECRET")]
+    return HmacVerifier(secrets, digestmod=hashlib.sha1)
@@ -1,10 +1,17 @@
+import asyncio
 import os
+import json
+import random
+import httpx
 import requests
 import logging
 import ssl
-from dotenv import load_dotenv
+import threading
+import time
 from requests.adapters import HTTPAdapter
 
+from services.settings import get_settings
+
 # This is a workaround for old SSL versions like LibreSSL on macOS
 class TLSv12Adapter(HTTPAdapter):
     def init_poolmanager(self, connections, maxsize, block=False):
@@ -15,30 +22,332 @@ class TLSv12Adapter(HTTPAdapter):
             ssl_version=ssl.PROTOCOL_TLSv1_2
         )
 
-logging.basicConfig(level=logging.INFO)
-load_dotenv()
+# Slack 블록 하나의 최대 텍스트 길이와 메시지 하나의 최대 블록 수
+MAX_SECTION_TEXT = 3000
+MAX_DIGEST_MESSAGES = 24
+
+
+def create_session(pool_size=10):
+    """Creates the pooled session shared by every Slack request."""
+    session = requests.Session()
+    session.mount('https://', TLSv12Adapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    # 로컬 대체 서버(http)도 같은 크기의 풀을 씁니다.
+    session.mount('http://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    return session
+
+
+SESSION = create_session(get_settings().slack_http_pool_size)
+
+
+class TokenBucket:
+    """Blocks callers so that at most `rate` requests per second (burst `capacity`) go out."""
+
+    def __init__(self, rate=1.0, capacity=1):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token and returns 0, or returns how long to wait for one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if now >= self._paused_until and self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return max(self._paused_until - now, (1 - self._tokens) / self._rate)
+
+    def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Holds every caller back for `seconds` (used for Slack's Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+def build_digest_payload(messages):
+    """Coalesces several notification texts into one Block Kit message."""
+    blocks = [{
+        "type": "header",
+        "text": {"type": "plain_text", "text": f"영상 분석 결과 {len(messages)}건"},
+    }]
+    for message in messages:
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": message[:MAX_SECTION_TEXT]}})
+        blocks.append({"type": "divider"})
+    return {"text": "\n\n".join(messages)[:MAX_SECTION_TEXT], "blocks": blocks}
+
+
+_dead_letter_lock = threading.Lock()
+
+
+def write_dead_letter(path, payload, error):
+    """Appends an undeliverable payload to the dead-letter JSONL file."""
+    if not path:
+        return
+    record = json.dumps({"time": time.time(), "error": error, "payload": payload}, ensure_ascii=False)
+    try:
+        with _dead_letter_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(record + "\n")
+    except OSError as e:
+        logging.error("Could not write Slack dead letter: %s", e)
+
+
+class SlackDispatcher:
+    """Delivers notifications to one Slack webhook.
+
+    Requests are paced by a token bucket, 429 responses honour Retry-After,
+    other failures are retried with jittered exponential backoff, and messages
+    that still cannot be delivered are appended to the dead-letter file. With
+    digest_window > 0, messages are buffered and sent as one Block Kit message
+    per window (or every digest_max messages).
+    """
+
+    def __init__(self, webhook_url, session=SESSION, rate=1.0, burst=1, max_attempts=5,
+                 backoff_base=1.0, backoff_max=30.0, digest_window=0.0, digest_max=10,
+                 dead_letter_path=None):
+        self._webhook_url = webhook_url
+        self._session = session
+        self._bucket = TokenBucket(rate, burst)
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._digest_window = digest_window
+        self._digest_max = min(digest_max, MAX_DIGEST_MESSAGES)
+        self._dead_letter_path = dead_letter_path
+        self._digest = []
+        self._digest_cond = threading.Condition()
+        self._digest_thread = None
+
+    def send(self, message):
+        """Sends (or, in digest mode, buffers) one message. Returns False if it was dead-lettered."""
+        if self._digest_window <= 0:
+            return self._deliver({"text": message}, [message])
+        with self._digest_cond:
+            if self._digest_thread is None:
+                self._digest_thread = threading.Thread(target=self._digest_loop, name="slack-digest", daemon=True)
+                self._digest_thread.start()
+            self._digest.append(message)
+            self._digest_cond.notify()
+        return True
+
+    def flush(self):
+        """Sends buffered digest messages immediately."""
+        with self._digest_cond:
+            messages, self._digest = self._digest, []
+        for i in range(0, len(messages), self._digest_max):
+            chunk = messages[i:i + self._digest_max]
+            self._deliver(build_digest_payload(chunk), chunk)
+
+    def _digest_loop(self):
+        while True:
+            with self._digest_cond:
+                while not self._digest:
+                    self._digest_cond.wait()
+                deadline = time.monotonic() + self._digest_window
+                while len(self._digest) < self._digest_max and time.monotonic() < deadline:
+                    self._digest_cond.wait(deadline - time.monotonic())
+            self.flush()
+
+    def _backoff(self, attempt):
+        delay = min(self._backoff_max, self._backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def _deliver(self, payload, messages):
+        error = None
+        for attempt in range(self._max_attempts):
+            self._bucket.acquire()
+            try:
+                response = self._session.post(self._webhook_url, json=payload, timeout=10)
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+                logging.warning("Slack notification attempt %s failed: %s", attempt + 1, e)
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 429:
+                retry_after = float(response.headers.get('Retry-After', 1))
+                error = "429 Too Many Requests"
+                logging.warning("Slack rate limited, retrying after %ss.", retry_after)
+                self._bucket.pause(retry_after + random.uniform(0, 0.5))
+                continue
+            if response.status_code >= 500:
+                error = f"{response.status_code} {response.reason}"
+                logging.warning("Slack notification attempt %s failed: %s", attempt + 1, error)
+                time.sleep(self._backoff(attempt))
+                continue
+            if response.status_code >= 400:
+                # 4xx (429 제외) 는 재시도해도 성공하지 않습니다.
+                error = f"{response.status_code} {response.reason}: {response.text[:200]}"
+                break
+            logging.info("Slack notification sent successfully (%s message(s)).", len(messages))
+            return True
+
+        logging.error("Error sending Slack notification, giving up: %s", error)
+        self._dead_letter(payload, error)
+        return False
+
+    def _dead_letter(self, payload, error):
+        write_dead_letter(self._dead_letter_path, payload, error)
+
+
+class AsyncSlackDispatcher:
+    """SlackDispatcher for the asyncio entry point.
+
+    Same pacing, Retry-After handling, backoff, dead-lettering and digest
+    behaviour, but every wait is an asyncio sleep and requests go through a
+    shared httpx.AsyncClient, so pending notifications cost no threads.
+    """
+
+    def __init__(self, webhook_url, client=None, rate=1.0, burst=1, max_attempts=5,
+                 backoff_base=1.0, backoff_max=30.0, digest_window=0.0, digest_max=10,
+                 dead_letter_path=None, pool_size=10):
+        self._webhook_url = webhook_url
+        self._client = client or httpx.AsyncClient(
+            timeout=10, limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+        self._bucket = TokenBucket(rate, burst)
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._digest_window = digest_window
+        self._digest_max = min(digest_max, MAX_DIGEST_MESSAGES)
+        self._dead_letter_path = dead_letter_path
+        self._digest = []
+        self._digest_task = None
+
+    async def send(self, message):
+        """Sends (or, in digest mode, buffers) one message. Returns False if it was dead-lettered."""
+        if self._digest_window <= 0:
+            return await self._deliver({"text": message}, [message])
+        self._digest.append(message)
+        if len(self._digest) >= self._digest_max:
+            await self.flush()
+        elif self._digest_task is None:
+            self._digest_task = asyncio.get_running_loop().create_task(self._flush_later())
+        return True
+
+    async def flush(self):
+        """Sends buffered digest messages immediately."""
+        messages, self._digest = self._digest, []
+        for i in range(0, len(messages), self._digest_max):
+            chunk = messages[i:i + self._digest_max]
+            await self._deliver(build_digest_payload(chunk), chunk)
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self._digest_window)
+        finally:
+            self._digest_task = None
+        await self.flush()
+
+    def _backoff(self, attempt):
+        delay = min(self._backoff_max, self._backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    async def _deliver(self, payload, messages):
+        error = None
+        for attempt in range(self._max_attempts):
+            await self._bucket.acquire_async()
+            try:
+                response = await self._client.post(self._webhook_url, json=payload)
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+                logging.warning("Slack notification attempt %s failed: %s", attempt + 1, error)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code == 429:
+                retry_after = float(response.headers.get('Retry-After', 1))
+                error = "429 Too Many Requests"
+                logging.warning("Slack rate limited, retrying after %ss.", retry_after)
+                self._bucket.pause(retry_after + random.uniform(0, 0.5))
+                continue
+            if response.status_code >= 500:
+                error = f"{response.status_code} {response.reason_phrase}"
+                logging.warning("Slack notification attempt %s failed: %s", attempt + 1, error)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if response.status_code >= 400:
+                # 4xx (429 제외) 는 재시도해도 성공하지 않습니다.
+                error = f"{response.status_code} {response.reason_phrase}: {response.text[:200]}"
+                break
+            logging.info("Slack notification sent successfully (%s message(s)).", len(messages))
+            return True
+
+        logging.error("Error sending Slack notification, giving up: %s", error)
+        write_dead_letter(self._dead_letter_path, payload, error)
+        return False
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def _dispatcher_options():
+    return dict(
+        rate=float(os.getenv('SLACK_RATE_PER_SECOND', '1')),
+        burst=int(os.getenv('SLACK_BURST', '1')),
+        max_attempts=int(os.getenv('SLACK_MAX_ATTEMPTS', '5')),
+        digest_window=float(os.getenv('SLACK_DIGEST_WINDOW_SECONDS', '0')),
+        digest_max=int(os.getenv('SLACK_DIGEST_MAX_MESSAGES', '10')),
+        dead_letter_path=os.getenv('SLACK_DEAD_LETTER_PATH', '/tmp/slack_dead_letter.jsonl'),
+    )
+
+
+def get_dispatcher(webhook_url):
+    """Returns the shared dispatcher for webhook_url, configured from SLACK_* variables."""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(webhook_url)
+        if dispatcher is None:
+            dispatcher = SlackDispatcher(webhook_url, **_dispatcher_options())
+            _dispatchers[webhook_url] = dispatcher
+        return dispatcher
+
+
+_async_dispatchers = {}
+
+
+def get_async_dispatcher(webhook_url):
+    """Returns the shared AsyncSlackDispatcher for webhook_url (create it inside the running event loop)."""
+    dispatcher = _async_dispatchers.get(webhook_url)
+    if dispatcher is None:
+        dispatcher = AsyncSlackDispatcher(
+            webhook_url, pool_size=get_settings().slack_async_http_pool_size, **_dispatcher_options())
+        _async_dispatchers[webhook_url] = dispatcher
+    return dispatcher
+
 
 def send_slack_notification(message: str):
-    webhook_url = os.getenv('SLACK_WEBHOOK_URL')
-    logging.info(f"OpenSSL version: {ssl.OPENSSL_VERSION}")
-    logging.info(f"Slack webhook URL: {webhook_url}")
+    webhook_url = get_settings().slack_webhook_url
     if not webhook_url:
         logging.warning("Slack webhook URL not set. Cannot send notification.")
         return
+    get_dispatcher(webhook_url).send(message)
 
-    try:
-        payload = {"text": message}
-        
-        # Use a session with the custom adapter
-        session = requests.Session()
-        session.mount('https://', TLSv12Adapter())
-        
-        response = session.post(webhook_url, json=payload)
-        response.raise_for_status()  # HTTP 오류가 있을 경우 예외 발생
-        logging.info("Slack notification sent successfully.")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error sending Slack notification: {e}")
+
+async def send_slack_notification_async(message: str):
+    webhook_url = get_settings().slack_webhook_url
+    if not webhook_url:
+        logging.warning("Slack webhook URL not set. Cannot send notification.")
+        return
+    await get_async_dispatcher(webhook_url).send(message)
 
 if __name__ == '__main__':
     # For this test to work, you need to have a valid SLACK_WEBHOOK_URL in your .env file
-    send_slack_notification("Hello from the Slack service!")
\ No newline at end of file
+    send_slack_notification("Hello from the Slack service!")
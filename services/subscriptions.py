@@ -0,0 +1,489 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import parse_qs, urlparse
+
+from services.metrics import SUBSCRIPTION_REQUESTS
+from services.signatures import parse_secrets
+
+HUB_URL = "https://pubsubhubbub.appspot.com/subscribe"
+TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+# 요청을 보내는 인스턴스가 구독을 잡아 두는 시간. 그 안에 결과를 기록하지 못하면 (프로세스 종료) 다른 인스턴스가 다시 보냅니다.
+CLAIM_SECONDS = 300.0
+# 허브 기본 lease (5일). 허브는 요청한 값보다 짧게 줄 수 있으므로 만료 시각은 확인 요청의 hub.lease_seconds 로 정합니다.
+DEFAULT_LEASE_SECONDS = 432000
+
+# pending: 구독 요청 전/확인 대기, active: 허브가 확인한 lease 가 있음, unsubscribing: 구독 해지 중
+Subscription = namedtuple("Subscription", [
+    "topic", "channel_id", "state", "expires_at", "renew_at", "requested_at", "verified_at", "attempts", "last_error",
+])
+
+
+def topic_url(channel_id):
+    return TOPIC_URL.format(channel_id=channel_id)
+
+
+def channel_id_from_topic(topic):
+    """Returns the channel_id of a YouTube feed topic URL, or None."""
+    values = parse_qs(urlparse(topic or "").query).get("channel_id")
+    return values[0] if values else None
+
+
+class SubscriptionStore:
+    """SQLite table of YouTube feed subscriptions keyed by topic URL.
+
+    Every row keeps its next request time (renew_at), so the scheduler
+    rebuilds its priority queue from one scan on startup instead of polling
+    the table for due rows. Instances sharing the file take a due row with
+    claim() before sending its request, so only one of them sends it.
+    """
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS subscriptions ("
+            "topic TEXT PRIMARY KEY, "
+            "channel_id TEXT NOT NULL, "
+            "state TEXT NOT NULL, "
+            "expires_at REAL, "
+            "renew_at REAL NOT NULL, "
+            "requested_at REAL, "
+            "verified_at REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, topic):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(Subscription._fields)} FROM subscriptions WHERE topic = ?", (topic,)
+            ).fetchone()
+        return Subscription(*row) if row else None
+
+    def states(self):
+        """Returns {channel_id: state} for every subscription."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT channel_id, state FROM subscriptions"))
+
+    def schedule(self):
+        """Returns [(renew_at, topic)] for every subscription."""
+        with self._lock:
+            return self._conn.execute("SELECT renew_at, topic FROM subscriptions").fetchall()
+
+    def upsert(self, channel_ids, state, renew_at, spread=0.0):
+        """Creates or moves subscriptions to `state`, due at renew_at plus up to `spread` seconds; returns their topics."""
+        rows = [(topic_url(channel_id), channel_id, state, renew_at + random.uniform(0, spread) if spread else renew_at)
+                for channel_id in channel_ids]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO subscriptions (topic, channel_id, state, renew_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (topic) DO UPDATE SET state = excluded.state, renew_at = excluded.renew_at, attempts = 0",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        return [row[0] for row in rows]
+
+    def update(self, topic, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE subscriptions SET {assignments} WHERE topic = ?", (*fields.values(), topic))
+
+    def claim(self, topic, now, until):
+        """Moves a due subscription's renew_at to `until` and returns it; None if it is not due (or gone).
+
+        The check and the update are one statement, so when several instances
+        share the store only one of them gets a given renewal.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE subscriptions SET renew_at = ? WHERE topic = ? AND renew_at <= ? "
+                f"RETURNING {', '.join(Subscription._fields)}",
+                (until, topic, now),
+            ).fetchone()
+        return Subscription(*row) if row else None
+
+    def update_claimed(self, topic, claimed_until, **fields):
+        """Like update(), but only while the row still holds our claim; returns False if it was updated since."""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            cur = self._conn.execute(f"UPDATE subscriptions SET {assignments} WHERE topic = ? AND renew_at = ?",
+                                     (*fields.values(), topic, claimed_until))
+        return cur.rowcount > 0
+
+    def delete(self, topic):
+        with self._lock:
+            self._conn.execute("DELETE FROM subscriptions WHERE topic = ?", (topic,))
+
+    def iter_subscriptions(self, state=None):
+        sql = f"SELECT {', '.join(Subscription._fields)} FROM subscriptions"
+        with self._lock:
+            rows = (self._conn.execute(sql + " WHERE state = ? ORDER BY renew_at", (state,)) if state
+                    else self._conn.execute(sql + " ORDER BY renew_at")).fetchall()
+        return map(Subscription._make, rows)
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM subscriptions GROUP BY state"))
+
+
+class SubscriptionManager:
+    """Keeps YouTube PubSubHubbub subscriptions alive.
+
+    Subscriptions wait in a heap ordered by their next request time. One
+    scheduler thread sleeps until the earliest one is due and hands it to a
+    pool of `concurrency` workers, so tens of thousands of channels cost
+    one wake-up per request rather than a periodic scan. Renewals are
+    scheduled renew_before seconds (plus random jitter) ahead of the lease
+    expiry the hub reported in its verification request. A request the hub
+    accepted but never verified is sent again after verify_timeout, and
+    failed requests back off exponentially up to retry_max.
+
+    verify_intent() answers the hub's verification GETs: only known topics
+    may be subscribed, and only topics we are leaving may be unsubscribed.
+
+    Several instances may share one store, each with its own heap. A due
+    topic is claimed in the store before its request is sent; if the row is
+    no longer due (another instance sent it, or the hub's verification was
+    answered elsewhere and moved the renewal out), the topic is rescheduled
+    from the store instead.
+
+    A configured channel list (`channels`) is authoritative: on startup it
+    is synced into the store, with the resulting requests spread over
+    sync_spread seconds so that a new store does not send one request per
+    channel at once, and add()/remove() are refused.
+    """
+
+    def __init__(self, store, callback_url, hub_url=HUB_URL, secret=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 renew_before=86400.0, jitter=3600.0, concurrency=8, verify_timeout=3600.0, retry_base=60.0,
+                 retry_max=21600.0, request_timeout=10.0, channels=None, sync_spread=3600.0, scheduler=True,
+                 http=None):
+        self.store = store
+        self._callback_url = callback_url
+        self._hub_url = hub_url
+        self._secret = secret
+        self._lease_seconds = lease_seconds
+        self._renew_before = renew_before
+        self._jitter = jitter
+        self._verify_timeout = verify_timeout
+        self._retry_base = retry_base
+        self._retry_max = retry_max
+        self._request_timeout = request_timeout
+        self._channels = channels
+        self._sync_spread = sync_spread
+        self._scheduler = scheduler
+        self._http = http
+        self._heap = []  # (renew_at, seq, topic); 예약이 바뀐 항목은 _due 와 비교해서 건너뜁니다.
+        self._due = {}   # topic -> 현재 유효한 renew_at
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="youtube-subscriptions")
+        self._ready = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.failed = 0
+        self.verified = 0
+        self.rejected = 0
+
+    # 예약 ------------------------------------------------------------------
+
+    def _schedule(self, topic, renew_at):
+        with self._cond:
+            self._due[topic] = renew_at
+            heapq.heappush(self._heap, (renew_at, next(self._seq), topic))
+            # 예약이 자주 바뀌어 오래된 항목이 쌓이면 힙을 다시 만듭니다.
+            if len(self._heap) > 2 * len(self._due) + 1024:
+                self._heap = [(due, next(self._seq), t) for t, due in self._due.items()]
+                heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def _unschedule(self, topic):
+        with self._cond:
+            self._due.pop(topic, None)
+
+    def _pop_due(self, now, block):
+        """Pops the next due topic; waits for one when block, else returns None if nothing is due."""
+        with self._cond:
+            while True:
+                while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+                if self._heap and self._heap[0][0] <= now():
+                    renew_at, _, topic = heapq.heappop(self._heap)
+                    del self._due[topic]
+                    return topic
+                if not block:
+                    return None
+                self._cond.wait(self._heap[0][0] - now() if self._heap else None)
+
+    def _lease_renew_at(self, now, lease_seconds):
+        lead = min(self._renew_before, lease_seconds / 2)
+        jitter = random.uniform(0, min(self._jitter, lease_seconds / 4))
+        return now + max(lease_seconds - lead - jitter, 1.0)
+
+    def _load(self):
+        """Syncs the configured channel list into the store and fills the heap from it."""
+        if self._channels is not None:
+            configured = set(self._channels)
+            states = self.store.states()
+            added = [channel for channel in configured if states.get(channel) in (None, "unsubscribing")]
+            removed = [channel for channel, state in states.items()
+                       if channel not in configured and state != "unsubscribing"]
+            now = time.time()
+            if added:
+                self.store.upsert(added, "pending", now, self._sync_spread)
+            if removed:
+                self.store.upsert(removed, "unsubscribing", now, self._sync_spread)
+            if added or removed:
+                logging.info("YouTube subscriptions synced: %s added, %s removed", len(added), len(removed))
+        rows = self.store.schedule()
+        with self._cond:
+            for renew_at, topic in rows:
+                if topic not in self._due:
+                    self._due[topic] = renew_at
+                    self._heap.append((renew_at, next(self._seq), topic))
+            heapq.heapify(self._heap)
+            self._cond.notify()
+        self._ready.set()
+        logging.info("YouTube subscription scheduler loaded %s subscriptions", len(rows))
+
+    # 허브 요청 ---------------------------------------------------------------
+
+    def _client(self):
+        if self._http is None:
+            with self._cond:
+                if self._http is None:
+                    import httpx
+                    self._http = httpx.Client(timeout=self._request_timeout)
+        return self._http
+
+    def _reschedule_from_store(self, topic):
+        subscription = self.store.get(topic)
+        with self._cond:
+            if subscription is not None and topic not in self._due:
+                self._schedule(topic, subscription.renew_at)
+
+    def _send(self, topic):
+        now = time.time()
+        subscription = self.store.claim(topic, now, now + CLAIM_SECONDS)
+        if subscription is None:
+            # 다른 인스턴스가 이미 보냈거나 허브 확인이 다른 인스턴스에서 처리되어 예약이 바뀌었습니다.
+            self._reschedule_from_store(topic)
+            return
+        mode = "unsubscribe" if subscription.state == "unsubscribing" else "subscribe"
+        data = {"hub.callback": self._callback_url, "hub.topic": topic, "hub.mode": mode, "hub.verify": "async"}
+        if mode == "subscribe":
+            data["hub.lease_seconds"] = str(self._lease_seconds)
+            if self._secret:
+                data["hub.secret"] = self._secret
+        error = None
+        retry_after = 0.0
+        try:
+            response = self._client().post(self._hub_url, data=data)
+            if response.status_code not in (202, 204):
+                error = f"{response.status_code} {response.text[:200]}"
+                try:
+                    retry_after = float(response.headers.get("Retry-After", 0))
+                except ValueError:
+                    pass
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        now = time.time()
+        attempts = subscription.attempts + 1
+        if error is None:
+            self.sent += 1
+            SUBSCRIPTION_REQUESTS.inc(mode=mode, outcome="accepted")
+            # 허브의 확인 요청이 오면 verify_intent() 가 lease 기준으로 다시 예약합니다.
+            renew_at = now + min(self._retry_max, self._verify_timeout * 2 ** (attempts - 1))
+        else:
+            self.failed += 1
+            SUBSCRIPTION_REQUESTS.inc(mode=mode, outcome="failed")
+            logging.warning("YouTube %s request for %s failed (attempt %s): %s", mode, topic, attempts, error)
+            delay = min(self._retry_max, self._retry_base * 2 ** (attempts - 1))
+            renew_at = now + max(retry_after, random.uniform(delay / 2, delay))
+        with self._cond:
+            if self.store.update_claimed(topic, subscription.renew_at, requested_at=now, renew_at=renew_at,
+                                         attempts=attempts, last_error=error):
+                self._schedule(topic, renew_at)
+                return
+        # 요청 중에 (어느 인스턴스에서든) 확인 요청이 먼저 처리되었다면 그 예약을 유지합니다.
+        self.store.update(topic, requested_at=now)
+        self._reschedule_from_store(topic)
+
+    def _send_and_release(self, topic):
+        try:
+            self._send(topic)
+        except Exception as e:
+            logging.error("YouTube subscription request for %s failed: %s", topic, e)
+        finally:
+            self._slots.release()
+
+    def _dispatch(self, topic):
+        self._slots.acquire()
+        return self._executor.submit(self._send_and_release, topic)
+
+    def _run(self):
+        self._load()
+        while True:
+            self._dispatch(self._pop_due(time.time, block=True))
+
+    # 공개 API ---------------------------------------------------------------
+
+    def start(self):
+        """Loads subscriptions in a background thread and, with the scheduler enabled, keeps renewing them."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run if self._scheduler else self._load,
+                                            name="youtube-subscriptions", daemon=True)
+            self._thread.start()
+        return self
+
+    def run_due(self):
+        """Sends every request that is due now and waits for them (for cron jobs and the CLI)."""
+        if not self._ready.is_set():
+            self._load()
+        futures = []
+        while (topic := self._pop_due(time.time, block=False)) is not None:
+            futures.append(self._dispatch(topic))
+        wait(futures)
+        return len(futures)
+
+    def _check_unmanaged(self):
+        if self._channels is not None:
+            raise ValueError("The channel list is set by YOUTUBE_CHANNEL_IDS / YOUTUBE_CHANNELS_FILE; edit it instead.")
+
+    def add(self, channel_ids):
+        """Subscribes channels (or moves them out of unsubscribing); requests go out right away."""
+        self._check_unmanaged()
+        now = time.time()
+        for topic in self.store.upsert(channel_ids, "pending", now):
+            self._schedule(topic, now)
+
+    def remove(self, channel_ids):
+        self._check_unmanaged()
+        now = time.time()
+        for topic in self.store.upsert(channel_ids, "unsubscribing", now):
+            self._schedule(topic, now)
+
+    def verify_intent(self, mode, topic, lease_seconds=None):
+        """Handles a hub verification GET; returns True if hub.challenge should be echoed."""
+        if not self._ready.is_set():
+            self._ready.wait(10)
+        subscription = self.store.get(topic)
+        now = time.time()
+        if mode == "subscribe":
+            if subscription is None or subscription.state == "unsubscribing":
+                self.rejected += 1
+                SUBSCRIPTION_REQUESTS.inc(mode="verify_subscribe", outcome="rejected")
+                logging.warning("Rejecting subscription to unknown YouTube topic: %s", topic)
+                return False
+            try:
+                lease = float(lease_seconds or self._lease_seconds)
+            except ValueError:
+                lease = float(self._lease_seconds)
+            renew_at = self._lease_renew_at(now, lease)
+            with self._cond:
+                self.store.update(topic, state="active", expires_at=now + lease, renew_at=renew_at,
+                                  verified_at=now, attempts=0, last_error=None)
+                self._schedule(topic, renew_at)
+            self.verified += 1
+            SUBSCRIPTION_REQUESTS.inc(mode="verify_subscribe", outcome="verified")
+            return True
+        if mode == "unsubscribe":
+            if subscription is not None and subscription.state != "unsubscribing":
+                self.rejected += 1
+                SUBSCRIPTION_REQUESTS.inc(mode="verify_unsubscribe", outcome="rejected")
+                logging.warning("Rejecting unsubscribe from active YouTube topic: %s", topic)
+                return False
+            if subscription is not None:
+                self._unschedule(topic)
+                self.store.delete(topic)
+            SUBSCRIPTION_REQUESTS.inc(mode="verify_unsubscribe", outcome="verified")
+            return True
+        self.rejected += 1
+        return False
+
+    def deny(self, topic, reason=None):
+        """Records a hub denial (hub.mode=denied, sent without a challenge); the retry schedule is kept."""
+        if not self._ready.is_set():
+            self._ready.wait(10)
+        if self.store.get(topic) is None:
+            return False
+        self.store.update(topic, last_error=f"denied: {reason}" if reason else "denied")
+        SUBSCRIPTION_REQUESTS.inc(mode="denied", outcome="recorded")
+        logging.warning("YouTube hub denied the subscription to %s: %s", topic, reason)
+        return True
+
+    def stats(self):
+        with self._cond:
+            next_due = min(self._due.values(), default=None) if len(self._due) < 100_000 else None
+            scheduled = len(self._due)
+            heap = len(self._heap)
+        return {
+            "subscriptions": self.store.counts(),
+            "scheduled": scheduled,
+            "heap": heap,
+            "next_request_in_seconds": max(0.0, next_due - time.time()) if next_due is not None else None,
+            "sent": self.sent,
+            "failed": self.failed,
+            "verified": self.verified,
+            "rejected": self.rejected,
+        }
+
+
+def read_channel_ids(path):
+    """Reads channel ids from a file, one per line ('#' comments and blank lines ignored)."""
+    with open(path, encoding="utf-8") as f:
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+
+
+def create_subscription_manager():
+    """Builds a SubscriptionManager from YOUTUBE_* environment variables; None without YOUTUBE_CALLBACK_URL.
+
+    YOUTUBE_CHANNEL_IDS / YOUTUBE_CHANNELS_FILE, when set, are the complete
+    channel list: missing channels are subscribed and others unsubscribed.
+    The renewal scheduler only runs by default when YOUTUBE_SUBSCRIPTIONS_PATH
+    is set explicitly, i.e. the store is shared by every instance; with the
+    per-instance /tmp default each new instance would start from an empty
+    store and subscribe every channel again.
+    """
+    callback_url = os.getenv("YOUTUBE_CALLBACK_URL")
+    if not callback_url:
+        return None
+    channels = None
+    if os.getenv("YOUTUBE_CHANNELS_FILE"):
+        channels = read_channel_ids(os.getenv("YOUTUBE_CHANNELS_FILE"))
+    elif os.getenv("YOUTUBE_CHANNEL_IDS"):
+        channels = parse_secrets(os.getenv("YOUTUBE_CHANNEL_IDS"))
+    secrets = parse_secrets(os.getenv("YOUTUBE_HUB_SECRETS")) or parse_secrets(os.getenv("YOUTUBE_HUB_SECRET"))
+    shared_store = bool(os.getenv("YOUTUBE_SUBSCRIPTIONS_PATH"))
+    scheduler = os.getenv("YOUTUBE_SUBSCRIPTION_SCHEDULER", "true" if shared_store else "false").lower() == "true"
+    if not shared_store:
+        logging.warning("YOUTUBE_SUBSCRIPTIONS_PATH is not set: the subscription store is local to this instance, "
+                        "so channels added from other stores are unknown here%s.",
+                        "" if scheduler else " and the renewal scheduler is off")
+    return SubscriptionManager(
+        SubscriptionStore(os.getenv("YOUTUBE_SUBSCRIPTIONS_PATH") or "/tmp/youtube_subscriptions.sqlite3"),
+        callback_url,
+        hub_url=os.getenv("YOUTUBE_HUB_URL", HUB_URL),
+        # 새 구독과 갱신에는 첫 번째 시크릿을 씁니다. 이전 시크릿은 lease 가 끝날 때까지 검증용으로 남겨 두세요.
+        secret=secrets[0] if secrets else None,
+        lease_seconds=int(os.getenv("YOUTUBE_LEASE_SECONDS", str(DEFAULT_LEASE_SECONDS))),
+        renew_before=float(os.getenv("YOUTUBE_RENEW_BEFORE_SECONDS", "86400")),
+        jitter=float(os.getenv("YOUTUBE_RENEW_JITTER_SECONDS", "3600")),
+        concurrency=int(os.getenv("YOUTUBE_RENEW_CONCURRENCY", "8")),
+        verify_timeout=float(os.getenv("YOUTUBE_VERIFY_TIMEOUT_SECONDS", "3600")),
+        channels=channels,
+        sync_spread=float(os.getenv("YOUTUBE_SYNC_SPREAD_SECONDS", "3600")),
+        # 인스턴스가 요청 사이에 CPU 를 받지 못하는 환경에서는 false 로 두고 manage_subscriptions.py renew 를 cron 으로 실행합니다.
+        scheduler=scheduler,
+    )
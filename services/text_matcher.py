@@ -0,0 +1,53 @@
+import re
+import unicodedata
+
+# 공백/줄바꿈 제거 후 비교하므로 띄어쓰기 변형은 따로 적지 않아도 됩니다.
+DISCLOSURE_PHRASES = (
+    "확률형 아이템 포함",
+    "확률형 아이템이 포함",
+    "확률형 아이템을 포함",
+    "확률형 아이템 포함됨",
+    "확률형아이템포함",
+    "확률형 아이템 포함입니다",
+    "확률형 아이템이 포함되어 있습니다",
+    "확률형 아이템이 포함되어 있음",
+    "확률형 아이템 포함되어 있습니다",
+)
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff\u00ad"), None)
+_WHITESPACE = re.compile(r"\s+")
+
+# 문구 바로 뒤가 글 끝이거나 아래 문자일 때만 고지로 봅니다. "확률형 아이템 포함 여부: 없음" 처럼
+# 뒤에 다른 말이 이어지면 부정인지 알 수 없으므로 모델이 판단하게 합니다.
+# ':' '/' '?' 는 "포함: 없음", "포함 / 미포함", "포함?" 처럼 값이나 질문이 이어지므로 넣지 않습니다.
+TERMINATORS = ".!,。、)]}」』】〉》#"
+
+# 끝맺음 문자 뒤에 부정 표현이 오면 ("[확률형 아이템 포함] X") 고지로 보지 않습니다.
+NEGATION_SUFFIXES = ("안", "않", "되지않", "되어있지않", "하지않", "없", "미포함", "x")
+
+
+def normalize_text(text):
+    """NFKC-normalizes text and drops whitespace, zero-width characters and case."""
+    text = unicodedata.normalize("NFKC", text or "").translate(_ZERO_WIDTH)
+    return _WHITESPACE.sub("", text).casefold()
+
+
+class PhraseMatcher:
+    """Matches any of a set of phrases in one pass over normalized text.
+
+    The normalized variants are compiled into a single alternation regex,
+    so the cost per call does not grow with the number of variants. A
+    phrase only counts when the text ends right after it or it is closed by
+    one of `terminators` not followed by a negation; anything else (e.g.
+    "포함 여부: 없음") is left to the next analysis tier.
+    """
+
+    def __init__(self, phrases=DISCLOSURE_PHRASES, negations=NEGATION_SUFFIXES, terminators=TERMINATORS):
+        variants = sorted({normalize_text(phrase) for phrase in phrases}, key=len, reverse=True)
+        negation = "|".join(map(re.escape, (normalize_text(suffix) for suffix in negations)))
+        closing = "".join(map(re.escape, normalize_text(terminators)))
+        self._pattern = re.compile(f"(?:{'|'.join(map(re.escape, variants))})(?=$|[{closing}](?!{negation}))")
+
+    def search(self, *texts):
+        """Returns True if any of texts contains one of the phrases."""
+        return any(self._pattern.search(normalize_text(text)) for text in texts if text)
@@ -1,10 +1,6 @@
 import logging
-import hmac
-import hashlib
 import json
 
-logging.basicConfig(level=logging.INFO)
-
 
 # 개발자 문서에 나온 예시 페이로드
 # webhook_payload = {
@@ -19,65 +15,16 @@ logging.basicConfig(level=logging.INFO)
 # 생성된 비디오 URI: https://www.tiktok.com/video/6974245311675353080
 
 def extract_video_id_from_content(content_str):
-    """'content' 문자열에서 숫자 비디오 ID를 추출합니다."""
+    """'content' 문자열(또는 이미 디코딩된 dict)에서 숫자 비디오 ID를 추출합니다."""
     try:
-        content_data = json.loads(content_str)
+        content_data = json.loads(content_str) if isinstance(content_str, (str, bytes)) else content_str
         share_id = content_data['share_id']
         video_id = share_id.split('.')[1]
         return video_id
-    except (KeyError, IndexError, json.JSONDecodeError) as e:
-        print(f"비디오 ID를 추출하는 중 오류 발생: {e}")
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+        logging.warning("비디오 ID를 추출하는 중 오류 발생: %s", e)
         return None
 
-def verify_tiktok_signature(request, client_secret):
-    """
-    Verifies the TikTok webhook signature.
-    Returns True if the signature is valid, False otherwise.
-    """
-    signature_header = request.headers.get('TikTok-Signature')
-    if not signature_header:
-        logging.warning("TikTok-Signature header missing.")
-        return False
-
-    try:
-        parts = signature_header.split(',')
-        timestamp = None
-        signature = None
-        for part in parts:
-            if part.startswith('t='):
-                timestamp = part[2:]
-            elif part.startswith('s='):
-                signature = part[2:]
-
-        if not timestamp or not signature:
-            logging.warning("TikTok-Signature header malformed (missing t or s).")
-            return False
-
-        # Construct the signed payload
-        signed_payload = f"{timestamp}.{request.get_data().decode('utf-8')}"
-
-        # Calculate the expected signature
-        expected_signature = hmac.new(
-            client_secret.encode('utf-8'),
-            signed_payload.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-
-        if not hmac.compare_digest(signature, expected_signature):
-            logging.warning(f"Signature mismatch. Received: {signature}, Expected: {expected_signature}")
-            return False
-
-        # Optional: Check timestamp for replay attacks (e.g., within 5 minutes)
-        # current_time = int(time.time())
-        # if abs(current_time - int(timestamp)) > 300: # 5 minutes
-        #     logging.warning("Timestamp too old, potential replay attack.")
-        #     return False
-
-        return True
-    except Exception as e:
-        logging.error(f"Error during TikTok signature verification: {e}")
-        return False
-    
     # Placeholder for parsing TikTok webhook data
 def parse_tiktok_webhook_data(data):
     """
@@ -88,7 +35,7 @@ def parse_tiktok_webhook_data(data):
     try:
         # TikTok webhooks usually send JSON
         tiktok_payload = json.loads(data)
-        logging.info(f"TikTok Webhook Payload: {tiktok_payload}")
+        logging.debug("TikTok Webhook Payload: %s", tiktok_payload)
 
         # Example parsing - adjust according to actual TikTok event structure
         event_type = tiktok_payload.get('event')
@@ -103,12 +50,12 @@ def parse_tiktok_webhook_data(data):
             }
             return video_info
         ## 이벤트 추가하기
-        logging.warning(f"Unhandled TikTok event type: {event_type}")
+        logging.warning("Unhandled TikTok event type: %s", event_type)
         return None
 
     except json.JSONDecodeError as e:
-        logging.error(f"Failed to decode TikTok webhook JSON: {e}")
+        logging.error("Failed to decode TikTok webhook JSON: %s", e)
         return None
     except Exception as e:
-        logging.error(f"Error parsing TikTok webhook data: {e}")
+        logging.error("Error parsing TikTok webhook data: %s", e)
         return None
\ No newline at end of file
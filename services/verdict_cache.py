@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def verdict_key(platform, video_id, prompt, model, text, profile=None):
+    """Builds the cache key for one analysis from its inputs (including the AnalysisProfile, if any)."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    text_hash = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    parts = [platform, str(video_id), prompt_hash, model, text_hash]
+    if profile is not None:
+        parts.append(repr(tuple(profile)))
+    raw = "\0".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class VerdictCache:
+    """Result cache in front of the Gemini call.
+
+    Entries live in an in-memory LRU and, when disk_path is given, in an
+    SQLite file that survives restarts. Concurrent lookups for the same key
+    while a call is in flight wait for that call instead of starting another.
+    """
+
+    def __init__(self, ttl_seconds=7 * 86400, max_entries=10000, disk_path=None):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._flights = {}
+        self._async_flights = {}  # key -> asyncio.Future (이벤트 루프 하나에서만 사용)
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_memory(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put_memory(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_disk(self, key, now):
+        if self._disk is None:
+            return None
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT value, expires_at FROM verdicts WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+        return row
+
+    def _put_disk(self, key, value, expires_at):
+        if self._disk is None:
+            return
+        try:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+        except sqlite3.Error as e:
+            logging.error("Failed to write verdict cache entry: %s", e)
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for key, or calls compute() once and caches its result."""
+        now = time.time()
+        leader = False
+        with self._lock:
+            value = self._get_memory(key, now)
+            if value is not None:
+                self.hits += 1
+                return value
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                leader = True
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            row = self._get_disk(key, now)
+            if row is not None:
+                value, expires_at = row
+                with self._lock:
+                    self.disk_hits += 1
+                    self._put_memory(key, value, expires_at)
+            else:
+                value = compute()
+                expires_at = time.time() + self._ttl
+                with self._lock:
+                    self.misses += 1
+                    self._put_memory(key, value, expires_at)
+                self._put_disk(key, value, expires_at)
+            flight.value = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def get_or_compute_async(self, key, compute):
+        """get_or_compute() for a coroutine function; concurrent callers on the event loop share one call."""
+        import asyncio
+        now = time.time()
+        with self._lock:
+            value = self._get_memory(key, now)
+            if value is not None:
+                self.hits += 1
+                return value
+            flight = self._async_flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+        if flight is not None:
+            return await asyncio.shield(flight)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._async_flights[key] = flight
+        try:
+            row = self._get_disk(key, now)
+            if row is not None:
+                value, expires_at = row
+                with self._lock:
+                    self.disk_hits += 1
+                    self._put_memory(key, value, expires_at)
+            else:
+                value = await compute()
+                expires_at = time.time() + self._ttl
+                with self._lock:
+                    self.misses += 1
+                    self._put_memory(key, value, expires_at)
+                self._put_disk(key, value, expires_at)
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            # 기다리는 호출이 없을 때 "exception was never retrieved" 경고를 막습니다.
+            flight.exception()
+            raise
+        finally:
+            self._async_flights.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            }
+
+
+def create_verdict_cache():
+    """Builds a VerdictCache from VERDICT_CACHE_* environment variables."""
+    return VerdictCache(
+        ttl_seconds=int(os.getenv("VERDICT_CACHE_TTL_SECONDS", str(7 * 86400))),
+        max_entries=int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "10000")),
+        disk_path=os.getenv("VERDICT_CACHE_PATH") or None,
+    )
@@ -1,41 +1,151 @@
-import xmltodict
 import logging
+from xml.parsers import expat
 
-def parse_youtube_webhook_data(xml_data):
-    """Parses the XML data from the YouTube webhook.
+ATOM_NS = "http://www.w3.org/2005/Atom"
+YT_NS = "http://www.youtube.com/xml/schemas/2015"
+TOMBSTONE_NS = "http://purl.org/atompub/tombstones/1.0"
+
+# expat은 namespace_separator로 "네임스페이스 URI + ' ' + 로컬 이름" 형태의 태그를 돌려줍니다.
+_ENTRY = f"{ATOM_NS} entry"
+_DELETED_ENTRY = f"{TOMBSTONE_NS} deleted-entry"
+_ENTRY_FIELDS = {
+    f"{YT_NS} videoId": "video_id",
+    f"{YT_NS} channelId": "channel_id",
+    f"{ATOM_NS} title": "title",
+    f"{ATOM_NS} published": "published",
+    f"{ATOM_NS} updated": "updated",
+}
+_DELETED_BY_URI = f"{ATOM_NS} uri"
+_REQUIRED_FIELDS = ("video_id", "channel_id", "title", "published")
+_CHUNK_SIZE = 64 * 1024
+
+
+class UnsafeXMLError(ValueError):
+    """Raised when the feed declares a DTD or entities."""
+
+
+class _FeedHandler:
+    """expat callbacks that collect entry fields without building a tree."""
+
+    def __init__(self):
+        self.entries = []
+        self._entry = None
+        self._field = None
+        self._text = []
+
+    def start(self, name, attrs):
+        if name == _ENTRY:
+            self._entry = {"deleted": False}
+        elif name == _DELETED_ENTRY:
+            ref = attrs.get("ref", "")
+            self._entry = {
+                "deleted": True,
+                "video_id": ref.rsplit(":", 1)[-1] if ref else None,
+                "deleted_at": attrs.get("when"),
+            }
+        elif self._entry is not None:
+            if self._entry["deleted"]:
+                self._field = "channel_uri" if name == _DELETED_BY_URI else None
+            else:
+                self._field = _ENTRY_FIELDS.get(name)
+            self._text = []
+
+    def end(self, name):
+        if name in (_ENTRY, _DELETED_ENTRY):
+            self.entries.append(self._entry)
+            self._entry = None
+        elif self._field is not None:
+            self._entry[self._field] = "".join(self._text).strip()
+            self._field = None
+
+    def text(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+
+def _reject_doctype(*args):
+    raise UnsafeXMLError("DTDs and entity declarations are not allowed in webhook payloads.")
+
+
+def iter_youtube_entries(xml_data):
+    """Yields every <entry> and <at:deleted-entry> of a PubSubHubbub Atom feed.
+
+    The body is fed to expat in chunks and entries are yielded as they are
+    completed, so no document tree is built. DOCTYPE and entity declarations
+    raise UnsafeXMLError.
+
+    Yields:
+        {"deleted": False, "video_id", "channel_id", "title", "published", "updated"}
+        for uploads/updates (missing fields are absent), or
+        {"deleted": True, "video_id", "deleted_at", "channel_uri"} for tombstones.
+    """
+    handler = _FeedHandler()
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.SetParamEntityParsing(expat.XML_PARAM_ENTITY_PARSING_NEVER)
+    parser.StartDoctypeDeclHandler = _reject_doctype
+    parser.EntityDeclHandler = _reject_doctype
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.text
+    parser.buffer_text = True
+
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode("utf-8")
+    view = memoryview(xml_data)
+    for offset in range(0, len(view), _CHUNK_SIZE):
+        parser.Parse(view[offset:offset + _CHUNK_SIZE].tobytes(), False)
+        if handler.entries:
+            yield from handler.entries
+            handler.entries.clear()
+    parser.Parse(b"", True)
+    yield from handler.entries
+
+
+def parse_youtube_webhook_entries(xml_data):
+    """Parses all entries from the YouTube webhook body.
 
     Args:
         xml_data: The raw XML data from the request.
 
     Returns:
-        A dictionary containing video details if successful, otherwise None.
+        A list of entry dictionaries (see iter_youtube_entries). Entries that
+        are neither complete nor tombstones are dropped. Returns an empty list
+        when the payload is empty or cannot be parsed.
     """
     if not xml_data:
         logging.warning("POST request received with empty payload.")
-        return None
+        return []
     try:
-        logging.info("Start parsing XML data...")
-        data = xmltodict.parse(xml_data)
-        entry = data.get('feed', {}).get('entry')
-        if not entry:
+        entries = []
+        for entry in iter_youtube_entries(xml_data):
+            if entry["deleted"] or all(entry.get(field) for field in _REQUIRED_FIELDS):
+                entries.append(entry)
+            else:
+                logging.warning("Incomplete data in 'entry'.")
+        if not entries:
             logging.warning("No 'entry' found in the XML data.")
-            return None
-
-        video_id = entry.get('yt:videoId')
-        channel_id = entry.get('yt:channelId')
-        title = entry.get('title')
-        published = entry.get('published')
-
-        if not all([video_id, channel_id, title, published]):
-            logging.warning("Incomplete data in 'entry'.")
-            return None
-
-        return {
-            "video_id": video_id,
-            "channel_id": channel_id,
-            "title": title,
-            "published": published
-        }
-    except Exception as e:
-        logging.error(f"Error parsing XML: {e}")
-        return None
+        return entries
+    except (expat.ExpatError, UnsafeXMLError) as e:
+        logging.error("Error parsing XML: %s", e)
+        return []
+
+
+def parse_youtube_webhook_data(xml_data):
+    """Parses the XML data from the YouTube webhook.
+
+    Args:
+        xml_data: The raw XML data from the request.
+
+    Returns:
+        A dictionary with the first uploaded/updated video's details if
+        successful, otherwise None.
+    """
+    for entry in parse_youtube_webhook_entries(xml_data):
+        if not entry["deleted"]:
+            return {
+                "video_id": entry["video_id"],
+                "channel_id": entry["channel_id"],
+                "title": entry["title"],
+                "published": entry["published"]
+            }
+    return None
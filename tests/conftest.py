@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main 을 import 하는 테스트가 /tmp 의 SQLite 파일이나 로컬 환경 변수에 영향을 받지 않도록 합니다.
+os.environ.update(
+    JOB_QUEUE_BACKEND="memory",
+    IDEMPOTENCY_BACKEND="memory",
+    RESULTS_DB_PATH="",
+    TIKTOK_CLIENT_SECRET="test-secret",
+    TIKTOK_CHANNEL_NAME="test",
+    LOG_LEVEL="WARNING",
+)
+for name in ("TIKTOK_CLIENT_SECRETS", "YOUTUBE_CALLBACK_URL", "ADMIN_API_TOKEN", "SLACK_WEBHOOK_URL", "WARMUP"):
+    os.environ.pop(name, None)
@@ -0,0 +1,72 @@
+import sqlite3
+import time
+
+from services.dedup import MemoryIdempotencyStore, RedisIdempotencyStore, SQLiteIdempotencyStore
+
+
+class FakeRedis:
+    """The subset of redis-py used by RedisIdempotencyStore (TTL ignored)."""
+
+    def __init__(self):
+        self.values = {}
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = str(value).encode()
+        return True
+
+    def get(self, name):
+        return self.values.get(name)
+
+
+def test_memory_store_skips_repeats():
+    store = MemoryIdempotencyStore(ttl_seconds=60, max_keys=100)
+    assert store.check_and_set("a")
+    assert not store.check_and_set("a")
+    assert store.check_and_set("b", owner="job-1")
+    assert store.stats() == {"hits": 1, "misses": 2}
+
+
+def test_sqlite_pending_key_is_given_back_to_the_same_job(tmp_path):
+    store = SQLiteIdempotencyStore(str(tmp_path / "keys.sqlite3"), pending_ttl_seconds=60)
+    assert store.check_and_set("event", owner="job-1")
+    # 같은 이벤트의 중복 웹훅(다른 작업)은 건너뛰고, 다시 실행된 같은 작업은 처리합니다.
+    assert not store.check_and_set("event", owner="job-2")
+    assert store.check_and_set("event", owner="job-1")
+
+    store.confirm("event")
+    assert not store.check_and_set("event", owner="job-1")
+    assert not store.check_and_set("event")
+
+
+def test_sqlite_pending_key_expires_without_confirm(tmp_path):
+    store = SQLiteIdempotencyStore(str(tmp_path / "keys.sqlite3"), pending_ttl_seconds=0.1)
+    assert store.check_and_set("event", owner="job-1")
+    time.sleep(0.2)
+    assert store.check_and_set("event", owner="job-2")
+
+
+def test_sqlite_store_shares_keys_between_processes(tmp_path):
+    path = str(tmp_path / "keys.sqlite3")
+    assert SQLiteIdempotencyStore(path).check_and_set("event")
+    assert not SQLiteIdempotencyStore(path).check_and_set("event")
+
+
+def test_sqlite_store_adds_owner_column_to_old_files(tmp_path):
+    path = str(tmp_path / "keys.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE idempotency_keys (key INTEGER PRIMARY KEY, expires_at REAL NOT NULL) WITHOUT ROWID")
+    conn.close()
+    store = SQLiteIdempotencyStore(path)
+    assert store.check_and_set("event", owner="job-1")
+    assert store.check_and_set("event", owner="job-1")
+
+
+def test_redis_pending_key_is_given_back_to_the_same_job():
+    store = RedisIdempotencyStore(FakeRedis())
+    assert store.check_and_set("event", owner="job-1")
+    assert not store.check_and_set("event", owner="job-2")
+    assert store.check_and_set("event", owner="job-1")
+    store.confirm("event")
+    assert not store.check_and_set("event", owner="job-1")
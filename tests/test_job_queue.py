@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.job_queue import JobQueue, QueueFull, SQLiteJobBackend
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def dead_backend(path, lease_seconds):
+    """A backend whose process 'died': it claims jobs but never renews their leases."""
+    backend = SQLiteJobBackend(path, lease_seconds=lease_seconds)
+    backend._start_heartbeat = lambda: None
+    return backend
+
+
+def test_claim_is_exclusive_across_backends(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    backends = [SQLiteJobBackend(path) for _ in range(3)]
+    for i in range(300):
+        backends[0].put("YouTube", {"n": i}, b"x")
+
+    claimed = []
+    lock = threading.Lock()
+
+    def drain(backend):
+        while (job := backend.claim()) is not None:
+            with lock:
+                claimed.append(job.id)
+            backend.ack(job.id)
+
+    threads = [threading.Thread(target=drain, args=(backend,)) for backend in backends]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(set(claimed))
+    assert len(claimed) == 300
+
+
+def test_claim_skips_saturated_platforms(tmp_path):
+    backend = SQLiteJobBackend(str(tmp_path / "jobs.sqlite3"))
+    backend.put("TikTok", {}, b"t")
+    backend.put("YouTube", {}, b"y")
+    assert backend.claim(skip_platforms=["TikTok"]).platform == "YouTube"
+    assert backend.claim(skip_platforms=["TikTok"]) is None
+    assert backend.claim().platform == "TikTok"
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    dead = dead_backend(path, lease_seconds=0.2)
+    dead.put("TikTok", {"a": "b"}, b"body")
+    job = dead.claim()
+    alive = SQLiteJobBackend(path)
+
+    assert alive.claim() is None
+    time.sleep(0.3)
+    again = alive.claim()
+    assert again.id == job.id and again.headers == {"a": "b"} and again.body == b"body"
+
+    # 이미 다른 프로세스가 가져간 작업은 원래 owner 가 ack 해도 지워지지 않습니다.
+    dead.ack(job.id)
+    alive.ack(again.id)
+    assert alive._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+
+
+def test_recover_only_resets_expired_leases(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    live = SQLiteJobBackend(path, lease_seconds=30)
+    live.put("YouTube", {}, b"live")
+    live.claim()
+    dead = dead_backend(path, lease_seconds=0.1)
+    dead.put("YouTube", {}, b"dead")
+    dead.claim()
+    time.sleep(0.2)
+
+    restarted = SQLiteJobBackend(path)
+    assert restarted.recover() == 1
+    assert restarted.depth() == 1
+    assert restarted.claim().body == b"dead"
+
+
+def test_heartbeat_keeps_a_long_job_leased(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    owner = SQLiteJobBackend(path, lease_seconds=0.3)
+    owner.put("YouTube", {}, b"x")
+    owner.claim()
+    time.sleep(0.6)
+    assert SQLiteJobBackend(path).claim() is None
+
+
+class FlakyBackend:
+    """Raises "database is locked" from the first `failures` claims and acks."""
+
+    def __init__(self, backend, failures=2):
+        self._backend = backend
+        self.claim_failures = failures
+        self.ack_failures = failures
+
+    def claim(self, skip_platforms=()):
+        if self.claim_failures:
+            self.claim_failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._backend.claim(skip_platforms)
+
+    def ack(self, job_id):
+        if self.ack_failures:
+            self.ack_failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._backend.ack(job_id)
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+
+def test_workers_survive_a_locked_database(tmp_path):
+    backend = FlakyBackend(SQLiteJobBackend(str(tmp_path / "jobs.sqlite3")))
+    done = []
+    queue = JobQueue(lambda platform, headers, body: done.append(body), backend=backend, workers=2,
+                     error_backoff=(0.01, 0.05))
+    try:
+        queue.submit("YouTube", {}, b"first")
+        assert wait_until(lambda: done == [b"first"])
+        queue.submit("YouTube", {}, b"second")
+        assert wait_until(lambda: len(done) == 2)
+        assert wait_until(lambda: queue.stats()["depth"] == 0)
+        stats = queue.stats()
+        assert stats["live_workers"] == 2
+        assert stats["backend_errors"] == 4
+    finally:
+        queue.stop(timeout=1)
+
+
+def test_submit_is_not_blocked_by_a_waiting_claim(tmp_path):
+    backend = SQLiteJobBackend(str(tmp_path / "jobs.sqlite3"))
+    claiming = threading.Event()
+    release = threading.Event()
+    real_claim = backend.claim
+
+    def slow_claim(skip_platforms=()):
+        # BEGIN IMMEDIATE 가 다른 프로세스의 쓰기를 기다리는 상황
+        claiming.set()
+        release.wait(2)
+        return real_claim(skip_platforms)
+
+    backend.claim = slow_claim
+    done = []
+    queue = JobQueue(lambda platform, headers, body: done.append(body), backend=backend, workers=1)
+    try:
+        queue.start()
+        assert claiming.wait(2)
+        started = time.monotonic()
+        queue.submit("YouTube", {}, b"x")
+        assert time.monotonic() - started < 0.5
+        release.set()
+        assert wait_until(lambda: done == [b"x"])
+    finally:
+        release.set()
+        queue.stop(timeout=1)
+
+
+def test_platform_limit_holds_across_workers(tmp_path):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def handler(platform, headers, body):
+        with lock:
+            running.append(body)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(body)
+
+    queue = JobQueue(handler, backend=SQLiteJobBackend(str(tmp_path / "jobs.sqlite3")), workers=6,
+                     platform_limits={"TikTok": 2})
+    try:
+        for i in range(40):
+            queue.submit("TikTok", {}, str(i).encode())
+        assert wait_until(lambda: queue.stats()["processed"] == 40, timeout=10)
+        assert max(peak) <= 2
+    finally:
+        queue.stop(timeout=1)
+
+
+def test_submit_rejects_when_full():
+    queue = JobQueue(lambda *job: None, workers=0, max_depth=1, platform_max_depth=None)
+    queue.submit("YouTube", {}, b"x")
+    with pytest.raises(QueueFull) as excinfo:
+        queue.submit("YouTube", {}, b"y")
+    assert excinfo.value.status_code == 503
+
+    queue = JobQueue(lambda *job: None, workers=0, platform_max_depth=1)
+    queue.submit("YouTube", {}, b"x")
+    with pytest.raises(QueueFull) as excinfo:
+        queue.submit("YouTube", {}, b"y")
+    assert excinfo.value.status_code == 429
+    queue.submit("TikTok", {}, b"z")
@@ -0,0 +1,29 @@
+import pytest
+
+from services.settings import load_settings
+
+
+def test_pool_sizes_follow_the_worker_counts():
+    settings = load_settings({})
+    # 작업 워커 4 + 팬아웃 8 + 재시도 워커 2
+    assert settings.slack_http_pool_size == 14
+    assert settings.gemini_http_pool_size == 14
+    assert settings.gemini_async_http_pool_size == settings.async_gemini_concurrency
+    assert settings.slack_async_http_pool_size == settings.async_slack_concurrency
+
+    settings = load_settings({"JOB_QUEUE_WORKERS": "10", "ANALYSIS_BATCH_SIZE": "4"})
+    assert settings.job_queue_workers == 10
+    assert settings.slack_http_pool_size == 20
+    # 배치 요청은 Gemini 만 호출합니다.
+    assert settings.gemini_http_pool_size == 20 + settings.analysis_batch_concurrency
+
+
+def test_explicit_pool_sizes_win():
+    settings = load_settings({"GEMINI_HTTP_POOL_SIZE": "5", "SLACK_HTTP_POOL_SIZE": "3"})
+    assert (settings.gemini_http_pool_size, settings.gemini_async_http_pool_size) == (5, 5)
+    assert (settings.slack_http_pool_size, settings.slack_async_http_pool_size) == (3, 3)
+
+
+def test_invalid_warmup_mode_is_rejected():
+    with pytest.raises(ValueError):
+        load_settings({"WARMUP": "sometimes"})
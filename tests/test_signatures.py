@@ -0,0 +1,158 @@
+import hashlib
+import hmac
+import time
+from types import SimpleNamespace
+
+import pytest
+from werkzeug.datastructures import Headers
+
+from services.job_queue import QueueFull
+from services.signatures import ReplayCache, TikTokSignatureVerifier
+
+NOW = 1_700_000_000.0
+TOLERANCE = 300
+
+
+class FakeClock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def signed(body, secret="secret", timestamp=NOW):
+    timestamp = str(int(timestamp))
+    signature = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return {"TikTok-Signature": f"t={timestamp},s={signature}"}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def verifier(clock):
+    cache = ReplayCache(ttl_seconds=2 * TOLERANCE, clock=clock)
+    return TikTokSignatureVerifier(["secret"], tolerance_seconds=TOLERANCE, replay_cache=cache, clock=clock)
+
+
+def test_accepts_a_valid_signature_once(verifier):
+    body = b'{"event":"video.publish.complete"}'
+    headers = signed(body)
+    assert verifier.verify(headers, body)
+    assert not verifier.verify(headers, body)
+
+
+@pytest.mark.parametrize("headers, body", [
+    ({}, b"{}"),
+    ({"TikTok-Signature": f"t={int(NOW)}"}, b"{}"),
+    ({"TikTok-Signature": f"t={int(NOW)},s=zz"}, b"{}"),
+    ({"TikTok-Signature": "t=abc,s=00"}, b"{}"),
+    (signed(b"{}", secret="other"), b"{}"),
+    (signed(b"{}"), b'{"x":1}'),
+    (signed(b"{}", timestamp=NOW - TOLERANCE - 1), b"{}"),
+    (signed(b"{}", timestamp=NOW + TOLERANCE + 1), b"{}"),
+])
+def test_rejects_bad_requests(verifier, headers, body):
+    assert not verifier.verify(headers, body)
+
+
+def test_rotated_secrets_are_accepted(clock):
+    verifier = TikTokSignatureVerifier(["new", "old"], tolerance_seconds=TOLERANCE, clock=clock)
+    assert verifier.verify(signed(b"{}", secret="old"), b"{}")
+    assert verifier.verify(signed(b"{}", secret="new"), b"{}")
+
+
+def test_replay_is_rejected_for_the_whole_window_of_a_fast_sender(verifier, clock):
+    headers = signed(b"{}", timestamp=NOW + TOLERANCE)
+    assert verifier.verify(headers, b"{}")
+    clock.now += 2 * TOLERANCE - 1
+    assert not verifier.verify(headers, b"{}")
+
+
+def test_forget_lets_the_same_request_through_again(verifier):
+    headers = signed(b"{}")
+    assert verifier.verify(headers, b"{}")
+    verifier.forget(headers)
+    assert verifier.verify(headers, b"{}")
+    assert not verifier.verify(headers, b"{}")
+
+
+def test_replay_cache_expires_and_bounds_entries(clock):
+    cache = ReplayCache(ttl_seconds=10, max_entries=2, clock=clock)
+    assert cache.add("a") and not cache.add("a")
+    clock.now += 11
+    assert not cache.seen("a") and cache.add("a")
+    cache.add("b")
+    cache.add("c")
+    assert cache.stats()["entries"] == 2
+    assert not cache.seen("a")
+
+
+class RecordingQueue:
+    """Stands in for main.JOB_QUEUE; raises the queued errors first."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.jobs = []
+
+    def submit(self, platform, headers, body):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.jobs.append((platform, headers, body))
+        return len(self.jobs)
+
+
+def tiktok_post(body, headers):
+    return SimpleNamespace(method="POST", args={}, headers=Headers(headers), get_data=lambda: body)
+
+
+@pytest.mark.parametrize("error", [QueueFull("Job queue is full"), QueueFull("backlog", status_code=429),
+                                   RuntimeError("database is locked")])
+def test_request_refused_by_the_queue_is_accepted_on_retry(monkeypatch, error):
+    import main
+
+    queue = RecordingQueue(error)
+    monkeypatch.setattr(main, "JOB_QUEUE", queue)
+    # main 의 재전송 캐시는 테스트 사이에 유지되므로 경우마다 다른 본문을 씁니다.
+    body = f'{{"event":"video.publish.complete","create_time":"{error!r}","content":"{{}}"}}'.encode()
+    request = tiktok_post(body, signed(body, secret="test-secret", timestamp=time.time()))
+
+    if isinstance(error, QueueFull):
+        assert main.route_request(request, "cid-1")[1] == error.status_code
+    else:
+        with pytest.raises(RuntimeError):
+            main.route_request(request, "cid-1")
+    assert main.route_request(request, "cid-2") == ("Accepted", 202)
+    assert main.route_request(request, "cid-3") == ("Unauthorized", 401)
+    assert len(queue.jobs) == 1
+
+
+def test_stored_job_carries_internal_headers_only_from_us(monkeypatch):
+    import main
+
+    queue = RecordingQueue()
+    monkeypatch.setattr(main, "JOB_QUEUE", queue)
+    body = b'{"event":"video.publish.complete","create_time":2,"content":"{}"}'
+    headers = dict(signed(body, secret="test-secret", timestamp=time.time()))
+    headers[main.VERIFIED_HEADER] = "spoofed"
+    headers[main.JOB_ID_HEADER] = "spoofed"
+    assert main.route_request(tiktok_post(body, headers), "cid") == ("Accepted", 202)
+
+    _, stored, _ = queue.jobs[0]
+    assert stored[main.VERIFIED_HEADER] == "1"
+    assert stored[main.JOB_ID_HEADER] != "spoofed"
+    assert sum(name.lower() == main.JOB_ID_HEADER.lower() for name in stored) == 1
+
+
+def test_forged_request_is_rejected_before_queueing(monkeypatch):
+    import main
+
+    queue = RecordingQueue()
+    monkeypatch.setattr(main, "JOB_QUEUE", queue)
+    body = b"{}"
+    request = tiktok_post(body, signed(body, secret="wrong", timestamp=time.time()))
+    assert main.route_request(request, "cid") == ("Unauthorized", 401)
+    assert queue.jobs == []
@@ -0,0 +1,115 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.subscriptions import DEFAULT_LEASE_SECONDS, SubscriptionManager, SubscriptionStore, topic_url
+
+
+class FakeHub:
+    """Records hub POSTs and answers 202, like the hub before its verification GET."""
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def post(self, url, data):
+        with self._lock:
+            self.requests.append(data)
+        return SimpleNamespace(status_code=202, text="", headers={})
+
+
+@pytest.fixture
+def hub():
+    return FakeHub()
+
+
+@pytest.fixture
+def instances(tmp_path, hub):
+    """Two instances sharing one store, as with a shared YOUTUBE_SUBSCRIPTIONS_PATH."""
+    path = str(tmp_path / "subscriptions.sqlite3")
+
+    def manager():
+        # scheduler=False 이면 start() 는 구독 목록만 읽고, 요청은 run_due() 로 보냅니다.
+        return SubscriptionManager(SubscriptionStore(path), "https://example.com/webhook", http=hub,
+                                   verify_timeout=0.1, scheduler=False).start()
+    return manager(), manager()
+
+
+def test_verification_answered_by_another_instance_stops_resubscribing(instances, hub):
+    sender, other = instances
+    sender.add(["UC1"])
+    other.run_due()
+    assert sender.run_due() == 1
+    assert len(hub.requests) == 1
+
+    # 허브의 확인 요청은 다른 인스턴스에 도착합니다.
+    assert other.verify_intent("subscribe", topic_url("UC1"), str(DEFAULT_LEASE_SECONDS))
+    for _ in range(3):
+        time.sleep(0.15)
+        sender.run_due()
+        other.run_due()
+    assert len(hub.requests) == 1
+    # 보낸 인스턴스도 저장소의 lease 기준 갱신 시각으로 다시 예약했습니다.
+    assert sender.stats()["next_request_in_seconds"] > DEFAULT_LEASE_SECONDS / 2
+
+
+def test_each_due_renewal_is_sent_by_one_instance(instances, hub):
+    first, second = instances
+    channels = [f"UC{i}" for i in range(50)]
+    # 다른 인스턴스(또는 manage_subscriptions.py)가 저장소에 넣은 구독을 두 인스턴스가 읽습니다.
+    first.store.upsert(channels, "pending", time.time())
+    first._load()
+    second._load()
+
+    threads = [threading.Thread(target=manager.run_due) for manager in instances]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(request["hub.topic"] for request in hub.requests) == sorted(map(topic_url, channels))
+
+
+def test_unanswered_request_is_sent_again_after_verify_timeout(instances, hub):
+    sender, _ = instances
+    sender.add(["UC1"])
+    sender.run_due()
+    time.sleep(0.15)
+    sender.run_due()
+    assert len(hub.requests) == 2
+    assert sender.store.get(topic_url("UC1")).attempts == 2
+
+
+def test_store_claim_takes_a_due_row_once(tmp_path):
+    store = SubscriptionStore(str(tmp_path / "subscriptions.sqlite3"))
+    now = time.time()
+    [topic] = store.upsert(["UC1"], "pending", now)
+    claimed = store.claim(topic, now, now + 300)
+    assert claimed.renew_at == now + 300
+    assert store.claim(topic, now, now + 300) is None
+    assert store.claim(topic_url("UC2"), now, now + 300) is None
+
+    assert store.update_claimed(topic, now + 300, renew_at=now + 60)
+    assert not store.update_claimed(topic, now + 300, renew_at=now + 120)
+    assert store.get(topic).renew_at == now + 60
+
+
+def test_verify_intent_only_accepts_known_topics(instances):
+    manager, _ = instances
+    manager.add(["UC1"])
+    assert manager.verify_intent("subscribe", topic_url("UC1"), "1000")
+    assert not manager.verify_intent("subscribe", topic_url("UC2"), "1000")
+    assert not manager.verify_intent("unsubscribe", topic_url("UC1"))
+    manager.remove(["UC1"])
+    assert manager.verify_intent("unsubscribe", topic_url("UC1"))
+    assert manager.store.get(topic_url("UC1")) is None
+
+
+def test_configured_channel_list_refuses_add_and_remove(tmp_path, hub):
+    manager = SubscriptionManager(SubscriptionStore(str(tmp_path / "s.sqlite3")), "https://example.com/webhook",
+                                  http=hub, channels=["UC1"], scheduler=False)
+    with pytest.raises(ValueError):
+        manager.add(["UC2"])
+    with pytest.raises(ValueError):
+        manager.remove(["UC1"])
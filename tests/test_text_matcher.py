@@ -0,0 +1,49 @@
+import pytest
+
+from services.text_matcher import PhraseMatcher, normalize_text
+
+
+@pytest.mark.parametrize("text", [
+    "확률형 아이템 포함",
+    "확률형아이템포함",
+    "확률형 아이템이 포함되어 있습니다.",
+    "확률형 아이템 포함됨!",
+    "[확률형 아이템 포함] 신규 캐릭터 뽑기",
+    "신규 업데이트 (확률형 아이템 포함)",
+    "【확률형 아이템 포함】",
+    "#확률형아이템포함 #게임",
+    "확률형\u200b 아이템 포함",
+    "ＡＤ｜확률형 아이템 포함",
+])
+def test_disclosure_variants_match(text):
+    assert PhraseMatcher().search(text)
+
+
+@pytest.mark.parametrize("text", [
+    "확률형 아이템 포함 여부: 없음",
+    "확률형 아이템 포함: 없음",
+    "확률형 아이템 포함 안 됨",
+    "확률형 아이템 포함되지 않음",
+    "확률형 아이템이 포함되어 있지 않습니다.",
+    "확률형 아이템 포함 / 미포함",
+    "확률형 아이템 포함?",
+    "확률형 아이템 포함 X",
+    "(확률형 아이템 포함) X",
+    "[확률형 아이템 포함] 없음",
+    "확률형 아이템 포함 게임 추천",
+    "확률형 아이템",
+    "",
+])
+def test_negated_or_continued_phrases_escalate(text):
+    assert not PhraseMatcher().search(text)
+
+
+def test_search_checks_each_text_separately():
+    matcher = PhraseMatcher()
+    assert matcher.search(None, "제목", "확률형 아이템 포함")
+    # 앞 텍스트의 끝이 다음 텍스트와 이어져 문구가 되지 않아야 합니다.
+    assert not matcher.search("확률형 아이템", "포함")
+
+
+def test_normalize_text_drops_spacing_and_case():
+    assert normalize_text(" A\u00adB\tｃ \n") == "abc"